@@ -9,10 +9,40 @@ from flask import (
 )
 from flask_cors import CORS
 from flask_migrate import Migrate
+from datetime import date
+from math import ceil
 from urllib.parse import urlencode
 
 from app.models import setup_db, Movie, Actor, Role
 from app.helper import to_date
+from app.read_models import (
+    MOVIE,
+    ACTOR,
+    ROLE,
+    CAST_MEMBER,
+    FILMOGRAPHY_ENTRY,
+    OPEN_ROLE,
+)
+from app.expansions import (
+    ACTOR_EXPANSIONS,
+    MOVIE_EXPANSIONS,
+    format_with_roles,
+    get_expansions,
+)
+from app.pagination import (
+    COUNT_EXACT,
+    ParentResource,
+    SubResourcePagination,
+    TotalCountCache,
+    count_total,
+    get_count_mode,
+    get_cursor_of,
+    get_page,
+    get_per_page,
+    is_keyset_pagination_requested,
+    order_by,
+    paginate_by_keyset,
+)
 
 from app.auth import (
     AUTH0_AUDIENCE,
@@ -21,7 +51,42 @@ from app.auth import (
     AUTH0_CALLBACK_SCHEME,
     AUTH0_CALLBACK_SERVER,
 )
-from app.auth import AuthError, requires_auth
+from app.auth import (
+    AuthError,
+    requires_auth,
+    get_auth_metrics_sink,
+    get_jwks_key_store,
+)
+from app.fieldsets import format_fields, get_fields
+from app.filters import (
+    ACTOR_FILTERS,
+    ACTOR_SORT_COLUMNS,
+    MOVIE_FILTERS,
+    MOVIE_SORT_COLUMNS,
+    get_list_query,
+)
+from app.multi_get import (
+    get_by_ids,
+    get_requested_ids,
+    is_multi_get_requested,
+)
+from app.cast_graph import CastGraphIndex, SIMILAR_MOVIES_TO_CACHE
+from app.stats import StatsIndex, DEFAULT_AGE_GROUP_YEARS
+from app.indexing import IndexNotReadyError, INDEX_MAX_AGE_SECONDS
+from app.autocomplete import (
+    AutocompleteIndex,
+    KINDS as AUTOCOMPLETE_KINDS,
+)
+from app.search import (
+    KIND_ACTOR,
+    KIND_MOVIE,
+    KIND_ROLE,
+    KINDS as SEARCH_KINDS,
+    SearchIndex,
+    load_search_results,
+)
+from app.local_idp import local_idp_cli
+from app.service_tokens import service_token_cli
 
 
 """
@@ -36,6 +101,22 @@ Constants for pagination.
 MOVIES_PER_PAGE = 10
 ACTORS_PER_PAGE = 10
 ROLES_PER_PAGE = 10
+SEARCH_RESULTS_PER_PAGE = 10
+MAX_AUTOCOMPLETE_SUGGESTIONS = 10
+COSTARS_PER_PAGE = 10
+SIMILAR_MOVIES = 10
+
+"""
+Keys of the cached totals of lists not filtered by the request.
+"""
+TOTAL_MOVIES = "movies"
+TOTAL_ACTORS = "actors"
+TOTAL_OPEN_ROLES = "open_roles"
+
+"""
+Seconds after which clients retry requests using an index being built.
+"""
+INDEX_NOT_READY_RETRY_AFTER = 5
 
 
 NO_CONTENT = ""
@@ -65,6 +146,71 @@ def create_app(test_config=None):
     """
     Migrate(app, db)
 
+    """
+    Cache the totals of unfiltered lists, invalidated on writes
+    """
+    total_counts = TotalCountCache()
+
+    """
+    Keep the search and autocompletion indexes, the co-star graph and
+    the statistics snapshot in memory, updated on writes. Outside of
+    tests, they are built in the background on the first request, and
+    requests using an index respond with 503 until it is built.
+    """
+    if test_config is None:
+        index_options = {
+            "max_age": INDEX_MAX_AGE_SECONDS,
+            "wait_for_build": False,
+        }
+    else:
+        index_options = {}
+    search_index = SearchIndex(app, **index_options)
+    autocomplete_index = AutocompleteIndex(app, **index_options)
+    cast_graph = CastGraphIndex(app, **index_options)
+    stats_index = StatsIndex(app, **index_options)
+
+    if test_config is None:
+
+        @app.before_request
+        def warm_up_indexes():
+            search_index.warm_up()
+            autocomplete_index.warm_up()
+            cast_graph.warm_up()
+            stats_index.warm_up()
+
+    def update_index(update, *args):
+        """Apply an update to an in-memory index, after the write it
+        reflects is committed.
+
+        The write is saved at this point, so a failure does not fail
+        the request: it is logged, and the index is rebuilt in the
+        background to pick up the write.
+
+        Args:
+        - update (method): The update method of the index.
+        - args: The arguments of the update.
+        """
+        try:
+            update(*args)
+        except Exception:
+            index = update.__self__
+            app.logger.exception(
+                "Failed to update the %s.", type(index).__name__
+            )
+            index.start_background_build()
+
+    def refresh_indexes_of_roles(movie_id):
+        """Refresh the indexes derived from the roles of a movie, after
+        changes of its roles are committed, see `update_index()`."""
+        update_index(cast_graph.refresh_cast, movie_id)
+        update_index(stats_index.refresh_roles, movie_id)
+
+    """
+    Enable CLI of the local identity provider and for service tokens
+    """
+    app.cli.add_command(local_idp_cli)
+    app.cli.add_command(service_token_cli)
+
     """
     Set up CORS for the API. Allow '*' for origins.
     """
@@ -95,6 +241,30 @@ def create_app(test_config=None):
     @app.route("/health", methods=["GET"])
     def health_check():
         return "Service is up!", 200
+
+    @app.route("/health/auth", methods=["GET"])
+    def auth_health_check():
+        """Report the state of the cached Auth0 key set for monitoring,
+        and the auth metrics if they are aggregated as histograms."""
+        state = {"jwks": get_jwks_key_store().get_state()}
+
+        metrics_sink = get_auth_metrics_sink()
+        if hasattr(metrics_sink, "get_snapshot"):
+            state["metrics"] = metrics_sink.get_snapshot()
+
+        return jsonify(state)
+
+    @app.route("/health/indexes", methods=["GET"])
+    def indexes_health_check():
+        """Report the state of the in-memory indexes for monitoring."""
+        return jsonify(
+            {
+                "search": search_index.get_state(),
+                "autocomplete": autocomplete_index.get_state(),
+                "cast_graph": cast_graph.get_state(),
+                "stats": stats_index.get_state(),
+            }
+        )
         
     """
     Index
@@ -173,28 +343,65 @@ def create_app(test_config=None):
     def get_movies(auth_token):
         """List all movies."""
 
-        # Support pagination:
-        # Get movies for page with "page" query parameter as default,
-        # or 1 if missing.
-        movies_query = db.select(Movie).order_by(Movie.title.asc())
-
-        movies = db.paginate(
-            movies_query,
+        # Support multi-get:
+        # Get the movies with the ids of the "ids" query parameter,
+        # if given.
+        if is_multi_get_requested():
+            return get_movies_by_ids()
+
+        # Support expansions:
+        # Embed the roles (and their actors) with the "expand" query
+        # parameter, if given.
+        expansions = get_expansions(MOVIE_EXPANSIONS)
+
+        # Support sparse fieldsets:
+        # Select only the fields of the "fields" query parameter,
+        # if given.
+        fields = get_fields(MOVIE)
+
+        # Support sorting and filtering:
+        # Sort by the "sort" query parameter, by title if missing, and
+        # filter by the sort column, if requested.
+        list_query = get_list_query(
+            MOVIE_SORT_COLUMNS, MOVIE_FILTERS, Movie.id
+        )
+        movies_order = list_query.order_columns
+
+        return paginate(
+            "movies",
+            list_query.apply_to(
+                db.select(MOVIE.project(fields, movies_order))
+            ),
+            order_columns=movies_order,
             per_page=None,
             max_per_page=MOVIES_PER_PAGE,
-            error_out=True,
-            count=True,
+            total_count_key=(
+                None if list_query.conditions else TOTAL_MOVIES
+            ),
+            format_elements=lambda movies: format_with_roles(
+                movies, expansions, Role.movie_id, fields
+            ),
+            descending=list_query.descending,
         )
 
-        formatted_movies = [movie.format() for movie in movies.items]
-
-        return jsonify(
-            {
-                "movies": formatted_movies,
-                "total_movies": movies.total,
-                "current_page": movies.page,
-                "total_pages": movies.pages,
-            }
+    @app.route(f"{API_BASE_PATH}/movies/multi-get", methods=["POST"])
+    @requires_auth(permission="get:movie")
+    def multi_get_movies(auth_token):
+        """Get movies by the list of ids in the request body."""
+
+        return get_movies_by_ids()
+
+    def get_movies_by_ids():
+        expansions = get_expansions(MOVIE_EXPANSIONS)
+        fields = get_fields(MOVIE)
+
+        return get_many(
+            "movies",
+            db.select(MOVIE.project(fields)),
+            Movie.id,
+            format_elements=lambda movies: format_with_roles(
+                movies, expansions, Role.movie_id, fields
+            ),
         )
 
     @app.route("{}/movies/<movie_id>".format(API_BASE_PATH), methods=["GET"])
@@ -202,9 +409,16 @@ def create_app(test_config=None):
     def get_movie(auth_token, movie_id):
         """Get a movie by id."""
 
-        movie = Movie.query.filter(Movie.id == movie_id).first_or_404()
+        expansions = get_expansions(MOVIE_EXPANSIONS)
+        fields = get_fields(MOVIE)
+
+        movie = db.first_or_404(
+            db.select(MOVIE.project(fields)).where(Movie.id == movie_id)
+        )
 
-        return jsonify(movie.format())
+        return jsonify(
+            format_with_roles([movie], expansions, Role.movie_id, fields)[0]
+        )
 
     @app.route(
         "{}/movies/<movie_id>".format(API_BASE_PATH), methods=["DELETE"]
@@ -215,12 +429,15 @@ def create_app(test_config=None):
 
         movie = Movie.query.filter(Movie.id == movie_id).first_or_404()
 
+        # The roles of the movie are deleted with it
+        role_ids = db.session.scalars(
+            db.select(Role.id).where(Role.movie_id == movie_id)
+        ).all()
+
         try:
             db.session.delete(movie)
             db.session.commit()
 
-            return NO_CONTENT, 204
-
         except Exception:
             db.session.rollback()
             abort(422)
@@ -228,6 +445,16 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        total_counts.invalidate(TOTAL_MOVIES)
+        total_counts.invalidate(TOTAL_OPEN_ROLES)
+        update_index(search_index.delete, KIND_MOVIE, [movie_id])
+        update_index(autocomplete_index.delete, KIND_MOVIE, [movie_id])
+        update_index(search_index.delete, KIND_ROLE, role_ids)
+        update_index(cast_graph.set_cast, movie_id, [])
+        update_index(stats_index.delete_movie, movie_id)
+
+        return NO_CONTENT, 204
+
     @app.route(f"{API_BASE_PATH}/movies", methods=["POST"])
     @requires_auth(permission="add:movie")
     def create_movie(auth_token):
@@ -246,9 +473,11 @@ def create_app(test_config=None):
             new_movie = Movie(title=title, release_date=release_date)
 
             db.session.add(new_movie)
+            db.session.flush()
+            movie_id = new_movie.id
             db.session.commit()
 
-            return jsonify(new_movie.format())
+            response = jsonify(new_movie.format())
 
         except Exception:
             db.session.rollback()
@@ -257,6 +486,13 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        total_counts.invalidate(TOTAL_MOVIES)
+        update_index(search_index.put, KIND_MOVIE, movie_id, title)
+        update_index(autocomplete_index.put, KIND_MOVIE, movie_id, title)
+        update_index(stats_index.put_movie, movie_id, release_date)
+
+        return response
+
     @app.route("{}/movies/<movie_id>".format(API_BASE_PATH), methods=["PUT"])
     @requires_auth(permission="modify:movie")
     def update_movie(auth_token, movie_id):
@@ -279,7 +515,7 @@ def create_app(test_config=None):
             movie.release_date = release_date
             db.session.commit()
 
-            return jsonify(movie.format())
+            response = jsonify(movie.format())
 
         except Exception:
             db.session.rollback()
@@ -288,6 +524,12 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        update_index(search_index.put, KIND_MOVIE, movie_id, title)
+        update_index(autocomplete_index.put, KIND_MOVIE, movie_id, title)
+        update_index(stats_index.put_movie, movie_id, release_date)
+
+        return response
+
     @app.route("{}/movies/<movie_id>".format(API_BASE_PATH), methods=["PATCH"])
     @requires_auth(permission="modify:movie")
     def patch_movie(auth_token, movie_id):
@@ -309,9 +551,10 @@ def create_app(test_config=None):
                 assert new_release_date, "No valid release date provided!"
                 movie.release_date = new_release_date
 
+            title, release_date = movie.title, movie.release_date
             db.session.commit()
 
-            return jsonify(movie.format())
+            response = jsonify(movie.format())
 
         except AssertionError as err:
             db.session.rollback()
@@ -324,6 +567,12 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        update_index(search_index.put, KIND_MOVIE, movie_id, title)
+        update_index(autocomplete_index.put, KIND_MOVIE, movie_id, title)
+        update_index(stats_index.put_movie, movie_id, release_date)
+
+        return response
+
     """
     Resource: actors
     """
@@ -333,28 +582,65 @@ def create_app(test_config=None):
     def get_actors(auth_token):
         """List all actors."""
 
-        # Support pagination:
-        # Get movies for page with "page" query parameter as default,
-        # or 1 if missing.
-        actors_query = db.select(Actor).order_by(Actor.name.asc())
-
-        actors = db.paginate(
-            actors_query,
+        # Support multi-get:
+        # Get the actors with the ids of the "ids" query parameter,
+        # if given.
+        if is_multi_get_requested():
+            return get_actors_by_ids()
+
+        # Support expansions:
+        # Embed the roles (and their movies) with the "expand" query
+        # parameter, if given.
+        expansions = get_expansions(ACTOR_EXPANSIONS)
+
+        # Support sparse fieldsets:
+        # Select only the fields of the "fields" query parameter,
+        # if given.
+        fields = get_fields(ACTOR)
+
+        # Support sorting and filtering:
+        # Sort by the "sort" query parameter, by name if missing, and
+        # filter by the sort column, if requested.
+        list_query = get_list_query(
+            ACTOR_SORT_COLUMNS, ACTOR_FILTERS, Actor.id
+        )
+        actors_order = list_query.order_columns
+
+        return paginate(
+            "actors",
+            list_query.apply_to(
+                db.select(ACTOR.project(fields, actors_order))
+            ),
+            order_columns=actors_order,
             per_page=None,
             max_per_page=ACTORS_PER_PAGE,
-            error_out=True,
-            count=True,
+            total_count_key=(
+                None if list_query.conditions else TOTAL_ACTORS
+            ),
+            format_elements=lambda actors: format_with_roles(
+                actors, expansions, Role.actor_id, fields
+            ),
+            descending=list_query.descending,
         )
 
-        formatted_actors = [actor.format() for actor in actors]
-
-        return jsonify(
-            {
-                "actors": formatted_actors,
-                "total_actors": actors.total,
-                "current_page": actors.page,
-                "total_pages": actors.pages,
-            }
+    @app.route(f"{API_BASE_PATH}/actors/multi-get", methods=["POST"])
+    @requires_auth(permission="get:actor")
+    def multi_get_actors(auth_token):
+        """Get actors by the list of ids in the request body."""
+
+        return get_actors_by_ids()
+
+    def get_actors_by_ids():
+        expansions = get_expansions(ACTOR_EXPANSIONS)
+        fields = get_fields(ACTOR)
+
+        return get_many(
+            "actors",
+            db.select(ACTOR.project(fields)),
+            Actor.id,
+            format_elements=lambda actors: format_with_roles(
+                actors, expansions, Role.actor_id, fields
+            ),
         )
 
     @app.route("{}/actors/<actor_id>".format(API_BASE_PATH), methods=["GET"])
@@ -362,9 +648,16 @@ def create_app(test_config=None):
     def get_actor(auth_token, actor_id):
         """Get an actor by id."""
 
-        actor = Actor.query.filter(Actor.id == actor_id).first_or_404()
+        expansions = get_expansions(ACTOR_EXPANSIONS)
+        fields = get_fields(ACTOR)
 
-        return jsonify(actor.format())
+        actor = db.first_or_404(
+            db.select(ACTOR.project(fields)).where(Actor.id == actor_id)
+        )
+
+        return jsonify(
+            format_with_roles([actor], expansions, Role.actor_id, fields)[0]
+        )
 
     @app.route(
         "{}/actors/<actor_id>".format(API_BASE_PATH), methods=["DELETE"]
@@ -379,8 +672,6 @@ def create_app(test_config=None):
             db.session.delete(actor)
             db.session.commit()
 
-            return NO_CONTENT, 204
-
         except Exception:
             db.session.rollback()
             abort(422)
@@ -388,6 +679,13 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        total_counts.invalidate(TOTAL_ACTORS)
+        update_index(search_index.delete, KIND_ACTOR, [actor_id])
+        update_index(autocomplete_index.delete, KIND_ACTOR, [actor_id])
+        update_index(stats_index.delete_actor, actor_id)
+
+        return NO_CONTENT, 204
+
     @app.route(f"{API_BASE_PATH}/actors", methods=["POST"])
     @requires_auth(permission="add:actor")
     def create_actor(auth_token):
@@ -405,9 +703,11 @@ def create_app(test_config=None):
             new_actor = Actor(name=name, birth_date=birth_date)
 
             db.session.add(new_actor)
+            db.session.flush()
+            actor_id = new_actor.id
             db.session.commit()
 
-            return jsonify(new_actor.format())
+            response = jsonify(new_actor.format())
 
         except Exception:
             db.session.rollback()
@@ -416,6 +716,13 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        total_counts.invalidate(TOTAL_ACTORS)
+        update_index(search_index.put, KIND_ACTOR, actor_id, name)
+        update_index(autocomplete_index.put, KIND_ACTOR, actor_id, name)
+        update_index(stats_index.put_actor, actor_id, birth_date)
+
+        return response
+
     @app.route("{}/actors/<actor_id>".format(API_BASE_PATH), methods=["PUT"])
     @requires_auth(permission="modify:actor")
     def update_actor(auth_token, actor_id):
@@ -438,7 +745,7 @@ def create_app(test_config=None):
             actor.birth_date = birth_date
             db.session.commit()
 
-            return jsonify(actor.format())
+            response = jsonify(actor.format())
 
         except Exception:
             db.session.rollback()
@@ -447,6 +754,12 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        update_index(search_index.put, KIND_ACTOR, actor_id, name)
+        update_index(autocomplete_index.put, KIND_ACTOR, actor_id, name)
+        update_index(stats_index.put_actor, actor_id, birth_date)
+
+        return response
+
     @app.route("{}/actors/<actor_id>".format(API_BASE_PATH), methods=["PATCH"])
     @requires_auth(permission="modify:actor")
     def patch_actor(auth_token, actor_id):
@@ -468,9 +781,10 @@ def create_app(test_config=None):
                 assert new_birth_date, "No valid birth date provided!"
                 actor.birth_date = new_birth_date
 
+            name, birth_date = actor.name, actor.birth_date
             db.session.commit()
 
-            return jsonify(actor.format())
+            response = jsonify(actor.format())
 
         except AssertionError as err:
             db.session.rollback()
@@ -483,6 +797,12 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        update_index(search_index.put, KIND_ACTOR, actor_id, name)
+        update_index(autocomplete_index.put, KIND_ACTOR, actor_id, name)
+        update_index(stats_index.put_actor, actor_id, birth_date)
+
+        return response
+
     """
     Sub-resource: roles
     """
@@ -492,37 +812,20 @@ def create_app(test_config=None):
     def get_roles_for_movie(auth_token, movie_id):
         """Get all roles for a movie by id."""
 
-        # Check that movie exists
-        Movie.query.filter(Movie.id == movie_id).first_or_404()
-
-        # Support pagination:
-        # Get movies for page with "page" query parameter as default,
-        # or 1 if missing.
-        roles_query = (
-            db.select(Role)
-            .where(Role.movie_id == movie_id)
-            .order_by(Role.character.asc())
+        fields = get_fields(ROLE)
+        roles_order = (Role.character, Role.id)
+        roles_query = db.select(ROLE.project(fields, roles_order)).where(
+            Role.movie_id == movie_id
         )
 
-        # roles_query = movie.roles.order_by(Role.character.asc())
-
-        roles = db.paginate(
+        return paginate(
+            "roles",
             roles_query,
+            order_columns=roles_order,
             per_page=None,
             max_per_page=ROLES_PER_PAGE,
-            error_out=True,
-            count=True,
-        )
-
-        formatted_roles = [role.format() for role in roles]
-
-        return jsonify(
-            {
-                "roles": formatted_roles,
-                "total_roles": roles.total,
-                "current_page": roles.page,
-                "total_pages": roles.pages,
-            }
+            parent=ParentResource(Movie, movie_id),
+            fields=fields,
         )
 
     @app.route(
@@ -532,11 +835,15 @@ def create_app(test_config=None):
     def get_role(auth_token, movie_id, role_id):
         """Get role by id."""
 
-        role = Role.query.filter(
-            Role.movie_id == movie_id, Role.id == role_id
-        ).first_or_404()
+        fields = get_fields(ROLE)
 
-        return jsonify(role.format())
+        role = db.first_or_404(
+            db.select(ROLE.project(fields)).where(
+                Role.movie_id == movie_id, Role.id == role_id
+            )
+        )
+
+        return jsonify(format_fields(role, fields))
 
     @app.route(
         f"{API_BASE_PATH}/movies/<movie_id>/roles/<role_id>",
@@ -554,8 +861,6 @@ def create_app(test_config=None):
             db.session.delete(role)
             db.session.commit()
 
-            return NO_CONTENT, 204
-
         except Exception:
             db.session.rollback()
             abort(422)
@@ -563,6 +868,12 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        total_counts.invalidate(TOTAL_OPEN_ROLES)
+        update_index(search_index.delete, KIND_ROLE, [role_id])
+        refresh_indexes_of_roles(movie_id)
+
+        return NO_CONTENT, 204
+
     @app.route(f"{API_BASE_PATH}/movies/<movie_id>/roles", methods=["POST"])
     @requires_auth(permission="modify:movie")
     def create_role(auth_token, movie_id):
@@ -591,9 +902,11 @@ def create_app(test_config=None):
             new_role = Role(character=character, movie=movie, actor=actor)
 
             db.session.add(new_role)
+            db.session.flush()
+            role_id = new_role.id
             db.session.commit()
 
-            return jsonify(new_role.format())
+            response = jsonify(new_role.format())
 
         except Exception:
             db.session.rollback()
@@ -602,6 +915,12 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        total_counts.invalidate(TOTAL_OPEN_ROLES)
+        update_index(search_index.put, KIND_ROLE, role_id, character)
+        refresh_indexes_of_roles(movie_id)
+
+        return response
+
     @app.route(
         f"{API_BASE_PATH}/movies/<movie_id>/roles/<role_id>", methods=["PATCH"]
     )
@@ -633,9 +952,10 @@ def create_app(test_config=None):
 
                 role.actor = actor
 
+            character = role.character
             db.session.commit()
 
-            return jsonify(role.format())
+            response = jsonify(role.format())
 
         except AssertionError as err:
             db.session.rollback()
@@ -648,41 +968,579 @@ def create_app(test_config=None):
         finally:
             db.session.close()
 
+        total_counts.invalidate(TOTAL_OPEN_ROLES)
+        update_index(search_index.put, KIND_ROLE, role_id, character)
+        if actor_id_specified:
+            refresh_indexes_of_roles(movie_id)
+
+        return response
+
     @app.route(f"{API_BASE_PATH}/actors/<actor_id>/roles", methods=["GET"])
     @requires_auth(permission="get:actor")
     def get_roles_for_actor(auth_token, actor_id):
         """Get all roles for an actor by id."""
 
-        # Check that movie exists
-        Actor.query.filter(Actor.id == actor_id).first_or_404()
-
-        # Support pagination:
-        # Get movies for page with "page" query parameter as default,
-        # or 1 if missing.
-        roles_query = (
-            db.select(Role)
-            .where(Role.actor_id == actor_id)
-            .order_by(Role.character.asc())
+        fields = get_fields(ROLE)
+        roles_order = (Role.character, Role.id)
+        roles_query = db.select(ROLE.project(fields, roles_order)).where(
+            Role.actor_id == actor_id
         )
 
-        roles = db.paginate(
+        return paginate(
+            "roles",
             roles_query,
+            order_columns=roles_order,
             per_page=ROLES_PER_PAGE,
-            error_out=True,
-            count=True,
+            max_per_page=ROLES_PER_PAGE,
+            parent=ParentResource(Actor, actor_id),
+            fields=fields,
+        )
+
+    @app.route(f"{API_BASE_PATH}/roles", methods=["GET"])
+    @app.route(f"{API_BASE_PATH}/roles/multi-get", methods=["POST"])
+    @requires_auth(permission="get:movie")
+    def multi_get_roles(auth_token):
+        """Get roles of any movies by a list of ids."""
+
+        fields = get_fields(ROLE)
+
+        return get_many(
+            "roles", db.select(ROLE.project(fields)), Role.id, fields=fields
+        )
+
+    @app.route(f"{API_BASE_PATH}/roles/open", methods=["GET"])
+    @requires_auth(permission="get:movie")
+    def get_open_roles(auth_token):
+        """List the roles without an actor of all movies."""
+
+        open_roles_query = db.select(OPEN_ROLE).where(
+            Role.actor_id.is_(None)
+        )
+
+        return paginate(
+            "open_roles",
+            open_roles_query,
+            order_columns=(Role.character, Role.id),
+            per_page=None,
+            max_per_page=ROLES_PER_PAGE,
+            total_count_key=TOTAL_OPEN_ROLES,
+        )
+
+    """
+    Aggregated views: cast sheet and filmography
+    """
+
+    @app.route(f"{API_BASE_PATH}/movies/<movie_id>/cast", methods=["GET"])
+    @requires_auth(permission="get:movie")
+    def get_cast_of_movie(auth_token, movie_id):
+        """Get a movie with its roles and their actors."""
+
+        cast_query = (
+            db.select(CAST_MEMBER)
+            .select_from(Role)
+            .outerjoin(Actor, Role.actor_id == Actor.id)
+            .where(Role.movie_id == movie_id)
+        )
+
+        return paginate(
+            "cast",
+            cast_query,
+            order_columns=(Role.character, Role.id),
+            per_page=None,
+            max_per_page=ROLES_PER_PAGE,
+            parent=ParentResource(Movie, movie_id, read_model=MOVIE),
+        )
+
+    @app.route(
+        f"{API_BASE_PATH}/actors/<actor_id>/filmography", methods=["GET"]
+    )
+    @requires_auth(permission="get:actor")
+    def get_filmography_of_actor(auth_token, actor_id):
+        """Get an actor with its roles and their movies,
+        ordered by release date."""
+
+        filmography_query = (
+            db.select(FILMOGRAPHY_ENTRY)
+            .select_from(Role)
+            .join(Movie, Role.movie_id == Movie.id)
+            .where(Role.actor_id == actor_id)
+        )
+
+        return paginate(
+            "filmography",
+            filmography_query,
+            order_columns=(Movie.release_date, Role.id),
+            per_page=None,
+            max_per_page=ROLES_PER_PAGE,
+            parent=ParentResource(Actor, actor_id, read_model=ACTOR),
+        )
+
+    """
+    Co-star graph
+    """
+
+    @app.route(f"{API_BASE_PATH}/actors/<actor_id>/costars", methods=["GET"])
+    @requires_auth(permission="get:actor")
+    def get_costars_of_actor(auth_token, actor_id):
+        """Get the actors having a role in the same movies as an actor,
+        most shared movies first."""
+
+        actor = db.first_or_404(db.select(ACTOR).where(Actor.id == actor_id))
+
+        page = get_page()
+        per_page = get_per_page(COSTARS_PER_PAGE)
+        costars = cast_graph.get_costars(actor_id)
+        page_costars = costars[(page - 1) * per_page:page * per_page]
+        if page > 1 and not page_costars:
+            abort(404)
+
+        # Actors deleted by other processes, but still in the graph,
+        # are dropped from the page
+        actors, _ = get_by_ids(
+            db.select(ACTOR),
+            Actor.id,
+            [costar_id for costar_id, _ in page_costars],
+        )
+        actors_by_id = {costar.id: costar for costar in actors}
+
+        return jsonify(
+            {
+                "actor": actor.format(),
+                "costars": [
+                    {
+                        "actor": actors_by_id[costar_id].format(),
+                        "shared_movies": shared_movies,
+                    }
+                    for costar_id, shared_movies in page_costars
+                    if costar_id in actors_by_id
+                ],
+                "total_costars": len(costars),
+                "current_page": page,
+                "total_pages": ceil(len(costars) / per_page),
+            }
+        )
+
+    @app.route(
+        f"{API_BASE_PATH}/actors/<actor_id>/path-to/<other_actor_id>",
+        methods=["GET"],
+    )
+    @requires_auth(permission="get:actor")
+    def get_path_between_actors(auth_token, actor_id, other_actor_id):
+        """Get a shortest chain of co-stars from an actor to another
+        ("degrees of separation")."""
+
+        path = cast_graph.find_path(actor_id, other_actor_id)
+        actor_ids, movie_ids = path if path is not None else ([], [])
+
+        actors, missing_actor_ids = get_by_ids(
+            db.select(ACTOR),
+            Actor.id,
+            list(dict.fromkeys([actor_id, other_actor_id, *actor_ids])),
+        )
+        movies, missing_movie_ids = get_by_ids(
+            db.select(MOVIE), Movie.id, movie_ids
+        )
+        # Also missing if deleted by another process, but still in the
+        # graph until it is rebuilt
+        if missing_actor_ids or missing_movie_ids:
+            abort(404)
+        if path is None:
+            return jsonify({"degrees": None, "actors": [], "movies": []})
+
+        actors_by_id = {actor.id: actor for actor in actors}
+        movies_by_id = {movie.id: movie for movie in movies}
+        return jsonify(
+            {
+                "degrees": len(movie_ids),
+                "actors": [
+                    actors_by_id[path_actor_id].format()
+                    for path_actor_id in actor_ids
+                ],
+                "movies": [
+                    movies_by_id[movie_id].format() for movie_id in movie_ids
+                ],
+            }
+        )
+
+    @app.route(f"{API_BASE_PATH}/movies/<movie_id>/similar", methods=["GET"])
+    @requires_auth(permission="get:movie")
+    def get_similar_movies(auth_token, movie_id):
+        """Get the movies with the most similar casts to a movie."""
+
+        movie = db.first_or_404(db.select(MOVIE).where(Movie.id == movie_id))
+
+        limit = request.args.get("limit", SIMILAR_MOVIES, type=int)
+        assert limit is not None and limit >= 1, "Invalid limit!"
+
+        similar_movies = cast_graph.get_similar_movies(
+            movie_id, min(limit, SIMILAR_MOVIES_TO_CACHE)
+        )
+
+        # Movies deleted by other processes, but still in the graph,
+        # are dropped
+        movies, _ = get_by_ids(
+            db.select(MOVIE),
+            Movie.id,
+            [similar_movie_id for similar_movie_id, _, _ in similar_movies],
+        )
+        movies_by_id = {similar.id: similar for similar in movies}
+
+        return jsonify(
+            {
+                "movie": movie.format(),
+                "similar_movies": [
+                    {
+                        "movie": movies_by_id[similar_movie_id].format(),
+                        "similarity": round(similarity, 4),
+                        "shared_actors": shared_actors,
+                    }
+                    for similar_movie_id, similarity, shared_actors in (
+                        similar_movies
+                    )
+                    if similar_movie_id in movies_by_id
+                ],
+            }
+        )
+
+    """
+    Search
+    """
+
+    @app.route(f"{API_BASE_PATH}/search", methods=["GET"])
+    @requires_auth(permission="get:movie")
+    def search(auth_token):
+        """Search movies, actors and roles by title, name or character,
+        best matches first."""
+
+        query = request.args.get("q", "").strip()
+        assert query, "No search query provided!"
+
+        kinds = SEARCH_KINDS
+        kind = request.args.get("type")
+        if kind is not None:
+            assert kind in SEARCH_KINDS, "Unsupported search type!"
+            kinds = (kind,)
+
+        # Actors are only found with the permission to get them
+        if (
+            auth_token is not None
+            and "get:actor" not in auth_token.get_permissions()
+        ):
+            kinds = tuple(kind for kind in kinds if kind != KIND_ACTOR)
+
+        page = get_page()
+        per_page = get_per_page(SEARCH_RESULTS_PER_PAGE)
+        results, total = search_index.search(
+            query, kinds, limit=per_page, offset=(page - 1) * per_page
+        )
+        if page > 1 and not results:
+            abort(404)
+
+        return jsonify(
+            {
+                "results": [
+                    {
+                        "type": kind,
+                        "score": round(score, 4),
+                        kind: view.format(),
+                    }
+                    for kind, view, score in load_search_results(results)
+                ],
+                "total_results": total,
+                "current_page": page,
+                "total_pages": ceil(total / per_page),
+            }
+        )
+
+    @app.route(f"{API_BASE_PATH}/autocomplete", methods=["GET"])
+    @requires_auth()
+    def autocomplete(auth_token):
+        """Complete a prefix to movie titles or actor names."""
+
+        kind = request.args.get("type")
+        assert kind in AUTOCOMPLETE_KINDS, "Unsupported autocomplete type!"
+
+        # Movie titles and actor names require the permission to get
+        # movies or actors respectively
+        if auth_token is not None:
+            auth_token.check_permission(f"get:{kind}")
+
+        prefix = request.args.get("prefix", "")
+        assert prefix.strip(), "No prefix provided!"
+
+        limit = request.args.get(
+            "limit", MAX_AUTOCOMPLETE_SUGGESTIONS, type=int
+        )
+        assert limit is not None and limit >= 1, "Invalid limit!"
+
+        text_field = "title" if kind == KIND_MOVIE else "name"
+        suggestions = autocomplete_index.complete(
+            prefix, kind, limit=min(limit, MAX_AUTOCOMPLETE_SUGGESTIONS)
+        )
+
+        return jsonify(
+            {
+                "suggestions": [
+                    {"id": id, text_field: text} for id, text in suggestions
+                ]
+            }
+        )
+
+    """
+    Statistics
+    """
+
+    @app.route(f"{API_BASE_PATH}/stats", methods=["GET"])
+    @requires_auth(permission="get:movie")
+    def get_stats(auth_token):
+        """Get the numbers of movies, actors, roles and open roles."""
+
+        # The number of actors requires the permission to get actors
+        if auth_token is not None:
+            auth_token.check_permission("get:actor")
+
+        return jsonify(stats_index.get_totals())
+
+    @app.route(f"{API_BASE_PATH}/stats/movies-per-year", methods=["GET"])
+    @requires_auth(permission="get:movie")
+    def get_movies_per_year(auth_token):
+        """Get the number of movies released per year."""
+
+        return jsonify(
+            {
+                "movies_per_year": [
+                    {"year": year, "movies": movies}
+                    for year, movies in stats_index.count_movies_per_year()
+                ]
+            }
         )
 
-        formatted_roles = [role.format() for role in roles]
+    @app.route(f"{API_BASE_PATH}/stats/actor-ages", methods=["GET"])
+    @requires_auth(permission="get:actor")
+    def get_actor_ages(auth_token):
+        """Get the number of actors per age group."""
+
+        group_years = request.args.get(
+            "group_years", DEFAULT_AGE_GROUP_YEARS, type=int
+        )
+        assert (
+            group_years is not None and group_years >= 1
+        ), "Invalid group_years!"
+
+        actors_per_age_group = stats_index.count_actors_per_age_group(
+            date.today(), group_years
+        )
 
         return jsonify(
             {
-                "roles": formatted_roles,
-                "total_roles": roles.total,
-                "current_page": roles.page,
-                "total_pages": roles.pages,
+                "actor_ages": [
+                    {
+                        "min_age": min_age,
+                        "max_age": min_age + group_years - 1,
+                        "actors": actors,
+                    }
+                    for min_age, actors in actors_per_age_group
+                ]
             }
         )
 
+    @app.route(f"{API_BASE_PATH}/stats/roles-per-movie", methods=["GET"])
+    @requires_auth(permission="get:movie")
+    def get_roles_per_movie(auth_token):
+        """Get the number of movies per number of roles."""
+
+        movies_per_number_of_roles = (
+            stats_index.count_movies_per_number_of_roles()
+        )
+        movies = sum(movies for _, movies in movies_per_number_of_roles)
+        roles = sum(
+            roles * movies for roles, movies in movies_per_number_of_roles
+        )
+
+        return jsonify(
+            {
+                "roles_per_movie": [
+                    {"roles": roles, "movies": movies}
+                    for roles, movies in movies_per_number_of_roles
+                ],
+                "average_roles_per_movie": (
+                    round(roles / movies, 2) if movies else None
+                ),
+            }
+        )
+
+    @app.route(f"{API_BASE_PATH}/stats/cast-coverage", methods=["GET"])
+    @requires_auth(permission="get:movie")
+    def get_cast_coverage(auth_token):
+        """Get how many movies and roles are cast."""
+
+        cast_coverage = stats_index.get_cast_coverage()
+        if cast_coverage["cast_coverage"] is not None:
+            cast_coverage["cast_coverage"] = round(
+                cast_coverage["cast_coverage"], 4
+            )
+
+        return jsonify(cast_coverage)
+
+    """
+    Pagination of lists
+    """
+
+    def paginate(
+        name,
+        query,
+        order_columns,
+        per_page,
+        max_per_page,
+        total_count_key=None,
+        parent=None,
+        format_elements=None,
+        fields=None,
+        descending=False,
+    ):
+        """Generates the JSON payload for a page of a list.
+
+        Args:
+        - name (str): The name of the list in the payload, e.g. `movies`.
+        - query (Select): The query of the list, without ordering.
+        - order_columns (tuple): The columns to sort by, ending with the
+          unique `id` column as tiebreaker.
+        - per_page (int): The page size, or None to read it from the
+          "per_page" query parameter.
+        - max_per_page (int): The maximum page size.
+        - total_count_key (str, optional): The key of the cached total,
+          only given for lists not filtered by the request.
+        - parent (ParentResource, optional): The parent of a sub-resource
+          list. Its existence is checked (404 if missing) in the statement
+          fetching the page, which also counts the items exactly. With a
+          read model, the parent is included in the payload.
+        - format_elements (callable, optional): Formats the elements of
+          the page. Defaults to their `format()`.
+        - fields (tuple, optional): The fields of the elements to format
+          by default, or None for all.
+        - descending (bool, optional): True to sort in descending order,
+          only supported without a parent.
+        """
+
+        if format_elements is None:
+            def format_elements(elements):
+                return [format_fields(element, fields) for element in elements]
+
+        # Support counting modes:
+        # Count the total with the "count" query parameter,
+        # or exactly if missing.
+        count_mode = get_count_mode()
+        count_query = None
+        total = None
+        if parent is not None and count_mode == COUNT_EXACT:
+            count_query = query
+        else:
+            total = count_total(
+                query, count_mode, total_counts, total_count_key
+            )
+
+        # Support keyset pagination:
+        # Get elements after the "cursor" query parameter, if given.
+        if is_keyset_pagination_requested():
+            elements = paginate_by_keyset(
+                query,
+                order_columns,
+                max_per_page=max_per_page,
+                total=total,
+                parent=parent,
+                count_query=count_query,
+                descending=descending,
+            )
+
+            payload = {
+                name: format_elements(elements.items),
+                f"total_{name}": elements.total,
+                "next_cursor": elements.next_cursor,
+            }
+
+        # Support pagination:
+        # Get elements for page with "page" query parameter as default,
+        # or 1 if missing.
+        else:
+            if parent is None:
+                elements = db.paginate(
+                    query.order_by(*order_by(order_columns, descending)),
+                    per_page=per_page,
+                    max_per_page=max_per_page,
+                    error_out=True,
+                    count=False,
+                )
+            else:
+                elements = SubResourcePagination(
+                    select=query,
+                    order_columns=order_columns,
+                    parent=parent,
+                    count_query=count_query,
+                    per_page=per_page,
+                    max_per_page=max_per_page,
+                    error_out=True,
+                    count=count_query is not None,
+                )
+            if count_query is None:
+                elements.total = total
+
+            payload = {
+                name: format_elements(elements.items),
+                f"total_{name}": elements.total,
+                "current_page": elements.page,
+                "total_pages": (
+                    elements.pages if elements.total is not None else None
+                ),
+                "next_cursor": get_next_cursor(elements, order_columns),
+            }
+
+        # Include the parent, if loaded with the page
+        if parent is not None and parent.view is not None:
+            payload[parent.read_model.name] = parent.view.format()
+
+        return jsonify(payload)
+
+    def get_many(name, query, id_column, format_elements=None, fields=None):
+        """Generates the JSON payload for the resources with the ids
+        of the request, in request order, and the ids not found.
+
+        Args:
+        - name (str): The name of the list in the payload, e.g. `movies`.
+        - query (Select): The query selecting a read model.
+        - id_column: The id column to match, e.g. `Movie.id`.
+        - format_elements (callable, optional): Formats the elements.
+          Defaults to their `format()`.
+        - fields (tuple, optional): The fields of the elements to format
+          by default, or None for all.
+        """
+
+        found, missing_ids = get_by_ids(query, id_column, get_requested_ids())
+
+        if format_elements is None:
+            formatted_elements = [
+                format_fields(element, fields) for element in found
+            ]
+        else:
+            formatted_elements = format_elements(found)
+
+        return jsonify({name: formatted_elements, "missing_ids": missing_ids})
+
+    def get_next_cursor(pagination, order_columns):
+        """Returns the cursor to continue after a page with keyset
+        pagination, or None on the last page.
+
+        Without a total, any full page is assumed to have a next page.
+        """
+        if not pagination.items:
+            return None
+        if pagination.total is None:
+            has_next = len(pagination.items) == pagination.per_page
+        else:
+            has_next = pagination.has_next
+        if not has_next:
+            return None
+        return get_cursor_of(pagination.items[-1], order_columns)
+
     """
     Error handlers
     """
@@ -730,6 +1588,19 @@ def create_app(test_config=None):
             }
         ), 400
 
+    @app.errorhandler(IndexNotReadyError)
+    def index_not_ready(error):
+        """Error handler for requests using an index being built."""
+        response = jsonify(
+            {
+                "success": False,
+                "error_code": "503",
+                "message": f"Service temporarily unavailable! {error}",
+            }
+        )
+        response.headers["Retry-After"] = str(INDEX_NOT_READY_RETRY_AFTER)
+        return response, 503
+
     # Authentication and authorization
     # related problems causing HTTP responses
     # with status 400, 401, 403
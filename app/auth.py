@@ -1,11 +1,55 @@
+import base64
+import binascii
 import json
 import os
-from flask import request
-from functools import wraps
-from jose import jwt
-from urllib.request import urlopen
+import re
+import time
+from flask import g, request
+from functools import partial, wraps
+from jose import jwk, jwt
 from datetime import datetime, UTC
 
+from .auth_metrics import (
+    AuthMetrics,
+    HistogramAuthMetricsSink,
+    DISABLED_AUTH_METRICS,
+    OUTCOME_BY_ERROR_CODE,
+    OUTCOME_CACHE_HIT,
+    OUTCOME_MISSING_KEY,
+    OUTCOME_REJECTED_CACHE_HIT,
+    OUTCOME_VERIFIED,
+    STAGE_CACHE_LOOKUP,
+    STAGE_DECODE,
+    STAGE_HEADER,
+    STAGE_JWKS,
+    STAGE_PERMISSION,
+    STAGE_PRECHECK,
+    STAGE_SERVICE_TOKEN,
+    STAGE_TOKEN,
+)
+from .jwks import (
+    JwksKeyStore,
+    JwksUnavailableError,
+    fetch_jwks,
+    DEFAULT_JWKS_TTL_SECONDS,
+    DEFAULT_JWKS_CONNECT_TIMEOUT_SECONDS,
+    DEFAULT_JWKS_READ_TIMEOUT_SECONDS,
+    MIN_JWKS_TTL_SECONDS,
+)
+from .local_idp import load_jwks_file
+from .service_tokens import (
+    InvalidServiceTokenError,
+    ServiceTokenVerifier,
+    parse_service_token_secrets,
+    SERVICE_TOKEN_ALGORITHM,
+)
+from .shared_jwks import SharedJwksFile
+from .token_cache import (
+    TokenCache,
+    DEFAULT_TOKEN_CACHE_SIZE,
+    DEFAULT_REJECTED_TOKEN_CACHE_SIZE,
+)
+
 
 """
 A module to support authentication and authorization
@@ -31,6 +75,206 @@ AUTH0_CALLBACK_SERVER = os.environ.get(
 
 ALGORITHMS = ["RS256"]
 
+AUTH0_ISSUER = f"https://{AUTH0_DOMAIN}/"
+
+
+"""
+The key set used to verify token signatures is fetched from
+Auth0 and cached for all requests handled by this process.
+A background thread refreshes it ahead of its expiry, unless
+disabled with AUTH0_JWKS_BACKGROUND_REFRESH=false.
+"""
+AUTH0_JWKS_URL = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
+AUTH0_JWKS_TTL = int(
+    os.environ.get("AUTH0_JWKS_TTL", DEFAULT_JWKS_TTL_SECONDS)
+)
+AUTH0_JWKS_CONNECT_TIMEOUT = float(
+    os.environ.get(
+        "AUTH0_JWKS_CONNECT_TIMEOUT", DEFAULT_JWKS_CONNECT_TIMEOUT_SECONDS
+    )
+)
+AUTH0_JWKS_READ_TIMEOUT = float(
+    os.environ.get(
+        "AUTH0_JWKS_READ_TIMEOUT", DEFAULT_JWKS_READ_TIMEOUT_SECONDS
+    )
+)
+AUTH0_JWKS_BACKGROUND_REFRESH = (
+    os.environ.get("AUTH0_JWKS_BACKGROUND_REFRESH", "True").lower() == "true"
+)
+
+"""
+For benchmarks and tests without network access, the key set can
+be read from the file AUTH_LOCAL_JWKS_FILE instead of Auth0, e.g.
+the key set of a local identity provider (see `app.local_idp`).
+"""
+AUTH_LOCAL_JWKS_FILE = os.environ.get("AUTH_LOCAL_JWKS_FILE")
+
+"""
+Optionally, the worker processes of a host share the fetched key
+set through a file in the runtime directory AUTH0_JWKS_SHARED_DIR
+(e.g. `/run/movieworld`), so only one of them fetches it.
+"""
+AUTH0_JWKS_SHARED_DIR = os.environ.get("AUTH0_JWKS_SHARED_DIR")
+
+
+def build_verification_key(key):
+    """Constructs the key object to verify signatures from a JWK."""
+    rsa_key = {
+        "kty": key["kty"],
+        "kid": key["kid"],
+        "use": key["use"],
+        "n": key["n"],
+        "e": key["e"],
+    }
+    return jwk.construct(rsa_key, ALGORITHMS[0])
+
+
+_fetch_jwks = partial(
+    fetch_jwks,
+    connect_timeout=AUTH0_JWKS_CONNECT_TIMEOUT,
+    read_timeout=AUTH0_JWKS_READ_TIMEOUT,
+)
+
+_jwks_min_ttl = MIN_JWKS_TTL_SECONDS
+
+if AUTH_LOCAL_JWKS_FILE:
+    _fetch_jwks = load_jwks_file(AUTH_LOCAL_JWKS_FILE)
+elif AUTH0_JWKS_SHARED_DIR:
+    _fetch_jwks = SharedJwksFile(
+        AUTH0_JWKS_SHARED_DIR,
+        AUTH0_JWKS_URL,
+        fetch=_fetch_jwks,
+        default_ttl=AUTH0_JWKS_TTL,
+        wait_timeout=AUTH0_JWKS_CONNECT_TIMEOUT + AUTH0_JWKS_READ_TIMEOUT,
+    )
+    # The shared file limits the time to live of fetched key sets, and
+    # returns the time left until the shared key set expires
+    _jwks_min_ttl = 0
+
+_jwks_key_store = JwksKeyStore(
+    AUTH0_JWKS_URL,
+    default_ttl=AUTH0_JWKS_TTL,
+    min_ttl=_jwks_min_ttl,
+    key_builder=build_verification_key,
+    fetch=_fetch_jwks,
+)
+
+
+def get_jwks_key_store():
+    return _jwks_key_store
+
+
+"""
+Tokens that have been verified once are cached until they
+expire, so repeated requests with the same bearer token skip
+the signature verification.
+"""
+AUTH_TOKEN_CACHE_SIZE = int(
+    os.environ.get("AUTH_TOKEN_CACHE_SIZE", DEFAULT_TOKEN_CACHE_SIZE)
+)
+
+_verified_token_cache = TokenCache(max_size=AUTH_TOKEN_CACHE_SIZE)
+
+
+def get_verified_token_cache():
+    return _verified_token_cache
+
+
+"""
+Tokens that have been rejected are remembered for a short time,
+so clients repeating an invalid token are turned away without
+verifying it again. Tokens signed with an unknown key are not
+remembered, as a key rotation may add the key to the key set.
+Tokens larger than AUTH_MAX_TOKEN_LENGTH are rejected without
+even looking at them.
+"""
+AUTH_REJECTED_TOKEN_TTL = int(os.environ.get("AUTH_REJECTED_TOKEN_TTL", 10))
+AUTH_MAX_TOKEN_LENGTH = int(os.environ.get("AUTH_MAX_TOKEN_LENGTH", 8192))
+
+_rejected_token_cache = TokenCache(max_size=DEFAULT_REJECTED_TOKEN_CACHE_SIZE)
+
+
+def get_rejected_token_cache():
+    return _rejected_token_cache
+
+
+"""
+Internal callers may authenticate with service tokens signed
+with one of the secrets in AUTH_SERVICE_TOKEN_SECRETS
+(see `app.service_tokens`). Service tokens are not accepted
+unless secrets are configured.
+"""
+_service_token_verifier = None
+
+
+def configure_service_tokens(secrets_by_kid):
+    """Accepts service tokens signed with the given secrets.
+
+    Args:
+    - secrets_by_kid (dict): The secrets (bytes) by key id. If empty,
+      service tokens are not accepted.
+    """
+    global _service_token_verifier
+    _service_token_verifier = (
+        ServiceTokenVerifier(secrets_by_kid, AUTH0_AUDIENCE)
+        if secrets_by_kid
+        else None
+    )
+    _verified_token_cache.clear()
+    _rejected_token_cache.clear()
+
+
+def get_service_token_verifier():
+    return _service_token_verifier
+
+
+configure_service_tokens(
+    parse_service_token_secrets(os.environ.get("AUTH_SERVICE_TOKEN_SECRETS"))
+)
+
+
+def use_local_identity_provider(identity_provider):
+    """Verifies tokens with the key set of a local identity provider.
+
+    Replaces the key store, e.g. to run tests without Auth0.
+
+    Args:
+    - identity_provider (LocalIdentityProvider): The identity provider.
+    """
+    global _jwks_key_store
+    _jwks_key_store.stop_background_refresh()
+    _jwks_key_store = JwksKeyStore(
+        AUTH0_JWKS_URL,
+        default_ttl=AUTH0_JWKS_TTL,
+        key_builder=build_verification_key,
+        fetch=identity_provider.fetch_jwks,
+    )
+    _verified_token_cache.clear()
+    _rejected_token_cache.clear()
+
+
+"""
+The timings and outcomes of the checks of each request can be
+passed to a metrics sink (see `app.auth_metrics`). Without a
+sink, no metrics are collected. AUTH_METRICS=histogram enables
+a sink aggregating histograms, reported at /health/auth.
+"""
+_auth_metrics_sink = None
+
+
+def set_auth_metrics_sink(sink):
+    """Sets the metrics sink, or None to stop collecting metrics."""
+    global _auth_metrics_sink
+    _auth_metrics_sink = sink
+
+
+def get_auth_metrics_sink():
+    return _auth_metrics_sink
+
+
+if os.environ.get("AUTH_METRICS", "").lower() == "histogram":
+    set_auth_metrics_sink(HistogramAuthMetricsSink())
+
 
 """
 For testing we enable to deactivate authentication and
@@ -47,6 +291,10 @@ def disable_auth_checks_explicitly_for_testing(disable: bool):
     global _auth_explicitly_deactivated
     _auth_explicitly_deactivated = disable
 
+    # Never serve tokens verified under a previous setting
+    _verified_token_cache.clear()
+    _rejected_token_cache.clear()
+
 
 """
 Enable to explicitly use environment variable
@@ -76,9 +324,11 @@ A standardized way to communicate auth failure modes
 
 
 class AuthError(Exception):
-    def __init__(self, error, status_code):
+    def __init__(self, error, status_code, key_missing=False):
         self.error = error
         self.status_code = status_code
+        # True if the signing key is not (yet) in the key set
+        self.key_missing = key_missing
 
 
 # Auth Header
@@ -135,6 +385,83 @@ def get_token_auth_header():
     return token
 
 
+_TOKEN_PATTERN = re.compile(
+    r"^[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+$"
+)
+
+
+def _decode_token_segment(segment):
+    padding = "=" * (-len(segment) % 4)
+    return json.loads(base64.urlsafe_b64decode(segment + padding))
+
+
+def precheck_token(token):
+    """Checks the structure of a JWT token without verifying it.
+
+    A cheap check, without any cryptography or network access,
+    that turns away tokens which cannot be valid: tokens that are
+    too large, not made of three base64url encoded segments, signed
+    with an algorithm we do not accept (RS256, and HS256 if service
+    tokens are configured), without key id or expired.
+
+    Args:
+    - token (str): JWT token.
+
+    Raises:
+    - AuthError if JWT token is too large or cannot be parsed.
+    - AuthError if JWT token header does not specify an accepted
+      algorithm or the key id used for signing.
+    - AuthError if JWT token expired.
+
+    Returns:
+    - (dict) The (unverified) header of the JWT token.
+    """
+    unparsable_token_error = AuthError(
+        {
+            "code": "invalid_header",
+            "description": "Unable to parse authentication token.",
+        },
+        400,
+    )
+
+    if len(token) > AUTH_MAX_TOKEN_LENGTH or not _TOKEN_PATTERN.match(token):
+        raise unparsable_token_error
+
+    encoded_header, encoded_payload, _ = token.split(".")
+    try:
+        header = _decode_token_segment(encoded_header)
+        payload = _decode_token_segment(encoded_payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise unparsable_token_error
+
+    if not isinstance(header, dict) or not isinstance(payload, dict):
+        raise unparsable_token_error
+
+    algorithm = header.get("alg")
+    if algorithm not in ALGORITHMS and not (
+        algorithm == SERVICE_TOKEN_ALGORITHM
+        and _service_token_verifier is not None
+    ):
+        raise unparsable_token_error
+
+    if "kid" not in header:
+        raise AuthError(
+            {
+                "code": "invalid_header",
+                "description": "Authorization malformed.",
+            },
+            401,
+        )
+
+    expires_at = payload.get(AuthorizationToken.EXPIRES_AT_KEY)
+    if isinstance(expires_at, (int, float)) and expires_at < time.time():
+        raise AuthError(
+            {"code": "token_expired", "description": "Token expired."}, 401
+        )
+
+    return header
+
+
 class AuthorizationToken:
     """A class to get information from a JWT authorization token.
 
@@ -171,6 +498,18 @@ class AuthorizationToken:
 
         self._permissions = token_payload[AuthorizationToken.PERMISSIONS_KEY]
 
+        if not isinstance(self._permissions, list):
+            raise AuthError(
+                {
+                    "code": "invalid_claims",
+                    "description": "Permissions in JWT must be a list.",
+                },
+                400,
+            )
+
+        # Set for constant time permission checks
+        self._permission_set = frozenset(self._permissions)
+
         if AuthorizationToken.EXPIRES_AT_KEY not in token_payload:
             raise AuthError(
                 {
@@ -193,7 +532,7 @@ class AuthorizationToken:
         if permission is None:
             return True
 
-        if permission not in self._permissions:
+        if permission not in self._permission_set:
             raise AuthError(
                 {
                     "code": "unauthorized",
@@ -210,16 +549,22 @@ class AuthorizationToken:
         return self._payload
 
 
-def verify_decode_jwt(token):
+def verify_decode_jwt(token, metrics=DISABLED_AUTH_METRICS):
     """Check the validity of a JWT token using the Auth0 service.
 
+    The signing keys are taken from the cached Auth0 key set
+    (see `get_jwks_key_store()`).
+
     Args:
     - token (str): JWT token.
+    - metrics (AuthMetrics, optional): Records the timings of the stages.
 
     Raises:
+    - AuthError if JWT token does not pass `precheck_token()`.
     - AuthError if JWT token header does not specify the key id used
         for signing.
     - AuthError if JWT token header was signed with an unkown key.
+    - AuthError if the signing keys cannot be obtained from Auth0.
     - AuthError if JWT token cannot be parsed.
     - AuthError if JWT token expired.
     - AuthError if JWT token claims are invalid.
@@ -230,39 +575,43 @@ def verify_decode_jwt(token):
     - (AuthorizationToken) The payload (aka. claims) of the (valid) JWT token
     """
 
-    jsonurl = urlopen(f"https://{AUTH0_DOMAIN}/.well-known/jwks.json")
-    jwks = json.loads(jsonurl.read())
-    unverified_header = jwt.get_unverified_header(token)
-    rsa_key = {}
-    if "kid" not in unverified_header:
+    with metrics.stage(STAGE_PRECHECK):
+        unverified_header = precheck_token(token)
+
+    if unverified_header["alg"] == SERVICE_TOKEN_ALGORITHM:
+        with metrics.stage(STAGE_SERVICE_TOKEN):
+            return verify_service_token(token, unverified_header)
+
+    if AUTH0_JWKS_BACKGROUND_REFRESH:
+        _jwks_key_store.start_background_refresh()
+
+    try:
+        with metrics.stage(STAGE_JWKS):
+            verification_key = _jwks_key_store.get_key(
+                unverified_header["kid"]
+            )
+    except JwksUnavailableError:
         raise AuthError(
             {
-                "code": "invalid_header",
-                "description": "Authorization malformed.",
+                "code": "jwks_unavailable",
+                "description": "Unable to verify authentication token.",
             },
-            401,
+            503,
         )
 
-    for key in jwks["keys"]:
-        if key["kid"] == unverified_header["kid"]:
-            rsa_key = {
-                "kty": key["kty"],
-                "kid": key["kid"],
-                "use": key["use"],
-                "n": key["n"],
-                "e": key["e"],
-            }
-    if rsa_key:
+    if verification_key is not None:
         try:
-            payload = jwt.decode(
-                token,
-                rsa_key,
-                algorithms=ALGORITHMS,
-                audience=AUTH0_AUDIENCE,
-                issuer="https://" + AUTH0_DOMAIN + "/",
-            )
-
-            return AuthorizationToken(payload)
+            with metrics.stage(STAGE_DECODE):
+                payload = jwt.decode(
+                    token,
+                    verification_key,
+                    algorithms=ALGORITHMS,
+                    audience=AUTH0_AUDIENCE,
+                    issuer=AUTH0_ISSUER,
+                )
+
+            with metrics.stage(STAGE_TOKEN):
+                return AuthorizationToken(payload)
 
         except jwt.ExpiredSignatureError:
             raise AuthError(
@@ -287,13 +636,164 @@ def verify_decode_jwt(token):
                 },
                 400,
             )
+
+    metrics.set_outcome(OUTCOME_MISSING_KEY)
     raise AuthError(
         {
             "code": "invalid_header",
             "description": "Unable to find the appropriate key.",
         },
         400,
+        key_missing=True,
+    )
+
+
+def verify_service_token(token, unverified_header):
+    """Check the validity of an internal service token.
+
+    Args:
+    - token (str): JWT token signed with a service token secret.
+    - unverified_header (dict): The header of the JWT token.
+
+    Raises:
+    - AuthError if JWT token was signed with an unknown secret.
+    - AuthError if JWT token signature is invalid.
+    - AuthError if JWT token expired.
+    - AuthError if JWT token claims are invalid.
+
+    Returns:
+    - (AuthorizationToken) The payload (aka. claims) of the (valid) JWT token
+    """
+    try:
+        payload = _service_token_verifier.verify(token, unverified_header)
+    except InvalidServiceTokenError as e:
+        if e.reason == InvalidServiceTokenError.EXPIRED:
+            raise AuthError(
+                {"code": "token_expired", "description": "Token expired."}, 401
+            )
+        if e.reason == InvalidServiceTokenError.INVALID_CLAIMS:
+            raise AuthError(
+                {
+                    "code": "invalid_claims",
+                    "description": "Incorrect claims. Please, "
+                    + "check the audience and issuer.",
+                },
+                401,
+            )
+        if e.reason == InvalidServiceTokenError.UNKNOWN_KEY:
+            raise AuthError(
+                {
+                    "code": "invalid_header",
+                    "description": "Unable to find the appropriate key.",
+                },
+                400,
+            )
+        raise AuthError(
+            {
+                "code": "invalid_header",
+                "description": "Unable to parse authentication token.",
+            },
+            400,
+        )
+
+    return AuthorizationToken(payload)
+
+
+def get_verified_token(token, metrics=DISABLED_AUTH_METRICS):
+    """Returns the verified authorization token for a raw JWT token.
+
+    Uses the cache of verified tokens and only verifies tokens
+    (see `verify_decode_jwt`) that are not cached yet. Tokens that
+    have been rejected recently are rejected again right away.
+
+    Args:
+    - token (str): JWT token.
+    - metrics (AuthMetrics, optional): Records the timings of the stages.
+
+    Raises:
+    - AuthError if JWT token is invalid (see `verify_decode_jwt`).
+
+    Returns:
+    - (AuthorizationToken) The payload (aka. claims) of the (valid) JWT token
+    """
+    # Reject oversized tokens before even hashing them for the caches
+    if len(token) > AUTH_MAX_TOKEN_LENGTH:
+        precheck_token(token)
+
+    with metrics.stage(STAGE_CACHE_LOOKUP):
+        authorization_token = _verified_token_cache.get(token)
+        rejection = (
+            _rejected_token_cache.get(token)
+            if authorization_token is None
+            else None
+        )
+
+    if authorization_token is not None:
+        metrics.set_outcome(OUTCOME_CACHE_HIT)
+        return authorization_token
+
+    if rejection is not None:
+        metrics.set_outcome(OUTCOME_REJECTED_CACHE_HIT)
+        error, status_code = rejection
+        raise AuthError(error, status_code)
+
+    try:
+        authorization_token = verify_decode_jwt(token, metrics)
+    except AuthError as e:
+        # Do not remember failures caused on our side, nor tokens
+        # signed with a key that a refresh of the key set may add
+        # (e.g. right after a key rotation)
+        if e.status_code < 500 and not e.key_missing:
+            _rejected_token_cache.put(
+                token,
+                (e.error, e.status_code),
+                time.time() + AUTH_REJECTED_TOKEN_TTL,
+            )
+        raise
+
+    metrics.set_outcome(OUTCOME_VERIFIED)
+    _verified_token_cache.put(
+        token,
+        authorization_token,
+        authorization_token.get_expires_at().timestamp(),
     )
+    return authorization_token
+
+
+def check_auth_with_metrics(permission, metrics_sink):
+    """Checks authorization like `requires_auth` and records metrics.
+
+    The metrics are passed to the metrics sink, and are available
+    to the request as `flask.g.auth_metrics`.
+
+    Args:
+    - permission (str): The required permission, or None.
+    - metrics_sink (AuthMetricsSink): The metrics sink.
+
+    Returns:
+    - (AuthorizationToken) The payload (aka. claims) of the (valid) JWT token
+    """
+    metrics = AuthMetrics()
+    g.auth_metrics = metrics
+    try:
+        with metrics.stage(STAGE_HEADER):
+            token_string = get_token_auth_header()
+        token = get_verified_token(token_string, metrics)
+        with metrics.stage(STAGE_PERMISSION):
+            token.check_permission(permission)
+        return token
+
+    except AuthError as e:
+        outcome = OUTCOME_BY_ERROR_CODE.get(e.error["code"], e.error["code"])
+        if e.status_code == 403:
+            # The token is valid, but lacks the permission
+            metrics.outcome = outcome
+        else:
+            metrics.set_outcome(outcome)
+        raise
+
+    finally:
+        metrics_sink.record(metrics)
 
 
 def requires_auth(permission=None):
@@ -307,11 +807,14 @@ def requires_auth(permission=None):
     def requires_auth_decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
+            metrics_sink = _auth_metrics_sink
             if is_auth_explicitly_deactivated():
                 token = None
+            elif metrics_sink is not None:
+                token = check_auth_with_metrics(permission, metrics_sink)
             else:
                 token_string = get_token_auth_header()
-                token = verify_decode_jwt(token_string)
+                token = get_verified_token(token_string)
                 token.check_permission(permission)
             return f(token, *args, **kwargs)
 
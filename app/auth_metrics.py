@@ -0,0 +1,188 @@
+import bisect
+import contextlib
+import threading
+from abc import ABC, abstractmethod
+from time import perf_counter
+
+
+"""
+A module to measure the authentication and authorization checks
+of requests.
+
+For each request, `AuthMetrics` records the time spent in each
+stage of the checks (e.g. parsing the header, looking up the
+signing key, decoding the token) and the outcome of the checks.
+The metrics are passed to a pluggable metrics sink.
+"""
+
+"""
+Stages of the checks.
+"""
+STAGE_HEADER = "header"
+STAGE_CACHE_LOOKUP = "cache_lookup"
+STAGE_PRECHECK = "precheck"
+STAGE_JWKS = "jwks"
+STAGE_DECODE = "decode"
+STAGE_SERVICE_TOKEN = "service_token"
+STAGE_TOKEN = "token"
+STAGE_PERMISSION = "permission"
+
+"""
+Outcomes of the checks.
+"""
+OUTCOME_CACHE_HIT = "cache_hit"
+OUTCOME_REJECTED_CACHE_HIT = "rejected_cache_hit"
+OUTCOME_VERIFIED = "verified"
+OUTCOME_EXPIRED = "expired"
+OUTCOME_BAD_CLAIMS = "bad_claims"
+OUTCOME_MISSING_KEY = "missing_key"
+OUTCOME_INVALID_TOKEN = "invalid_token"
+OUTCOME_FORBIDDEN = "forbidden"
+OUTCOME_KEYS_UNAVAILABLE = "keys_unavailable"
+
+"""
+Outcomes of failed checks by the code of the AuthError,
+if not set explicitly.
+"""
+OUTCOME_BY_ERROR_CODE = {
+    "authorization_header_missing": OUTCOME_INVALID_TOKEN,
+    "invalid_header": OUTCOME_INVALID_TOKEN,
+    "token_expired": OUTCOME_EXPIRED,
+    "invalid_claims": OUTCOME_BAD_CLAIMS,
+    "unauthorized": OUTCOME_FORBIDDEN,
+    "jwks_unavailable": OUTCOME_KEYS_UNAVAILABLE,
+}
+
+
+class _StageTimer:
+    __slots__ = ("_metrics", "_stage", "_started_at")
+
+    def __init__(self, metrics, stage):
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self):
+        self._started_at = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self._metrics.timings[self._stage] = perf_counter() - self._started_at
+
+
+class AuthMetrics:
+    """Timings (in seconds) by stage and outcome of the checks."""
+
+    __slots__ = ("timings", "outcome")
+
+    def __init__(self):
+        self.timings = {}
+        self.outcome = None
+
+    def stage(self, stage):
+        """Returns a context manager timing a stage."""
+        return _StageTimer(self, stage)
+
+    def set_outcome(self, outcome):
+        """Sets the outcome, unless it has been set already."""
+        if self.outcome is None:
+            self.outcome = outcome
+
+
+class _DisabledAuthMetrics:
+    """Stand-in for `AuthMetrics` when no metrics sink is configured."""
+
+    __slots__ = ()
+
+    _NO_TIMER = contextlib.nullcontext()
+
+    def stage(self, stage):
+        return _DisabledAuthMetrics._NO_TIMER
+
+    def set_outcome(self, outcome):
+        pass
+
+
+DISABLED_AUTH_METRICS = _DisabledAuthMetrics()
+
+
+class AuthMetricsSink(ABC):
+    """Interface of metrics sinks."""
+
+    @abstractmethod
+    def record(self, metrics):
+        """Records the metrics of one request.
+
+        Called on the request thread, so implementations
+        should be fast and thread-safe.
+        """
+
+
+"""
+Upper bounds (in seconds) of the histogram buckets.
+"""
+DEFAULT_HISTOGRAM_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+)
+
+
+class HistogramAuthMetricsSink(AuthMetricsSink):
+    """Aggregates metrics into a histogram per stage and outcome counts.
+
+    Snapshots follow the layout of Prometheus histograms: cumulative
+    counts per bucket upper bound, plus the sum and count of values.
+    """
+
+    def __init__(self, buckets=DEFAULT_HISTOGRAM_BUCKETS):
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._outcomes = {}
+
+    def record(self, metrics):
+        with self._lock:
+            for stage, seconds in metrics.timings.items():
+                histogram = self._histograms.get(stage)
+                if histogram is None:
+                    histogram = self._histograms[stage] = {
+                        "counts": [0] * (len(self._buckets) + 1),
+                        "sum": 0.0,
+                        "count": 0,
+                    }
+                index = bisect.bisect_left(self._buckets, seconds)
+                histogram["counts"][index] += 1
+                histogram["sum"] += seconds
+                histogram["count"] += 1
+
+            outcome = metrics.outcome
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+
+    def get_snapshot(self):
+        """Returns the histograms by stage and the outcome counts."""
+        with self._lock:
+            histograms = {}
+            for stage, histogram in self._histograms.items():
+                cumulative_count = 0
+                buckets = {}
+                for upper_bound, count in zip(
+                    self._buckets + ("+Inf",), histogram["counts"]
+                ):
+                    cumulative_count += count
+                    buckets[str(upper_bound)] = cumulative_count
+                histograms[stage] = {
+                    "buckets": buckets,
+                    "sum": histogram["sum"],
+                    "count": histogram["count"],
+                }
+            return {
+                "stages": histograms,
+                "outcomes": dict(self._outcomes),
+            }
@@ -0,0 +1,151 @@
+from bisect import bisect_left, insort
+
+from .indexing import InMemoryIndex
+from .models import db, Movie, Actor
+from .search import KIND_MOVIE, KIND_ACTOR, tokenize
+
+
+"""
+A module for the autocompletion of movie titles and actor names,
+served from in-memory sorted arrays.
+
+Each title or name is stored as a key starting with its normalized
+text (case and accents folded, words separated by single spaces),
+followed by the original text and the id:
+
+    "the shawshank redemption\0The Shawshank Redemption\0<id>"
+
+The keys are kept sorted, so the keys starting with a prefix are a
+contiguous range, found by binary search (bisect) in O(log n).
+"""
+
+KINDS = (KIND_MOVIE, KIND_ACTOR)
+
+_SEPARATOR = "\0"
+
+
+def normalize_prefix(prefix):
+    """Normalizes a prefix like the texts of the keys.
+
+    A trailing space is kept, so "reds " does not match "redstone".
+    """
+    normalized = " ".join(tokenize(prefix))
+    if normalized and prefix[-1:].isspace():
+        normalized += " "
+    return normalized
+
+
+def _create_key(id, text):
+    return f"{' '.join(tokenize(text))}{_SEPARATOR}{text}{_SEPARATOR}{id}"
+
+
+class SortedKeys:
+    """Keys of texts by id, in sorted order."""
+
+    def __init__(self, texts_by_id=()):
+        self._keys_by_id = {
+            id: _create_key(id, text) for id, text in texts_by_id
+        }
+        self._keys = sorted(self._keys_by_id.values())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def put(self, id, text):
+        """Adds or replaces the text of an id."""
+        self.remove(id)
+        key = self._keys_by_id[id] = _create_key(id, text)
+        insort(self._keys, key)
+
+    def remove(self, id):
+        """Removes the text of an id, if stored."""
+        key = self._keys_by_id.pop(id, None)
+        if key is not None:
+            del self._keys[bisect_left(self._keys, key)]
+
+    def complete(self, prefix, limit):
+        """Returns the first texts starting with a normalized prefix.
+
+        A prefix ending with a space also matches texts ending with
+        its last word, e.g. "reds " matches "Reds".
+
+        Returns:
+        - (list) (id, text) tuples, ordered by normalized text.
+        """
+        completions = []
+        if prefix.endswith(" "):
+            # The texts ending with the word sort before the texts
+            # continuing with another word, as "\0" sorts before " "
+            self._complete_range(
+                prefix[:-1] + _SEPARATOR, limit, completions
+            )
+        self._complete_range(prefix, limit, completions)
+        return completions
+
+    def _complete_range(self, prefix, limit, completions):
+        keys = self._keys
+        index = bisect_left(keys, prefix)
+        while (
+            index < len(keys)
+            and len(completions) < limit
+            and keys[index].startswith(prefix)
+        ):
+            _, text_and_id = keys[index].split(_SEPARATOR, 1)
+            text, id = text_and_id.rsplit(_SEPARATOR, 1)
+            completions.append((id, text))
+            index += 1
+
+
+class AutocompleteIndex(InMemoryIndex):
+    """In-memory autocompletion index of movie titles and actor names.
+
+    The write handlers keep it current with `put()` and `delete()`.
+    """
+
+    def load(self):
+        sources = (
+            (KIND_MOVIE, Movie.id, Movie.title),
+            (KIND_ACTOR, Actor.id, Actor.name),
+        )
+        return {
+            kind: SortedKeys(
+                db.session.execute(
+                    db.select(id_column, text_column).execution_options(
+                        yield_per=10000
+                    )
+                )
+            )
+            for kind, id_column, text_column in sources
+        }
+
+    def complete(self, prefix, kind, limit=10):
+        """Completes a prefix to titles (movies) or names (actors).
+
+        Args:
+        - prefix (str): The prefix, as typed by a user.
+        - kind (str): The kind of texts, `movie` or `actor`.
+        - limit (int, optional): The maximum number of completions.
+
+        Returns:
+        - (list) (id, text) tuples, ordered by normalized text.
+        """
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return []
+
+        data = self.get_data()
+        with self._lock:
+            return data[kind].complete(prefix, limit)
+
+    def put(self, kind, id, text):
+        """Adds or replaces the text of a created or updated resource."""
+        self.update(lambda data: data[kind].put(id, text))
+
+    def delete(self, kind, ids):
+        """Removes the texts of deleted resources."""
+
+        def remove_texts(data):
+            for id in ids:
+                data[kind].remove(id)
+
+        self.update(remove_texts)
@@ -0,0 +1,378 @@
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from heapq import nlargest, nsmallest
+from itertools import chain
+
+from .indexing import InMemoryIndex
+from .models import db, Role
+
+
+"""
+A module for the co-star graph of actors, served from memory.
+
+The graph is bipartite: actors are linked to the movies they have a
+role in. Actors and movies are numbered (ordinals), and each node has
+an array of the ordinals of its neighbours, so the graph takes a few
+bytes per link instead of an ORM object per role.
+
+Two actors are co-stars if they have a role in the same movie. The
+shortest chain of co-stars between two actors ("degrees of
+separation") is found with a bidirectional breadth-first search:
+searching from both actors and meeting in the middle visits far fewer
+actors than searching from one actor to the other.
+
+Movies are similar if their casts overlap, by the Jaccard similarity
+of their sets of actors: shared actors / all actors of both movies.
+The movies sharing an actor with a movie are counted by walking from
+the movie to its actors, and from them to their other movies, so only
+overlapping movies are visited. The most similar movies are cached
+per movie, until the cast of the movie or of an overlapping movie
+changes.
+"""
+
+SIMILAR_MOVIES_TO_CACHE = 20
+MAX_MOVIES_WITH_CACHED_SIMILAR_MOVIES = 10000
+
+
+class CastGraph:
+    """The graph of actors and the movies they have roles in."""
+
+    def __init__(self):
+        self._actor_ordinals = {}
+        self._actor_ids = []
+        self._movie_ordinals = {}
+        self._movie_ids = []
+
+        # Neighbours by ordinal
+        self._movies_of_actors = []
+        self._actors_of_movies = []
+
+        # The most similar movies by movie ordinal, least recently
+        # used first
+        self._similar_movies = OrderedDict()
+
+    def set_cast(self, movie_id, actor_ids):
+        """Sets the actors having a role in a movie.
+
+        Args:
+        - movie_id (str): The id of the movie.
+        - actor_ids (iterable): The ids of its actors, with duplicates
+          for actors with many roles. Empty for deleted movies.
+        """
+        movie = self._get_ordinal(
+            movie_id,
+            self._movie_ordinals,
+            self._movie_ids,
+            self._actors_of_movies,
+        )
+        actors = {
+            self._get_ordinal(
+                actor_id,
+                self._actor_ordinals,
+                self._actor_ids,
+                self._movies_of_actors,
+            )
+            for actor_id in actor_ids
+        }
+
+        previous_actors = set(self._actors_of_movies[movie])
+        if actors == previous_actors:
+            return
+
+        # The similarity to this movie changes for all movies sharing
+        # an actor with it, before or after the change
+        if self._similar_movies:
+            self._similar_movies.pop(movie, None)
+            for actor in previous_actors | actors:
+                for other_movie in self._movies_of_actors[actor]:
+                    self._similar_movies.pop(other_movie, None)
+
+        for actor in previous_actors - actors:
+            self._movies_of_actors[actor].remove(movie)
+        for actor in actors - previous_actors:
+            self._movies_of_actors[actor].append(movie)
+        self._actors_of_movies[movie] = array("I", sorted(actors))
+
+    def get_costars(self, actor_id):
+        """Returns the co-stars of an actor.
+
+        Returns:
+        - (list) (actor id, number of shared movies) tuples, ordered
+          by the number of shared movies, most first.
+        """
+        actor = self._actor_ordinals.get(actor_id)
+        if actor is None:
+            return []
+
+        shared_movies = {}
+        for movie in self._movies_of_actors[actor]:
+            for costar in self._actors_of_movies[movie]:
+                shared_movies[costar] = shared_movies.get(costar, 0) + 1
+        shared_movies.pop(actor, None)
+
+        costars = sorted(
+            shared_movies.items(),
+            key=lambda item: (-item[1], self._actor_ids[item[0]]),
+        )
+        return [
+            (self._actor_ids[costar], shared) for costar, shared in costars
+        ]
+
+    def get_similar_movies(self, movie_id, limit=SIMILAR_MOVIES_TO_CACHE):
+        """Returns the movies most similar to a movie by their casts.
+
+        Args:
+        - movie_id (str): The id of the movie.
+        - limit (int, optional): The maximum number of movies, at most
+          `SIMILAR_MOVIES_TO_CACHE`.
+
+        Returns:
+        - (list) (movie id, similarity, number of shared actors)
+          tuples, ordered by similarity, most similar first.
+        """
+        movie = self._movie_ordinals.get(movie_id)
+        if movie is None:
+            return []
+
+        similar_movies = self._similar_movies.get(movie)
+        if similar_movies is None:
+            similar_movies = self._compute_similar_movies(movie)
+            self._similar_movies[movie] = similar_movies
+            if (
+                len(self._similar_movies)
+                > MAX_MOVIES_WITH_CACHED_SIMILAR_MOVIES
+            ):
+                self._similar_movies.popitem(last=False)
+        else:
+            self._similar_movies.move_to_end(movie)
+
+        return [
+            (self._movie_ids[other_movie], similarity, shared)
+            for other_movie, similarity, shared in similar_movies[:limit]
+        ]
+
+    def _compute_similar_movies(self, movie):
+        actors = self._actors_of_movies[movie]
+        shared_actors = Counter(
+            chain.from_iterable(
+                self._movies_of_actors[actor] for actor in actors
+            )
+        )
+        shared_actors.pop(movie, None)
+
+        cast_size = len(actors)
+        actors_of_movies = self._actors_of_movies
+        similarities = [
+            (
+                shared
+                / (cast_size + len(actors_of_movies[other_movie]) - shared),
+                other_movie,
+                shared,
+            )
+            for other_movie, shared in shared_actors.items()
+        ]
+        return self._get_most_similar(similarities)
+
+    def _get_most_similar(self, similarities):
+        """Returns the most similar movies, ties broken by movie id.
+
+        Many movies share a single actor with a movie, and have the
+        same similarity to it, so ties are only broken by id among
+        the movies with the least similarity of the most similar ones.
+        """
+        limit = SIMILAR_MOVIES_TO_CACHE
+        most_similar = nlargest(limit, similarities)
+        if len(most_similar) == limit:
+            least_similarity = most_similar[-1][0]
+            most_similar = [
+                item for item in most_similar if item[0] > least_similarity
+            ]
+            most_similar += nsmallest(
+                limit - len(most_similar),
+                (item for item in similarities if item[0] == least_similarity),
+                key=lambda item: self._movie_ids[item[1]],
+            )
+
+        most_similar.sort(
+            key=lambda item: (-item[0], self._movie_ids[item[1]])
+        )
+        return [
+            (other_movie, similarity, shared)
+            for similarity, other_movie, shared in most_similar
+        ]
+
+    def find_path(self, source_id, target_id):
+        """Finds a shortest chain of co-stars between two actors.
+
+        Returns:
+        - (tuple) The ids of the actors of the chain, from source to
+          target, and the ids of the movies linking each actor to the
+          next one. None if the actors are not connected.
+        """
+        if source_id == target_id:
+            return [source_id], []
+
+        source = self._actor_ordinals.get(source_id)
+        target = self._actor_ordinals.get(target_id)
+        if source is None or target is None:
+            return None
+
+        # Search from both actors, level by level
+        forward = _Search(source)
+        backward = _Search(target)
+        while forward.frontier and backward.frontier:
+            # Expand the side with fewer movies to visit next, as
+            # actors in many movies make a level expensive to expand
+            if self._count_movies(forward) <= self._count_movies(backward):
+                meeting = self._expand(forward, backward)
+            else:
+                meeting = self._expand(backward, forward)
+
+            if meeting is not None:
+                return self._get_path(meeting, forward, backward)
+        return None
+
+    def _expand(self, search, other_search):
+        """Visits the actors of the next level of a search.
+
+        Returns:
+        - (int) The first actor reached by both searches, or None.
+          Actors visited by the other search in an earlier level would
+          have been reached in an earlier level of this search, so all
+          actors reached by both in this level make equally short paths.
+        """
+        next_frontier = []
+        for actor in search.frontier:
+            for movie in self._movies_of_actors[actor]:
+                if movie in search.visited_movies:
+                    continue
+                search.visited_movies.add(movie)
+
+                for costar in self._actors_of_movies[movie]:
+                    if costar in search.parents:
+                        continue
+                    search.parents[costar] = (actor, movie)
+                    if costar in other_search.parents:
+                        return costar
+                    next_frontier.append(costar)
+
+        search.frontier = next_frontier
+        return None
+
+    def _count_movies(self, search):
+        movies_of_actors = self._movies_of_actors
+        return sum(len(movies_of_actors[actor]) for actor in search.frontier)
+
+    def _get_path(self, meeting, forward, backward):
+        actors = [meeting]
+        movies = []
+        actor = meeting
+        while forward.parents[actor] is not None:
+            actor, movie = forward.parents[actor]
+            actors.insert(0, actor)
+            movies.insert(0, movie)
+
+        actor = meeting
+        while backward.parents[actor] is not None:
+            actor, movie = backward.parents[actor]
+            actors.append(actor)
+            movies.append(movie)
+
+        return (
+            [self._actor_ids[actor] for actor in actors],
+            [self._movie_ids[movie] for movie in movies],
+        )
+
+    @staticmethod
+    def _get_ordinal(id, ordinals, ids, neighbours):
+        ordinal = ordinals.get(id)
+        if ordinal is None:
+            ordinal = ordinals[id] = len(ids)
+            ids.append(id)
+            neighbours.append(array("I"))
+        return ordinal
+
+
+class _Search:
+    """The state of one side of a bidirectional search."""
+
+    def __init__(self, start):
+        self.parents = {start: None}
+        self.frontier = [start]
+        self.visited_movies = set()
+
+
+def load_cast(movie_id):
+    """Loads the ids of the actors having a role in a movie."""
+    return db.session.scalars(
+        db.select(Role.actor_id).where(
+            Role.movie_id == movie_id, Role.actor_id.is_not(None)
+        )
+    ).all()
+
+
+class CastGraphIndex(InMemoryIndex):
+    """In-memory co-star graph of all actors.
+
+    The write handlers of roles and movies keep it current with
+    `refresh_cast()` and `set_cast()`.
+    """
+
+    def __init__(self, app, **kwargs):
+        super().__init__(app, **kwargs)
+        self._refresh_lock = threading.Lock()
+
+    def load(self):
+        casts = {}
+        rows = db.session.execute(
+            db.select(Role.movie_id, Role.actor_id)
+            .where(Role.actor_id.is_not(None))
+            .execution_options(yield_per=10000)
+        )
+        for movie_id, actor_id in rows:
+            casts.setdefault(movie_id, []).append(actor_id)
+
+        graph = CastGraph()
+        for movie_id, actor_ids in casts.items():
+            graph.set_cast(movie_id, actor_ids)
+        return graph
+
+    def get_costars(self, actor_id):
+        """Returns the co-stars of an actor, see
+        `CastGraph.get_costars()`."""
+        graph = self.get_data()
+        with self._lock:
+            return graph.get_costars(actor_id)
+
+    def find_path(self, source_id, target_id):
+        """Finds a shortest chain of co-stars between two actors, see
+        `CastGraph.find_path()`."""
+        graph = self.get_data()
+        with self._lock:
+            return graph.find_path(source_id, target_id)
+
+    def get_similar_movies(self, movie_id, limit):
+        """Returns the movies most similar to a movie by their casts,
+        see `CastGraph.get_similar_movies()`."""
+        graph = self.get_data()
+        with self._lock:
+            return graph.get_similar_movies(movie_id, limit)
+
+    def set_cast(self, movie_id, actor_ids):
+        """Sets the actors of a movie after its roles changed.
+
+        Replaying the update on a rebuilt graph is safe, as it sets
+        the cast instead of adding or removing single links.
+        """
+        self.update(lambda graph: graph.set_cast(movie_id, actor_ids))
+
+    def refresh_cast(self, movie_id):
+        """Sets the actors of a movie from the database.
+
+        Refreshes load and set the cast one at a time, so a cast loaded
+        before a concurrent write cannot be set after the cast loaded
+        after the write.
+        """
+        with self._refresh_lock:
+            self.set_cast(movie_id, load_cast(movie_id))
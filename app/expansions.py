@@ -0,0 +1,146 @@
+from flask import request
+
+from .fieldsets import format_fields
+from .models import db, Movie, Actor, Role
+from .read_models import MOVIE, ACTOR, ROLE
+
+
+"""
+Helper methods to expand related resources with the `expand`
+query parameter, e.g. `GET /movies?expand=roles.actor`.
+
+Related resources are loaded in batches, with one query per level
+of expansion for all elements of a page (`WHERE ... IN (...)`), so
+the number of queries does not depend on the page size.
+"""
+
+EXPAND_PARAMETER = "expand"
+
+"""
+Expansions, nested expansions imply their parents.
+"""
+EXPAND_ROLES = "roles"
+EXPAND_ROLES_ACTOR = "roles.actor"
+EXPAND_ROLES_MOVIE = "roles.movie"
+
+MOVIE_EXPANSIONS = (EXPAND_ROLES, EXPAND_ROLES_ACTOR)
+ACTOR_EXPANSIONS = (EXPAND_ROLES, EXPAND_ROLES_MOVIE)
+
+
+def get_expansions(supported_expansions):
+    """Returns the expansions requested with `expand`.
+
+    Args:
+    - supported_expansions (tuple): The expansions of the resource.
+
+    Raises:
+    - AssertionError if an expansion is not supported.
+
+    Returns:
+    - (set) The requested expansions, including implied parents.
+    """
+    expansions = set()
+    for expansion in request.args.get(EXPAND_PARAMETER, "").split(","):
+        expansion = expansion.strip()
+        if not expansion:
+            continue
+
+        assert expansion in supported_expansions, "Unsupported expansion!"
+        parts = expansion.split(".")
+        for length in range(1, len(parts) + 1):
+            expansions.add(".".join(parts[:length]))
+    return expansions
+
+
+def load_by_id(read_model, id_column, ids):
+    """Loads views by their ids with one query.
+
+    Returns:
+    - (dict) The views by id.
+    """
+    if not ids:
+        return {}
+    views = db.session.execute(
+        db.select(read_model).where(id_column.in_(ids))
+    ).scalars()
+    return {view.id: view for view in views}
+
+
+def load_roles_by(parent_column, parent_ids):
+    """Loads the roles of many parents with one query.
+
+    Args:
+    - parent_column: The foreign key of roles to the parents,
+      e.g. `Role.movie_id`.
+    - parent_ids (list): The ids of the parents.
+
+    Returns:
+    - (dict) The role views by parent id, ordered by character.
+    """
+    roles = db.session.execute(
+        db.select(ROLE)
+        .where(parent_column.in_(parent_ids))
+        .order_by(parent_column, Role.character, Role.id)
+    ).scalars()
+
+    roles_by_parent_id = {parent_id: [] for parent_id in parent_ids}
+    for role in roles:
+        roles_by_parent_id[getattr(role, parent_column.key)].append(role)
+    return roles_by_parent_id
+
+
+def format_with_roles(elements, expansions, parent_column, fields=None):
+    """Formats movies or actors, with their roles if expanded.
+
+    Args:
+    - elements (list): Movie or actor views.
+    - expansions (set): The requested expansions.
+    - parent_column: The foreign key of roles to the elements,
+      i.e. `Role.movie_id` or `Role.actor_id`.
+    - fields (tuple, optional): The fields of the elements to format,
+      or None for all.
+
+    Returns:
+    - (list) The formatted elements.
+    """
+    formatted_elements = [
+        format_fields(element, fields) for element in elements
+    ]
+    if EXPAND_ROLES not in expansions or not elements:
+        return formatted_elements
+
+    roles_by_parent_id = load_roles_by(
+        parent_column, [element.id for element in elements]
+    )
+    roles = [
+        role for parent_roles in roles_by_parent_id.values()
+        for role in parent_roles
+    ]
+
+    actors_by_id = None
+    if EXPAND_ROLES_ACTOR in expansions:
+        actors_by_id = load_by_id(
+            ACTOR,
+            Actor.id,
+            {role.actor_id for role in roles if role.actor_id is not None},
+        )
+
+    movies_by_id = None
+    if EXPAND_ROLES_MOVIE in expansions:
+        movies_by_id = load_by_id(
+            MOVIE, Movie.id, {role.movie_id for role in roles}
+        )
+
+    for element, formatted_element in zip(elements, formatted_elements):
+        formatted_roles = []
+        for role in roles_by_parent_id[element.id]:
+            formatted_role = role.format()
+            if actors_by_id is not None:
+                actor = actors_by_id.get(role.actor_id)
+                formatted_role["actor"] = actor.format() if actor else None
+            if movies_by_id is not None:
+                formatted_role["movie"] = movies_by_id[role.movie_id].format()
+            formatted_roles.append(formatted_role)
+        formatted_element["roles"] = formatted_roles
+
+    return formatted_elements
@@ -0,0 +1,53 @@
+from flask import request
+
+
+"""
+Helper methods for sparse fieldsets, i.e. to get only some fields
+of resources with the `fields` query parameter, e.g.
+`GET /movies?fields=id,title`.
+
+The fields are validated against the fields of the read model of
+the resource, and only their columns are selected (see
+`ReadModel.project`), so both the database I/O and the payload
+shrink.
+"""
+
+FIELDS_PARAMETER = "fields"
+
+
+def get_fields(read_model):
+    """Returns the fields requested with `fields`.
+
+    Args:
+    - read_model (ReadModel): The read model of the resource.
+
+    Raises:
+    - AssertionError if a field is unknown.
+
+    Returns:
+    - (tuple) The requested fields, or None for all fields.
+    """
+    if FIELDS_PARAMETER not in request.args:
+        return None
+
+    fields = tuple(
+        dict.fromkeys(
+            field.strip()
+            for field in request.args[FIELDS_PARAMETER].split(",")
+            if field.strip()
+        )
+    )
+    assert fields, "No fields provided!"
+    assert all(field in read_model.field_names for field in fields), (
+        "Invalid fields! Supported fields are: "
+        + ", ".join(read_model.field_names)
+    )
+    return fields
+
+
+def format_fields(view, fields):
+    """Formats a view with only the given fields (all if None)."""
+    formatted = view.format()
+    if fields is None:
+        return formatted
+    return {field: formatted[field] for field in fields}
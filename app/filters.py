@@ -0,0 +1,154 @@
+from flask import request
+
+from .helper import to_date
+from .models import Movie, Actor
+
+
+"""
+Helper methods to filter and sort lists with query parameters, e.g.
+`GET /movies?sort=-release_date&release_date_from=1994-01-01`.
+
+Each sort order is served by an index on the sort column and the `id`
+(as tiebreaker), which is scanned forwards (`sort=release_date`) or
+backwards (`sort=-release_date`). Lists are only filtered on the
+column they are sorted by, so a filter is a range condition on the
+same index, and the page is the start of that range. Filters on
+other columns are rejected with 400 Bad Request, instead of scanning
+the index (or table) for the few rows matching the filter.
+"""
+
+SORT_PARAMETER = "sort"
+DESCENDING_PREFIX = "-"
+
+
+class ListFilter:
+    """A filter of a list by a query parameter.
+
+    Args:
+    - parameter (str): The name of the query parameter.
+    - column: The filtered column, which the list must be sorted by.
+    - create_condition (callable): Creates the condition of the filter
+      from the value of the query parameter.
+    """
+
+    def __init__(self, parameter, column, create_condition):
+        self.parameter = parameter
+        self.column = column
+        self.create_condition = create_condition
+
+
+def starts_with(parameter, column):
+    """Returns a filter for texts starting with a prefix.
+
+    The prefix is matched with `LIKE 'prefix%'`, which is served by
+    an index with the `varchar_pattern_ops` operator class in any
+    collation of the database.
+    """
+
+    def create_condition(prefix):
+        assert prefix, f"No {parameter} provided!"
+        return column.startswith(prefix, autoescape=True)
+
+    return ListFilter(parameter, column, create_condition)
+
+
+def date_from(parameter, column):
+    """Returns a filter for dates on or after a date."""
+
+    def create_condition(value):
+        date = to_date(value)
+        assert date, f"No valid {parameter} provided!"
+        return column >= date
+
+    return ListFilter(parameter, column, create_condition)
+
+
+def date_to(parameter, column):
+    """Returns a filter for dates on or before a date."""
+
+    def create_condition(value):
+        date = to_date(value)
+        assert date, f"No valid {parameter} provided!"
+        return column <= date
+
+    return ListFilter(parameter, column, create_condition)
+
+
+"""
+The sort orders and filters of the lists, the first sort order is
+the default.
+"""
+MOVIE_SORT_COLUMNS = (Movie.title, Movie.release_date)
+MOVIE_FILTERS = (
+    starts_with("title_prefix", Movie.title),
+    date_from("release_date_from", Movie.release_date),
+    date_to("release_date_to", Movie.release_date),
+)
+
+ACTOR_SORT_COLUMNS = (Actor.name, Actor.birth_date)
+ACTOR_FILTERS = (
+    starts_with("name_prefix", Actor.name),
+    date_from("birth_date_from", Actor.birth_date),
+    date_to("birth_date_to", Actor.birth_date),
+)
+
+
+class ListQuery:
+    """The sort order and filters requested for a list.
+
+    Attributes:
+    - order_columns (tuple): The columns to sort by, ending with the
+      `id` as tiebreaker.
+    - descending (bool): True to sort in descending order.
+    - conditions (list): The conditions of the filters.
+    """
+
+    def __init__(self, order_columns, descending, conditions):
+        self.order_columns = order_columns
+        self.descending = descending
+        self.conditions = conditions
+
+    def apply_to(self, query):
+        """Returns a query with the conditions of the filters."""
+        return query.where(*self.conditions) if self.conditions else query
+
+
+def get_list_query(sort_columns, filters, id_column):
+    """Returns the sort order and filters requested with `sort` and
+    the query parameters of the filters.
+
+    Args:
+    - sort_columns (tuple): The columns to sort by, the first is the
+      default.
+    - filters (tuple): The filters of the list.
+    - id_column: The id column, e.g. `Movie.id`.
+
+    Raises:
+    - AssertionError if the sort order is unknown, a filter is invalid
+      or on another column than the sort column.
+
+    Returns:
+    - (ListQuery) The sort order and filters.
+    """
+    sort = request.args.get(SORT_PARAMETER, sort_columns[0].key)
+    descending = sort.startswith(DESCENDING_PREFIX)
+    sort_key = sort[len(DESCENDING_PREFIX):] if descending else sort
+
+    sort_columns_by_key = {column.key: column for column in sort_columns}
+    assert sort_key in sort_columns_by_key, "Unsupported sort order!"
+    sort_column = sort_columns_by_key[sort_key]
+
+    conditions = []
+    for list_filter in filters:
+        value = request.args.get(list_filter.parameter)
+        if value is None:
+            continue
+
+        assert list_filter.column is sort_column, (
+            f"Filter {list_filter.parameter} requires "
+            f"{SORT_PARAMETER}={list_filter.column.key} "
+            f"or {SORT_PARAMETER}={DESCENDING_PREFIX}{list_filter.column.key}!"
+        )
+        conditions.append(list_filter.create_condition(value))
+
+    return ListQuery((sort_column, id_column), descending, conditions)
@@ -6,8 +6,14 @@ Helper methods to convert date representations.
 
 
 def format_date(date):
-    """Converts a datetime.date object to a date string (YYYY-MM-DD)."""
-    return datetime.strftime(date, "%Y-%m-%d")
+    """Converts a datetime.date object to a date string (YYYY-MM-DD).
+
+    Uses `isoformat`, which is several times faster than `strftime`
+    and yields the same format.
+    """
+    if date is None:
+        return None
+    return date.isoformat()
 
 
 def to_date(date_string):
@@ -0,0 +1,189 @@
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+"""
+A module for in-memory indexes over the database.
+
+An index is built from the database on first use, and kept current
+with incremental updates by the write handlers of this process.
+Writes of other processes (e.g. other gunicorn workers) are not seen
+by these updates, so an index is rebuilt in the background once it
+is older than its maximum age. Until the rebuild completes, requests
+are served from the previous index (stale-while-revalidate), and
+updates applied in the meantime are replayed on the rebuilt index.
+
+Each process holds its own copy of an index, and a rebuild holds the
+previous copy until it completes, so rebuilds are rare by default:
+the maximum age is set with INDEX_MAX_AGE_SECONDS, and 0 disables
+rebuilds, for a single process that sees all writes.
+"""
+
+DEFAULT_INDEX_MAX_AGE_SECONDS = 60 * 60
+
+INDEX_MAX_AGE_SECONDS = (
+    int(os.environ.get("INDEX_MAX_AGE_SECONDS", DEFAULT_INDEX_MAX_AGE_SECONDS))
+    or None
+)
+
+logger = logging.getLogger(__name__)
+
+
+class IndexNotReadyError(Exception):
+    """Raised on use of an index which is still being built in the
+    background."""
+
+    def __init__(self, index_name):
+        super().__init__(f"The {index_name} is still being built.")
+        self.index_name = index_name
+
+
+class InMemoryIndex(ABC):
+    """Base class of in-memory indexes, holding the indexed data.
+
+    Subclasses implement `load()`, which builds the data of the index
+    from the database.
+
+    Args:
+    - app (Flask): The application, to access the database from
+      background threads.
+    - max_age (float, optional): Seconds after which the index is
+      rebuilt. None disables rebuilds.
+    - clock (callable, optional): Returns the current time in seconds.
+    - wait_for_build (bool, optional): Whether use before the first
+      build waits for it. Otherwise, the first build is started in the
+      background and `IndexNotReadyError` is raised until it completes.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_age=DEFAULT_INDEX_MAX_AGE_SECONDS,
+        clock=time.monotonic,
+        wait_for_build=True,
+    ):
+        self._app = app
+        self._max_age = max_age
+        self._wait_for_build = wait_for_build
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._data = None
+        self._built_at = None
+        self._pending_updates = None
+
+    @abstractmethod
+    def load(self):
+        """Builds the data of the index from the database.
+
+        Called within an application context.
+        """
+
+    def get_data(self):
+        """Returns the data of the index, building it on first use.
+
+        Starts a rebuild in the background if the index is too old.
+
+        Raises:
+        - IndexNotReadyError: If the index is not built yet and use does
+          not wait for the first build.
+        """
+        data = self._data
+        if data is None:
+            if self._wait_for_build:
+                return self._build()
+            self.warm_up()
+            raise IndexNotReadyError(type(self).__name__)
+
+        if (
+            self._max_age is not None
+            and self._clock() - self._built_at >= self._max_age
+            and self._pending_updates is None
+        ):
+            self.start_background_build()
+        return data
+
+    def update(self, apply):
+        """Applies an incremental update to the data of the index.
+
+        Updates before the first build are dropped, as the build will
+        see their changes. Updates during a rebuild are replayed on the
+        rebuilt data.
+
+        Args:
+        - apply (callable): Applies the update to the data.
+        """
+        with self._lock:
+            if self._data is not None:
+                apply(self._data)
+            if self._pending_updates is not None:
+                self._pending_updates.append(apply)
+
+    def warm_up(self):
+        """Starts to build the index in the background, unless it is
+        already built or being built."""
+        if self._data is None and self._pending_updates is None:
+            self.start_background_build()
+
+    def start_background_build(self):
+        """Starts to (re)build the index in a daemon thread."""
+        with self._lock:
+            if self._pending_updates is not None:
+                return
+            self._pending_updates = []
+
+        thread = threading.Thread(
+            target=self._build_in_background,
+            name=f"{type(self).__name__}-build",
+            daemon=True,
+        )
+        thread.start()
+
+    def get_state(self):
+        """Returns the state of the index for monitoring."""
+        return {
+            "built": self._data is not None,
+            "age_seconds": (
+                None
+                if self._built_at is None
+                else self._clock() - self._built_at
+            ),
+            "rebuilding": self._pending_updates is not None,
+        }
+
+    def _build_in_background(self):
+        try:
+            with self._app.app_context():
+                self._build()
+        except Exception:
+            logger.exception("Failed to build %s.", type(self).__name__)
+            with self._lock:
+                self._pending_updates = None
+
+    def _build(self):
+        with self._build_lock:
+            # Another thread may have built the index in the meantime
+            if self._data is not None and self._pending_updates is None:
+                return self._data
+
+            with self._lock:
+                if self._pending_updates is None:
+                    self._pending_updates = []
+
+            try:
+                data = self.load()
+            except Exception:
+                with self._lock:
+                    self._pending_updates = None
+                raise
+
+            with self._lock:
+                for apply in self._pending_updates:
+                    apply(data)
+                self._pending_updates = None
+                self._data = data
+                self._built_at = self._clock()
+            return data
@@ -0,0 +1,543 @@
+import http.client
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+"""
+A module to cache the JSON Web Key Set (JWKS) of the
+identity provider (Auth0).
+
+The key set is shared by all threads of a process and
+refreshed when it expires, or when a token arrives that was
+signed with a key id (`kid`) the cached key set does not know.
+
+A background refresher keeps the key set warm ahead of its
+expiry. While the identity provider cannot be reached, the last
+known-good key set is served (stale-while-revalidate) and a
+circuit breaker stops request threads from waiting on it.
+"""
+
+"""
+Default time to live of a cached key set, used when the
+identity provider does not send a `Cache-Control: max-age`.
+"""
+DEFAULT_JWKS_TTL_SECONDS = 600
+
+"""
+Bounds applied to the time to live announced with
+`Cache-Control`, so a very short max-age cannot make us fetch
+on every request, and a very long one cannot pin rotated keys.
+"""
+MIN_JWKS_TTL_SECONDS = 60
+MAX_JWKS_TTL_SECONDS = 24 * 60 * 60
+
+"""
+How long an expired key set may still be used while it cannot
+be refreshed (i.e. while the identity provider is unavailable).
+"""
+MAX_JWKS_STALENESS_SECONDS = 24 * 60 * 60
+
+"""
+Minimum time between two fetches triggered by tokens with an
+unknown key id. Protects the identity provider (and us) from
+clients sending tokens with made up key ids.
+"""
+UNKNOWN_KID_REFETCH_INTERVAL_SECONDS = 30
+
+"""
+Timeouts for fetching the key set. The connect timeout bounds
+establishing the connection, the read timeout bounds each read
+from the connection.
+"""
+DEFAULT_JWKS_CONNECT_TIMEOUT_SECONDS = 2.0
+DEFAULT_JWKS_READ_TIMEOUT_SECONDS = 3.0
+
+"""
+Share of the time to live after which the background refresher
+fetches a new key set.
+"""
+JWKS_REFRESH_AHEAD_RATIO = 0.8
+
+"""
+Circuit breaker settings: number of consecutive failed fetches
+that open the circuit, and the time after which a single trial
+fetch is allowed again.
+"""
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3
+CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS = 30
+
+
+_MAX_AGE_PATTERN = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+class JwksUnavailableError(Exception):
+    """Raised when no usable key set is available."""
+
+
+def parse_cache_control_max_age(cache_control):
+    """Extracts the max-age (in seconds) from a Cache-Control header.
+
+    Args:
+    - cache_control (str): Value of the `Cache-Control` header, or None.
+
+    Returns:
+    - (int) The max-age in seconds, 0 for `no-cache` or `no-store`,
+      or None if the header does not specify a max-age.
+    """
+    if not cache_control:
+        return None
+
+    directives = cache_control.lower()
+    if "no-store" in directives or "no-cache" in directives:
+        return 0
+
+    match = _MAX_AGE_PATTERN.search(cache_control)
+    if match is None:
+        return None
+    return int(match.group(1))
+
+
+def fetch_jwks(
+    jwks_url,
+    connect_timeout=DEFAULT_JWKS_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=DEFAULT_JWKS_READ_TIMEOUT_SECONDS,
+):
+    """Fetches a key set from the identity provider.
+
+    Args:
+    - jwks_url (str): URL of the JWKS document.
+    - connect_timeout (float): Timeout in seconds to connect.
+    - read_timeout (float): Timeout in seconds for each read.
+
+    Raises:
+    - OSError if the key set cannot be fetched in time.
+    - ValueError if the response is not a JSON document.
+
+    Returns:
+    - (tuple) The key set (dict) and its time to live in seconds as
+      announced by the `Cache-Control` header (int or None).
+    """
+    url = urlsplit(jwks_url)
+    connection_class = (
+        http.client.HTTPSConnection
+        if url.scheme == "https"
+        else http.client.HTTPConnection
+    )
+    connection = connection_class(
+        url.hostname, url.port, timeout=connect_timeout
+    )
+    try:
+        connection.connect()
+        connection.sock.settimeout(read_timeout)
+
+        path = url.path or "/"
+        if url.query:
+            path = f"{path}?{url.query}"
+        connection.request(
+            "GET", path, headers={"Accept": "application/json"}
+        )
+
+        response = connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise OSError(
+                f"Fetching {jwks_url} failed with status {response.status}."
+            )
+
+        jwks = json.loads(body)
+        max_age = parse_cache_control_max_age(
+            response.getheader("Cache-Control")
+        )
+        return jwks, max_age
+    finally:
+        connection.close()
+
+
+class CircuitBreaker:
+    """A circuit breaker guarding calls to an unreliable dependency.
+
+    The circuit opens after `failure_threshold` consecutive failures.
+    While open, calls are not allowed. After `reset_timeout` seconds
+    a single trial call is allowed (half open); its outcome closes
+    or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS,
+        clock=time.monotonic,
+    ):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CircuitBreaker.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+
+    def allow_request(self):
+        """Returns True if a call to the dependency may be made now."""
+        with self._lock:
+            if self._state == CircuitBreaker.CLOSED:
+                return True
+
+            if self._state == CircuitBreaker.OPEN:
+                if self._clock() - self._opened_at >= self._reset_timeout:
+                    self._state = CircuitBreaker.HALF_OPEN
+                    return True
+                return False
+
+            # Half open: a trial call is already in progress
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CircuitBreaker.CLOSED
+            self._consecutive_failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if (
+                self._state == CircuitBreaker.HALF_OPEN
+                or self._consecutive_failures >= self._failure_threshold
+            ):
+                self._state = CircuitBreaker.OPEN
+                self._opened_at = self._clock()
+
+    def seconds_until_retry(self):
+        """Returns the time in seconds until a trial call is allowed."""
+        with self._lock:
+            if self._state != CircuitBreaker.OPEN:
+                return 0.0
+            elapsed = self._clock() - self._opened_at
+            return max(self._reset_timeout - elapsed, 0.0)
+
+    def get_state(self):
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+            }
+
+
+def keep_jwk(jwk):
+    """Default key builder of the key store: keeps the JWK (dict)."""
+    return jwk
+
+
+class JwksKeyStore:
+    """A process-wide, thread-safe cache of a JSON Web Key Set.
+
+    Readers never block while a usable key set is cached. Only when
+    no key set is cached at all, a reading thread fetches it; in that
+    case only one thread fetches and concurrent threads wait for and
+    then use its result.
+
+    Each key of a fetched key set is passed once to `key_builder`, and
+    lookups return the built key. This allows to construct expensive
+    key objects once per key set instead of once per request. Keys the
+    builder rejects (by raising an exception) are left out.
+    """
+
+    def __init__(
+        self,
+        jwks_url,
+        default_ttl=DEFAULT_JWKS_TTL_SECONDS,
+        min_ttl=MIN_JWKS_TTL_SECONDS,
+        max_ttl=MAX_JWKS_TTL_SECONDS,
+        max_staleness=MAX_JWKS_STALENESS_SECONDS,
+        unknown_kid_refetch_interval=UNKNOWN_KID_REFETCH_INTERVAL_SECONDS,
+        fetch=fetch_jwks,
+        key_builder=keep_jwk,
+        circuit_breaker=None,
+        clock=time.monotonic,
+    ):
+        self._jwks_url = jwks_url
+        self._key_builder = key_builder
+        self._default_ttl = default_ttl
+        self._min_ttl = min_ttl
+        self._max_ttl = max_ttl
+        self._max_staleness = max_staleness
+        self._unknown_kid_refetch_interval = unknown_kid_refetch_interval
+        self._fetch = fetch
+        self._circuit_breaker = circuit_breaker or CircuitBreaker(
+            clock=clock
+        )
+        self._clock = clock
+
+        self._fetch_lock = threading.Lock()
+        self._keys_by_kid = None
+        self._ttl = default_ttl
+        self._expires_at = 0.0
+        self._fetched_at = None
+        self._version = 0
+        self._last_error = None
+        self._refresher = None
+
+    def get_key(self, kid):
+        """Returns the (built) key for a key id, or None if unknown.
+
+        Fetches the key set if none is cached. An expired key set is
+        still used (up to `max_staleness`) while a new one is fetched.
+        If the key id is not part of the cached key set, fetches the
+        key set again, at most once per `unknown_kid_refetch_interval`,
+        to pick up rotated keys.
+
+        Raises:
+        - JwksUnavailableError if no usable key set is available.
+        """
+        keys_by_kid = self._get_usable_keys()
+
+        key = keys_by_kid.get(kid)
+        if key is not None:
+            return key
+
+        if self._may_refetch_for_unknown_kid():
+            keys_by_kid = self._refresh(force=True)
+            key = keys_by_kid.get(kid)
+
+        return key
+
+    def refresh(self):
+        """Fetches the key set now, unless the circuit is open.
+
+        Raises:
+        - JwksUnavailableError if the key set cannot be fetched.
+        """
+        self._refresh(force=True, serve_stale=False)
+
+    def get_version(self):
+        """Returns a number that changes whenever a new key set is stored."""
+        return self._version
+
+    def invalidate(self):
+        """Drops the cached key set. The next lookup fetches it again."""
+        with self._fetch_lock:
+            self._keys_by_kid = None
+            self._expires_at = 0.0
+            self._fetched_at = None
+
+    def seconds_until_refresh(self):
+        """Returns the time in seconds until the key set should be
+        fetched again ahead of its expiry."""
+        if self._fetched_at is None:
+            return self._circuit_breaker.seconds_until_retry()
+
+        refresh_at = self._fetched_at + self._ttl * JWKS_REFRESH_AHEAD_RATIO
+        return max(
+            refresh_at - self._clock(),
+            self._circuit_breaker.seconds_until_retry(),
+        )
+
+    def start_background_refresh(self):
+        """Starts the background refresher of this process, if needed.
+
+        Safe to call repeatedly; a refresher inherited from a parent
+        process (e.g. after a fork) is replaced.
+        """
+        refresher = self._refresher
+        if refresher is not None and refresher.is_running():
+            return
+        with self._fetch_lock:
+            if self._refresher is None or not self._refresher.is_running():
+                self._refresher = JwksRefresher(self)
+                self._refresher.start()
+
+    def stop_background_refresh(self):
+        refresher = self._refresher
+        if refresher is not None:
+            refresher.stop()
+
+    def get_state(self):
+        """Returns the state of the key store for monitoring."""
+        now = self._clock()
+        fetched_at = self._fetched_at
+        refresher = self._refresher
+        return {
+            "version": self._version,
+            "number_of_keys": len(self._keys_by_kid or {}),
+            "age_seconds": (
+                None if fetched_at is None else round(now - fetched_at, 3)
+            ),
+            "expires_in_seconds": (
+                None if fetched_at is None
+                else round(self._expires_at - now, 3)
+            ),
+            "stale": fetched_at is not None and now >= self._expires_at,
+            "last_error": self._last_error,
+            "circuit_breaker": self._circuit_breaker.get_state(),
+            "background_refresh": (
+                refresher is not None and refresher.is_running()
+            ),
+        }
+
+    def _get_usable_keys(self):
+        keys_by_kid = self._keys_by_kid
+        if keys_by_kid is not None:
+            now = self._clock()
+            if now < self._expires_at:
+                return keys_by_kid
+            if now < self._expires_at + self._max_staleness:
+                self._revalidate()
+                return self._keys_by_kid
+        return self._refresh(force=False)
+
+    def _revalidate(self):
+        refresher = self._refresher
+        if refresher is not None and refresher.is_running():
+            refresher.wake_up()
+            return
+
+        # Without a refresher, one request thread fetches the key set
+        # while all others keep using the stale one.
+        try:
+            self._refresh(force=False, blocking=False)
+        except JwksUnavailableError:
+            pass
+
+    def _may_refetch_for_unknown_kid(self):
+        fetched_at = self._fetched_at
+        return (
+            fetched_at is None
+            or self._clock() - fetched_at
+            >= self._unknown_kid_refetch_interval
+        )
+
+    def _refresh(self, force, serve_stale=True, blocking=True):
+        version_before_lock = self._version
+        if not self._fetch_lock.acquire(blocking=blocking):
+            # Another thread is fetching right now
+            return self._keys_by_kid
+
+        try:
+            # Another thread may have refreshed the key set while
+            # we were waiting for the lock: use its result.
+            if self._keys_by_kid is not None:
+                if self._version != version_before_lock:
+                    return self._keys_by_kid
+                if not force and self._clock() < self._expires_at:
+                    return self._keys_by_kid
+
+            if not self._circuit_breaker.allow_request():
+                return self._stale_keys_or_raise(
+                    serve_stale, "Identity provider circuit is open."
+                )
+
+            try:
+                jwks, max_age = self._fetch(self._jwks_url)
+            except Exception as e:
+                self._circuit_breaker.record_failure()
+                self._last_error = f"{type(e).__name__}: {e}"
+                return self._stale_keys_or_raise(
+                    serve_stale, self._last_error
+                )
+
+            self._circuit_breaker.record_success()
+            self._last_error = None
+            self._store(jwks, max_age)
+            return self._keys_by_kid
+        finally:
+            self._fetch_lock.release()
+
+    def _stale_keys_or_raise(self, serve_stale, reason):
+        if (
+            serve_stale
+            and self._keys_by_kid is not None
+            and self._clock() < self._expires_at + self._max_staleness
+        ):
+            return self._keys_by_kid
+        raise JwksUnavailableError(reason)
+
+    def _build_keys(self, jwks):
+        keys_by_kid = {}
+        for jwk in jwks.get("keys", []):
+            if "kid" not in jwk:
+                continue
+            try:
+                keys_by_kid[jwk["kid"]] = self._key_builder(jwk)
+            except Exception as e:
+                print(f"Ignoring key {jwk['kid']} of key set: {e}")
+        return keys_by_kid
+
+    def _store(self, jwks, max_age):
+        keys_by_kid = self._build_keys(jwks)
+
+        ttl = self._default_ttl if max_age is None else max_age
+        ttl = min(max(ttl, self._min_ttl), self._max_ttl)
+
+        now = self._clock()
+        self._keys_by_kid = keys_by_kid
+        self._ttl = ttl
+        self._fetched_at = now
+        self._expires_at = now + ttl
+        self._version += 1
+
+
+class JwksRefresher:
+    """A daemon thread keeping the key set of a key store warm.
+
+    Fetches the key set ahead of its expiry, retries failed fetches
+    when the circuit breaker allows it, and can be woken up early
+    when request threads find the key set stale.
+    """
+
+    MIN_DELAY_SECONDS = 1.0
+
+    def __init__(self, key_store):
+        self._key_store = key_store
+        self._wake_up_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._pid = os.getpid()
+        self._thread = threading.Thread(
+            target=self._run, name="jwks-refresher", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_up_event.set()
+
+    def wake_up(self):
+        self._wake_up_event.set()
+
+    def is_running(self):
+        # Threads do not survive a fork: a refresher created by a
+        # parent process is not running in its children.
+        return (
+            self._pid == os.getpid()
+            and self._thread.is_alive()
+            and not self._stop_event.is_set()
+        )
+
+    def run_once(self):
+        try:
+            self._key_store.refresh()
+        except JwksUnavailableError:
+            # The failure is recorded by the key store and its
+            # circuit breaker; the next attempt follows the breaker.
+            pass
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            delay = max(
+                self._key_store.seconds_until_refresh(),
+                JwksRefresher.MIN_DELAY_SECONDS,
+            )
+            self._wake_up_event.wait(delay)
+            self._wake_up_event.clear()
+            if self._stop_event.is_set():
+                break
+            self.run_once()
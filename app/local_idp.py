@@ -0,0 +1,185 @@
+import json
+import time
+import uuid
+
+import click
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+from jose.utils import long_to_base64
+
+
+"""
+A module providing a local stand-in for the identity provider
+(Auth0), for benchmarks and tests that must run without network.
+
+A local identity provider holds an RSA key pair. It publishes the
+public key as JSON Web Key Set (JWKS) and mints RS256 tokens that
+the API verifies exactly like tokens issued by Auth0.
+"""
+
+LOCAL_KEY_ID = "local-identity-provider"
+DEFAULT_TOKEN_LIFETIME_SECONDS = 60 * 60
+
+
+class LocalIdentityProvider:
+    """A local identity provider minting RS256 signed tokens.
+
+    Args:
+    - issuer (str): The issuer of minted tokens, e.g.
+      `https://<AUTH0_DOMAIN>/`.
+    - audience (str): The audience of minted tokens.
+    - private_key (optional): An RSA private key. Defaults to
+      a new in-process key pair.
+    - kid (str, optional): The key id announced for the key.
+    """
+
+    def __init__(self, issuer, audience, private_key=None, kid=LOCAL_KEY_ID):
+        if private_key is None:
+            private_key = rsa.generate_private_key(
+                public_exponent=65537, key_size=2048
+            )
+        self._issuer = issuer
+        self._audience = audience
+        self._private_key = private_key
+        self._kid = kid
+
+    @classmethod
+    def from_private_key_file(cls, path, issuer, audience, kid=LOCAL_KEY_ID):
+        """Creates an identity provider from a PEM encoded private key."""
+        with open(path, "rb") as file:
+            private_key = serialization.load_pem_private_key(
+                file.read(), password=None
+            )
+        return cls(issuer, audience, private_key=private_key, kid=kid)
+
+    def get_jwks(self):
+        """Returns the public key as JSON Web Key Set (dict)."""
+        public_numbers = self._private_key.public_key().public_numbers()
+        return {
+            "keys": [
+                {
+                    "kty": "RSA",
+                    "kid": self._kid,
+                    "use": "sig",
+                    "alg": "RS256",
+                    "n": long_to_base64(public_numbers.n).decode("ascii"),
+                    "e": long_to_base64(public_numbers.e).decode("ascii"),
+                }
+            ]
+        }
+
+    def fetch_jwks(self, jwks_url):
+        """Key set fetcher for a `JwksKeyStore`, see `app.jwks`."""
+        return self.get_jwks(), None
+
+    def get_private_key_pem(self):
+        return self._private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+
+    def mint_token(
+        self,
+        subject,
+        permissions,
+        expires_in=DEFAULT_TOKEN_LIFETIME_SECONDS,
+        **claims,
+    ):
+        """Mints a signed access token.
+
+        Args:
+        - subject (str): The `sub` claim.
+        - permissions (list): The `permissions` claim.
+        - expires_in (int, optional): Lifetime of the token in seconds.
+          Negative values mint expired tokens.
+        - claims: Additional claims, overriding the defaults.
+
+        Returns:
+        - (str) The signed JWT token.
+        """
+        now = int(time.time())
+        payload = {
+            "iss": self._issuer,
+            "aud": self._audience,
+            "sub": subject,
+            "permissions": list(permissions),
+            "iat": now,
+            "exp": now + expires_in,
+            "jti": str(uuid.uuid4()),
+        }
+        payload.update(claims)
+        return jwt.encode(
+            payload,
+            self.get_private_key_pem().decode("ascii"),
+            algorithm="RS256",
+            headers={"kid": self._kid},
+        )
+
+
+def load_jwks_file(path):
+    """Returns a key set fetcher reading the key set from a file.
+
+    Args:
+    - path (str): Path of a JSON Web Key Set file.
+    """
+
+    def fetch_jwks_from_file(jwks_url):
+        with open(path, "rb") as file:
+            return json.loads(file.read()), None
+
+    return fetch_jwks_from_file
+
+
+"""
+Command line interface, registered with the Flask CLI:
+
+    flask local-idp create-key --private-key-file key.pem \\
+        --jwks-file jwks.json
+    flask local-idp mint-token --private-key-file key.pem \\
+        --subject benchmark --permission get:movie
+"""
+
+
+@click.group("local-idp")
+def local_idp_cli():
+    """Local identity provider for benchmarks and tests."""
+
+
+@local_idp_cli.command("create-key")
+@click.option("--private-key-file", required=True, type=click.Path())
+@click.option("--jwks-file", required=True, type=click.Path())
+def create_key_command(private_key_file, jwks_file):
+    """Creates a key pair and writes the private key and the JWKS."""
+    from .auth import AUTH0_AUDIENCE, AUTH0_ISSUER
+
+    identity_provider = LocalIdentityProvider(AUTH0_ISSUER, AUTH0_AUDIENCE)
+    with open(private_key_file, "wb") as file:
+        file.write(identity_provider.get_private_key_pem())
+    with open(jwks_file, "w") as file:
+        json.dump(identity_provider.get_jwks(), file, indent=2)
+
+
+@local_idp_cli.command("mint-token")
+@click.option("--private-key-file", required=True, type=click.Path())
+@click.option("--subject", default="local|benchmark", show_default=True)
+@click.option("--permission", "permissions", multiple=True)
+@click.option(
+    "--expires-in",
+    default=DEFAULT_TOKEN_LIFETIME_SECONDS,
+    show_default=True,
+    type=int,
+)
+def mint_token_command(private_key_file, subject, permissions, expires_in):
+    """Mints a token signed with the given private key."""
+    from .auth import AUTH0_AUDIENCE, AUTH0_ISSUER
+
+    identity_provider = LocalIdentityProvider.from_private_key_file(
+        private_key_file, AUTH0_ISSUER, AUTH0_AUDIENCE
+    )
+    click.echo(
+        identity_provider.mint_token(
+            subject, permissions, expires_in=expires_in
+        )
+    )
@@ -39,6 +39,18 @@ class Movie(db.Model):
     """Model class for movies."""
 
     __tablename__ = "movie"
+    __table_args__ = (
+        # Serve listing movies ordered by title or release date, and
+        # filtered by a range of the sort column
+        db.Index("ix_movie_title_id", "title", "id"),
+        db.Index("ix_movie_release_date_id", "release_date", "id"),
+        # Serves filtering by a title prefix (LIKE) in any collation
+        db.Index(
+            "ix_movie_title_pattern",
+            "title",
+            postgresql_ops={"title": "varchar_pattern_ops"},
+        ),
+    )
 
     id = db.Column(
         db.String(36), primary_key=True, default=lambda: str(uuid.uuid4())
@@ -77,6 +89,34 @@ class Role(db.Model):
         db.UniqueConstraint(
             "movie_id", "character", name="_role_movie_id_character_uc"
         ),
+        # Serve listing (and counting) the roles of a movie or of an
+        # actor ordered by character with index-only scans, as they
+        # include all columns of roles.
+        # The latter also serves the RESTRICT check when deleting actors.
+        db.Index(
+            "ix_role_movie_id_character_id",
+            "movie_id",
+            "character",
+            "id",
+            postgresql_include=["actor_id"],
+        ),
+        db.Index(
+            "ix_role_actor_id_character_id",
+            "actor_id",
+            "character",
+            "id",
+            postgresql_include=["movie_id"],
+        ),
+        # Serves listing the open roles (without an actor) of all
+        # movies ordered by character. Open roles are few, so the
+        # partial index is small and only changes when they do.
+        db.Index(
+            "ix_role_open_character_id",
+            "character",
+            "id",
+            postgresql_include=["movie_id"],
+            postgresql_where=db.text("actor_id IS NULL"),
+        ),
     )
 
     id = db.Column(
@@ -87,7 +127,6 @@ class Role(db.Model):
         db.String(36),
         db.ForeignKey("movie.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     actor_id = db.Column(
         db.String(36),
@@ -119,6 +158,18 @@ class Actor(db.Model):
     """Model class for actors."""
 
     __tablename__ = "actor"
+    __table_args__ = (
+        # Serve listing actors ordered by name or birth date, and
+        # filtered by a range of the sort column
+        db.Index("ix_actor_name_id", "name", "id"),
+        db.Index("ix_actor_birth_date_id", "birth_date", "id"),
+        # Serves filtering by a name prefix (LIKE) in any collation
+        db.Index(
+            "ix_actor_name_pattern",
+            "name",
+            postgresql_ops={"name": "varchar_pattern_ops"},
+        ),
+    )
 
     id = db.Column(
         db.String(36), primary_key=True, default=lambda: str(uuid.uuid4())
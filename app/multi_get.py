@@ -0,0 +1,82 @@
+from flask import request
+from sqlalchemy import String, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from .models import db
+
+
+"""
+Helper methods to get many resources by their ids at once.
+
+The ids are given as comma separated `ids` query parameter, or
+for long lists as `ids` array in the JSON body of a POST request.
+All resources are selected with a single `WHERE id = ANY(:ids)`
+query, which binds the ids as one array parameter, so the statement
+is the same for any number of ids.
+"""
+
+IDS_PARAMETER = "ids"
+MAX_IDS_PER_REQUEST = 500
+
+
+def is_multi_get_requested():
+    """Returns True if the request asks for resources by ids."""
+    return IDS_PARAMETER in request.args
+
+
+def get_requested_ids():
+    """Returns the requested ids, in request order without duplicates.
+
+    Raises:
+    - AssertionError if no or too many ids are given.
+    """
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+        assert isinstance(body, dict), "No valid ids provided!"
+        ids = body.get(IDS_PARAMETER)
+        assert isinstance(ids, list) and all(
+            isinstance(element_id, str) for element_id in ids
+        ), "No valid ids provided!"
+    else:
+        ids = request.args.get(IDS_PARAMETER, "").split(",")
+
+    ids = list(
+        dict.fromkeys(
+            element_id.strip() for element_id in ids if element_id.strip()
+        )
+    )
+    assert ids, "No ids provided!"
+    assert len(ids) <= MAX_IDS_PER_REQUEST, (
+        f"Too many ids, at most {MAX_IDS_PER_REQUEST} are supported!"
+    )
+    return ids
+
+
+def get_by_ids(query, id_column, ids):
+    """Gets the views selected by a read model query by their ids.
+
+    Args:
+    - query (Select): The query selecting a read model.
+    - id_column: The id column to match, e.g. `Movie.id`.
+    - ids (list): The ids.
+
+    Returns:
+    - (tuple) The views found, in the order of `ids`, and the ids
+      that were not found.
+    """
+    views = db.session.execute(
+        query.where(
+            id_column == any_(bindparam("ids", ids, type_=ARRAY(String)))
+        )
+    ).scalars()
+    views_by_id = {view.id: view for view in views}
+
+    found = [
+        views_by_id[element_id]
+        for element_id in ids
+        if element_id in views_by_id
+    ]
+    missing_ids = [
+        element_id for element_id in ids if element_id not in views_by_id
+    ]
+    return found, missing_ids
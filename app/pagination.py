@@ -0,0 +1,466 @@
+import base64
+import binascii
+import datetime
+import json
+import threading
+import time
+
+from flask import abort, request
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import func, true, tuple_
+
+from .helper import to_date
+from .models import db
+
+
+"""
+Helper methods for keyset (cursor) pagination of list endpoints.
+
+Instead of skipping the rows of all previous pages (OFFSET), a
+page starts right after the last row of the previous page, which
+is identified by an opaque cursor. The cursor encodes the values
+of the sort key of that row, with the `id` as tiebreaker, so
+every page costs the same no matter how deep it is.
+
+Counting the total number of items is optional, see `count_total`.
+
+Lists of a sub-resource (e.g. the roles of a movie) are fetched
+together with the existence check of their parent, and optionally
+their total, in a single statement, see `fetch_page`.
+"""
+
+CURSOR_PARAMETER = "cursor"
+COUNT_PARAMETER = "count"
+
+"""
+Modes to count the total number of items of a list:
+- exact: Counts the items (`SELECT count(*)`). Totals of
+  unfiltered lists are served from a `TotalCountCache`.
+- estimated: Uses the row estimate of the query planner
+  (or a cached exact total), which costs no scan at all.
+- none: Does not count, the total is `None`.
+"""
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_NONE = "none"
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_NONE)
+
+"""
+Cached totals are dropped after this many seconds. Writes of this
+process invalidate them right away, this bounds how long writes of
+other processes (e.g. other gunicorn workers) go unnoticed.
+"""
+DEFAULT_TOTAL_COUNT_MAX_AGE_SECONDS = 30
+
+
+def _encode_cursor_value(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in cursors.")
+
+
+def encode_cursor(values):
+    """Encodes the sort key values of a row as opaque cursor.
+
+    Dates are encoded as ISO strings, which the database compares
+    with the date column of the sort key.
+    """
+    data = json.dumps(
+        values, separators=(",", ":"), default=_encode_cursor_value
+    ).encode("utf-8")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _decode_cursor_value(value, column):
+    """Returns the value of a column decoded from a cursor, or None if
+    it does not match the type of the column."""
+    python_type = column.type.python_type
+    if python_type is datetime.date:
+        return to_date(value) if isinstance(value, str) else None
+    if python_type is int:
+        # bool is a subclass of int, but not a valid value
+        is_valid = isinstance(value, int) and not isinstance(value, bool)
+        return value if is_valid else None
+    if python_type is str:
+        # PostgreSQL does not accept NUL characters in strings
+        is_valid = isinstance(value, str) and "\0" not in value
+        return value if is_valid else None
+    return value if isinstance(value, python_type) else None
+
+
+def decode_cursor(cursor, order_columns):
+    """Decodes a cursor into the sort key values of a row.
+
+    Args:
+    - cursor (str): The cursor.
+    - order_columns (tuple): The columns of the sort key.
+
+    Returns:
+    - (list) The sort key values, or None if the cursor is invalid or
+      a value does not match the type of its column.
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+
+    if not isinstance(values, list) or len(values) != len(order_columns):
+        return None
+
+    decoded_values = [
+        _decode_cursor_value(value, column)
+        for value, column in zip(values, order_columns)
+    ]
+    if any(value is None for value in decoded_values):
+        return None
+    return decoded_values
+
+
+def is_keyset_pagination_requested():
+    """Returns True if the request asks for keyset pagination.
+
+    An empty `cursor` query parameter asks for the first page.
+    """
+    return CURSOR_PARAMETER in request.args
+
+
+def get_per_page(max_per_page):
+    """Returns the page size requested with `per_page`.
+
+    Behaves like `db.paginate`: the page size is limited to
+    `max_per_page`, and invalid page sizes are answered with 404.
+    """
+    try:
+        per_page = int(request.args.get("per_page", max_per_page))
+    except (TypeError, ValueError):
+        abort(404)
+
+    if per_page < 1:
+        abort(404)
+    return min(per_page, max_per_page)
+
+
+def get_page():
+    """Returns the page number requested with `page`.
+
+    Behaves like `db.paginate`: invalid page numbers are answered
+    with 404.
+    """
+    try:
+        page = int(request.args.get("page", 1))
+    except (TypeError, ValueError):
+        abort(404)
+
+    if page < 1:
+        abort(404)
+    return page
+
+
+def get_count_mode():
+    """Returns the count mode requested with `count`.
+
+    Raises:
+    - AssertionError if the count mode is unknown.
+    """
+    count_mode = request.args.get(COUNT_PARAMETER, COUNT_EXACT)
+    assert count_mode in COUNT_MODES, "Invalid count mode!"
+    return count_mode
+
+
+class TotalCountCache:
+    """A thread-safe cache of exact totals of unfiltered lists.
+
+    Args:
+    - max_age (float, optional): Seconds after which a total expires.
+    - clock (callable, optional): Returns the current time in seconds.
+    """
+
+    def __init__(
+        self,
+        max_age=DEFAULT_TOTAL_COUNT_MAX_AGE_SECONDS,
+        clock=time.monotonic,
+    ):
+        self._max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        """Returns the cached total for a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            total, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                return None
+            return total
+
+    def put(self, key, total):
+        with self._lock:
+            self._entries[key] = (total, self._clock() + self._max_age)
+
+    def invalidate(self, key):
+        """Drops the cached total for a key, e.g. after a write."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+def count_exact(query):
+    """Counts the items of a query."""
+    return db.session.execute(
+        db.select(func.count()).select_from(query.order_by(None).subquery())
+    ).scalar()
+
+
+def count_estimated(query):
+    """Returns the row estimate of the query planner for a query.
+
+    The estimate relies on the table statistics, so it is only as
+    good as the last `ANALYZE` (or autovacuum) of the tables.
+    """
+    compiled = query.order_by(None).compile(dialect=db.engine.dialect)
+    plan = (
+        db.session.connection()
+        .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+        .scalar()
+    )
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_total(query, count_mode, total_counts=None, cache_key=None):
+    """Counts the total number of items of a query.
+
+    Args:
+    - query (Select): The query.
+    - count_mode (str): One of `COUNT_MODES`.
+    - total_counts (TotalCountCache, optional): The cache of totals.
+    - cache_key (str, optional): The key of the total in the cache, only
+      given for unfiltered lists.
+
+    Returns:
+    - (int) The total number of items, or None if not counted.
+    """
+    if count_mode == COUNT_NONE:
+        return None
+
+    cached = total_counts is not None and cache_key is not None
+    if cached:
+        total = total_counts.get(cache_key)
+        if total is not None:
+            return total
+
+    if count_mode == COUNT_ESTIMATED:
+        return count_estimated(query)
+
+    total = count_exact(query)
+    if cached:
+        total_counts.put(cache_key, total)
+    return total
+
+
+class ParentResource:
+    """The parent of a sub-resource list, which must exist.
+
+    Args:
+    - model: The model class of the parent, e.g. `Movie`.
+    - id (str): The id of the parent.
+    - read_model (ReadModel, optional): The read model of the parent,
+      to load its `view` with the page.
+    """
+
+    def __init__(self, model, id, read_model=None):
+        self.model = model
+        self.id = id
+        self.read_model = read_model
+        self.view = None
+
+
+def fetch_page(page_query, order_columns, parent=None, count_query=None):
+    """Executes the query of a page.
+
+    Given a parent, the same statement checks that the parent exists
+    (and loads its view, if it has a read model) and, given a count
+    query, counts the total number of items:
+
+        SELECT page.*, <parent>.*, counted.total
+        FROM <parent>
+        LEFT OUTER JOIN (<page query>) AS page ON true
+        JOIN (SELECT count(*) AS total FROM (<count query>)) AS counted
+            ON true
+        WHERE <parent>.id = :id
+        ORDER BY <order columns of page>
+
+    Args:
+    - page_query (Select): The query of the page, ordered and limited,
+      selecting a read model (see `app.read_models`).
+    - order_columns (tuple): The columns the page is sorted by.
+    - parent (ParentResource, optional): The parent of the items.
+    - count_query (Select, optional): The query to count the total
+      number of items, only used with a parent.
+
+    Raises:
+    - NotFound (404) if the parent does not exist.
+
+    Returns:
+    - (tuple) The items of the page and their total number (None if
+      not counted).
+    """
+    if parent is None:
+        return db.session.execute(page_query).scalars().all(), None
+
+    page = page_query.subquery()
+    item = page_query.column_descriptions[0]["expr"].adapt_to(page)
+
+    statement = (
+        db.select(item)
+        .select_from(parent.model)
+        .outerjoin(page, true())
+        .where(parent.model.id == parent.id)
+        .order_by(*[item.c[column.key] for column in order_columns])
+    )
+    if parent.read_model is not None:
+        statement = statement.add_columns(parent.read_model)
+    if count_query is not None:
+        counted = (
+            db.select(func.count().label("total"))
+            .select_from(count_query.order_by(None).subquery())
+            .subquery()
+        )
+        statement = statement.add_columns(counted.c.total).join(
+            counted, true()
+        )
+
+    rows = db.session.execute(statement).all()
+    if not rows:
+        abort(404)
+
+    # Without any item on the page, the parent is joined with NULLs
+    items = [row[0] for row in rows if row[0] is not None]
+    if parent.read_model is not None:
+        parent.view = rows[0][1]
+    total = rows[0][-1] if count_query is not None else None
+    return items, total
+
+
+class SubResourcePagination(Pagination):
+    """Page based pagination of a sub-resource list, see `fetch_page`.
+
+    Takes the arguments `select` (the query without ordering),
+    `order_columns`, `parent` and `count_query` in addition to the
+    arguments of `Pagination`. Counts in the same statement if `count`
+    is true.
+    """
+
+    def _query_items(self):
+        query = self._query_args["select"]
+        order_columns = self._query_args["order_columns"]
+        page_query = (
+            query.order_by(*order_columns)
+            .limit(self.per_page)
+            .offset(self._query_offset)
+        )
+        items, self._total = fetch_page(
+            page_query,
+            order_columns,
+            parent=self._query_args["parent"],
+            count_query=self._query_args["count_query"],
+        )
+        return items
+
+    def _query_count(self):
+        return self._total
+
+
+class KeysetPage:
+    """A page of a keyset paginated query."""
+
+    def __init__(self, items, next_cursor, total):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def order_by(order_columns, descending=False):
+    """Returns the ORDER BY clauses of the order columns.
+
+    All columns are sorted in the same direction, so that an index on
+    them is scanned forwards or backwards.
+    """
+    if descending:
+        return [column.desc() for column in order_columns]
+    return list(order_columns)
+
+
+def get_cursor_of(item, order_columns):
+    """Returns the cursor pointing right after an item."""
+    return encode_cursor(
+        [getattr(item, column.key) for column in order_columns]
+    )
+
+
+def paginate_by_keyset(
+    query,
+    order_columns,
+    max_per_page,
+    total=None,
+    parent=None,
+    count_query=None,
+    descending=False,
+):
+    """Gets the page of a query after the cursor of the request.
+
+    Args:
+    - query (Select): The query without ordering.
+    - order_columns (tuple): The columns to sort by, ending with the
+      unique `id` column as tiebreaker.
+    - max_per_page (int): The maximum page size.
+    - total (int, optional): The total number of items, if counted.
+    - parent (ParentResource, optional): The parent of the items,
+      see `fetch_page`.
+    - count_query (Select, optional): The query to count the total
+      number of items in the same statement, replacing `total`.
+    - descending (bool, optional): True to sort in descending order,
+      only supported without a parent.
+
+    Raises:
+    - AssertionError if the cursor is invalid.
+    - NotFound (404) if the parent does not exist.
+
+    Returns:
+    - (KeysetPage) The items of the page, the cursor of the next page
+      (None on the last page) and the total number of items (None if
+      not counted).
+    """
+    per_page = get_per_page(max_per_page)
+
+    cursor = request.args.get(CURSOR_PARAMETER)
+    if cursor:
+        values = decode_cursor(cursor, order_columns)
+        assert values is not None, "Invalid cursor!"
+        if descending:
+            query = query.where(tuple_(*order_columns) < tuple_(*values))
+        else:
+            query = query.where(tuple_(*order_columns) > tuple_(*values))
+
+    page_query = query.order_by(*order_by(order_columns, descending)).limit(
+        per_page + 1
+    )
+    items, counted_total = fetch_page(
+        page_query, order_columns, parent=parent, count_query=count_query
+    )
+    if count_query is not None:
+        total = counted_total
+
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = get_cursor_of(items[-1], order_columns)
+
+    return KeysetPage(items, next_cursor, total)
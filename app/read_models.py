@@ -0,0 +1,277 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Bundle
+
+from .helper import format_date
+from .models import Movie, Actor, Role
+
+
+"""
+A module for the read path of the API.
+
+GET endpoints only serialize what they read, so they do not need
+ORM instances, which are tracked in the identity map of the session
+and carry the state for change tracking. Instead, they select the
+columns of a read model. Each row is mapped to a lightweight view
+object with `__slots__`, providing the same `format()` as the model.
+
+Select a read model like an entity, e.g.
+
+    db.session.execute(db.select(MOVIE).where(...)).scalars()
+
+To select only some fields of a resource (sparse fieldsets), select
+a projection of its read model, e.g. `MOVIE.project(["title"])`.
+"""
+
+
+class ReadModel(Bundle):
+    """A bundle of columns mapping each row to a view object.
+
+    Like ORM entities, rows without an `id` (e.g. the NULLs of an
+    outer join) are mapped to None.
+
+    Args:
+    - name (str): The name of the bundle.
+    - view_class (type): The class of view objects, created with the
+      values of the columns as arguments, named by the column keys.
+    - exprs: The columns, starting with the `id`.
+    """
+
+    def __init__(self, name, view_class, *exprs, **kwargs):
+        super().__init__(name, *exprs, **kwargs)
+        self.view_class = view_class
+        self.field_names = tuple(expr.key for expr in self.exprs)
+        self._projections = {}
+
+    def create_row_processor(self, query, procs, labels):
+        view_class = self.view_class
+        id_proc = procs[0]
+
+        if self.field_names == view_class.__slots__:
+            def proc(row):
+                if id_proc(row) is None:
+                    return None
+                return view_class(
+                    *[column_proc(row) for column_proc in procs]
+                )
+        else:
+            # Projections pass the values of their columns by name
+            procs_by_name = list(zip(self.field_names, procs))
+
+            def proc(row):
+                if id_proc(row) is None:
+                    return None
+                values = {
+                    name: column_proc(row)
+                    for name, column_proc in procs_by_name
+                }
+                return view_class(**values)
+
+        return proc
+
+    def project(self, fields, required_columns=()):
+        """Returns the read model of the columns of some fields only.
+
+        The attributes of views for other fields are None.
+
+        Args:
+        - fields (tuple): The names of the fields, or None for all.
+        - required_columns (tuple, optional): Columns to select anyway,
+          e.g. the sort key. The `id` is always selected.
+        """
+        if fields is None:
+            return self
+
+        names = frozenset(
+            (self.field_names[0], *fields)
+            + tuple(column.key for column in required_columns)
+        )
+        projection = self._projections.get(names)
+        if projection is None:
+            projection = self._projections[names] = ReadModel(
+                self.name,
+                self.view_class,
+                *[expr for expr in self.exprs if expr.key in names],
+            )
+        return projection
+
+    def adapt_to(self, selectable):
+        """Returns the read model of the same columns of a subquery."""
+        return ReadModel(
+            self.name,
+            self.view_class,
+            *[selectable.c[expr.key] for expr in self.exprs],
+        )
+
+
+class MovieView:
+    """Read-only view of a movie."""
+
+    __slots__ = ("id", "title", "release_date")
+
+    def __init__(self, id, title=None, release_date=None):
+        self.id = id
+        self.title = title
+        self.release_date = release_date
+
+    def format(self):
+        return {
+            "id": self.id,
+            "title": self.title,
+            "release_date": format_date(self.release_date),
+        }
+
+
+class ActorView:
+    """Read-only view of an actor."""
+
+    __slots__ = ("id", "name", "birth_date")
+
+    def __init__(self, id, name=None, birth_date=None):
+        self.id = id
+        self.name = name
+        self.birth_date = birth_date
+
+    def format(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "birth_date": format_date(self.birth_date),
+        }
+
+
+class RoleView:
+    """Read-only view of a role."""
+
+    __slots__ = ("id", "movie_id", "character", "actor_id")
+
+    def __init__(self, id, movie_id=None, character=None, actor_id=None):
+        self.id = id
+        self.movie_id = movie_id
+        self.character = character
+        self.actor_id = actor_id
+
+    def format(self):
+        return {
+            "id": self.id,
+            "movie_id": self.movie_id,
+            "character": self.character,
+            "actor_id": self.actor_id,
+        }
+
+
+class CastMemberView:
+    """Read-only view of a role of a movie, with its actor."""
+
+    __slots__ = ("id", "character", "actor_id", "name", "birth_date")
+
+    def __init__(self, id, character, actor_id, name, birth_date):
+        self.id = id
+        self.character = character
+        self.actor_id = actor_id
+        self.name = name
+        self.birth_date = birth_date
+
+    def format(self):
+        actor = None
+        if self.actor_id is not None:
+            actor = {
+                "id": self.actor_id,
+                "name": self.name,
+                "birth_date": format_date(self.birth_date),
+            }
+        return {"id": self.id, "character": self.character, "actor": actor}
+
+
+class FilmographyEntryView:
+    """Read-only view of a role of an actor, with its movie."""
+
+    __slots__ = ("id", "character", "movie_id", "title", "release_date")
+
+    def __init__(self, id, character, movie_id, title, release_date):
+        self.id = id
+        self.character = character
+        self.movie_id = movie_id
+        self.title = title
+        self.release_date = release_date
+
+    def format(self):
+        return {
+            "id": self.id,
+            "character": self.character,
+            "movie": {
+                "id": self.movie_id,
+                "title": self.title,
+                "release_date": format_date(self.release_date),
+            },
+        }
+
+
+class OpenRoleView:
+    """Read-only view of a role without an actor, with its movie."""
+
+    __slots__ = ("id", "character", "movie_id", "title")
+
+    def __init__(self, id, character, movie_id, title):
+        self.id = id
+        self.character = character
+        self.movie_id = movie_id
+        self.title = title
+
+    def format(self):
+        return {
+            "id": self.id,
+            "character": self.character,
+            "movie": {"id": self.movie_id, "title": self.title},
+        }
+
+
+"""
+The read models of the resources.
+"""
+MOVIE = ReadModel(
+    "movie", MovieView, Movie.id, Movie.title, Movie.release_date
+)
+ACTOR = ReadModel("actor", ActorView, Actor.id, Actor.name, Actor.birth_date)
+ROLE = ReadModel(
+    "role", RoleView, Role.id, Role.movie_id, Role.character, Role.actor_id
+)
+
+"""
+The read models of roles joined with their actor or movie, to be
+selected from `Role` joined with `Actor` or `Movie` respectively.
+"""
+CAST_MEMBER = ReadModel(
+    "cast_member",
+    CastMemberView,
+    Role.id,
+    Role.character,
+    Role.actor_id,
+    Actor.name,
+    Actor.birth_date,
+)
+FILMOGRAPHY_ENTRY = ReadModel(
+    "filmography_entry",
+    FilmographyEntryView,
+    Role.id,
+    Role.character,
+    Role.movie_id,
+    Movie.title,
+    Movie.release_date,
+)
+
+"""
+The read model of roles without an actor, to be selected from `Role`.
+The title of the movie is selected by a correlated subquery instead
+of a join, so counting the roles does not read the movies at all.
+"""
+OPEN_ROLE = ReadModel(
+    "open_role",
+    OpenRoleView,
+    Role.id,
+    Role.character,
+    Role.movie_id,
+    select(Movie.title)
+    .where(Movie.id == Role.movie_id)
+    .scalar_subquery()
+    .label("title"),
+)
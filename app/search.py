@@ -0,0 +1,422 @@
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+from .indexing import InMemoryIndex
+from .models import db, Movie, Actor, Role
+from .multi_get import get_by_ids
+from .read_models import MOVIE, ACTOR, ROLE
+
+
+"""
+A module for the full-text search over movie titles, actor names and
+role characters, served from an in-memory inverted index.
+
+Texts are normalized (case and accents folded) and split into
+tokens. The index maps each token to the postings of the documents
+containing it, i.e. an array of document numbers. For typo tolerance,
+it also maps each trigram to the tokens containing it: tokens of a
+query that are not known, e.g. misspelled, are matched with the known
+tokens sharing most of their trigrams (like `pg_trgm`).
+
+Documents match if they contain all tokens of the query (or similar
+tokens). They are ranked by BM25, and fuzzy matches are weighted by
+their trigram similarity.
+"""
+
+"""
+Kinds of documents.
+"""
+KIND_MOVIE = "movie"
+KIND_ACTOR = "actor"
+KIND_ROLE = "role"
+KINDS = (KIND_MOVIE, KIND_ACTOR, KIND_ROLE)
+
+"""
+The read models of the kinds, to load found resources.
+"""
+READ_MODELS = {
+    KIND_MOVIE: (MOVIE, Movie.id),
+    KIND_ACTOR: (ACTOR, Actor.id),
+    KIND_ROLE: (ROLE, Role.id),
+}
+
+"""
+Parameters of the ranking and of fuzzy matching.
+"""
+BM25_K1 = 1.2
+BM25_B = 0.75
+MIN_TRIGRAM_SIMILARITY = 0.4
+MAX_FUZZY_MATCHES_PER_TOKEN = 8
+FUZZY_MATCH_WEIGHT = 0.8
+
+"""
+Postings of query tokens are scanned if at most this many times
+longer than the list of candidates, else looked up per candidate.
+"""
+MAX_POSTINGS_PER_CANDIDATE_TO_SCAN = 8
+
+"""
+Rebuild the postings once this share of documents is deleted.
+"""
+MAX_DELETED_SHARE = 0.25
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Folds case and accents of a text, e.g. "Amélie" to "amelie"."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(
+        character
+        for character in decomposed
+        if not unicodedata.combining(character)
+    )
+
+
+def tokenize(text):
+    """Returns the normalized tokens of a text."""
+    return _TOKEN_PATTERN.findall(normalize(text))
+
+
+def get_trigrams(token):
+    """Returns the trigrams of a token, padded like `pg_trgm`."""
+    padded = f"  {token} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class SearchData:
+    """The documents, postings and trigrams of a search index.
+
+    Documents are numbered in the order they are added, so postings
+    stay sorted when appending. Deleted documents are skipped while
+    searching, and dropped from the postings by `compact()`.
+    """
+
+    def __init__(self):
+        # Documents by number
+        self._kinds = bytearray()
+        self._ids = []
+        self._lengths = array("H")
+        self._total_length = 0
+        self._deleted = 0
+
+        # Document numbers by kind and id
+        self._numbers = {kind: {} for kind in KINDS}
+
+        # Postings (document numbers) by token
+        self._postings = {}
+
+        # Tokens (by number) and token numbers by trigram
+        self._tokens = []
+        self._token_numbers = {}
+        self._trigrams = {}
+
+    def __len__(self):
+        return len(self._ids) - self._deleted
+
+    def add(self, kind, id, text):
+        """Adds or replaces the document of a resource."""
+        self.remove(kind, id)
+
+        tokens = tokenize(text)
+        number = len(self._ids)
+        self._kinds.append(KINDS.index(kind))
+        self._ids.append(id)
+        self._lengths.append(min(len(tokens), 0xFFFF))
+        self._total_length += len(tokens)
+        self._numbers[kind][id] = number
+
+        for token in dict.fromkeys(tokens):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = array("I")
+                if token not in self._token_numbers:
+                    self._add_token(token)
+            postings.append(number)
+
+    def remove(self, kind, id):
+        """Removes the document of a resource, if indexed."""
+        number = self._numbers[kind].pop(id, None)
+        if number is None:
+            return
+
+        self._ids[number] = None
+        self._total_length -= self._lengths[number]
+        self._deleted += 1
+        if self._deleted > MAX_DELETED_SHARE * len(self._ids):
+            self.compact()
+
+    def compact(self):
+        """Renumbers the documents and drops deleted documents."""
+        renumbered = array("i", [-1]) * len(self._ids)
+        kinds = bytearray()
+        ids = []
+        lengths = array("H")
+        for number, id in enumerate(self._ids):
+            if id is None:
+                continue
+            renumbered[number] = len(ids)
+            kinds.append(self._kinds[number])
+            ids.append(id)
+            lengths.append(self._lengths[number])
+
+        for token, postings in list(self._postings.items()):
+            compacted = array(
+                "I",
+                (
+                    renumbered[number]
+                    for number in postings
+                    if renumbered[number] >= 0
+                ),
+            )
+            if compacted:
+                self._postings[token] = compacted
+            else:
+                # Tokens stay known for fuzzy matching, without postings
+                del self._postings[token]
+
+        self._kinds = kinds
+        self._ids = ids
+        self._lengths = lengths
+        self._deleted = 0
+        for kind_numbers in self._numbers.values():
+            for id, number in kind_numbers.items():
+                kind_numbers[id] = renumbered[number]
+
+    def search(self, query, kinds=KINDS, limit=10, offset=0):
+        """Searches documents matching all tokens of a query.
+
+        Query tokens are matched rarest first: the postings of the
+        rarest token give the candidates, the other tokens are looked
+        up for the candidates only (by binary search in their sorted
+        postings), so common tokens cost little. Query tokens matching
+        no document at all are ignored.
+
+        Args:
+        - query (str): The query.
+        - kinds (tuple, optional): The kinds of documents to find.
+        - limit (int, optional): The maximum number of results.
+        - offset (int, optional): The number of best results to skip.
+
+        Returns:
+        - (tuple) The results as (kind, id, score) tuples, best first,
+          and the total number of matching documents.
+        """
+        number_of_documents = len(self)
+        if number_of_documents == 0:
+            return [], 0
+
+        # The postings and weights of the matches of each query token
+        matches_of_query_tokens = []
+        for query_token in dict.fromkeys(tokenize(query)):
+            matches = []
+            for token, similarity in self._match(query_token):
+                postings = self._postings[token]
+                idf = math.log(
+                    1
+                    + (number_of_documents - len(postings) + 0.5)
+                    / (len(postings) + 0.5)
+                )
+                matches.append((postings, similarity * idf))
+            if matches:
+                matches_of_query_tokens.append(matches)
+        if not matches_of_query_tokens:
+            return [], 0
+
+        matches_of_query_tokens.sort(
+            key=lambda matches: sum(len(postings) for postings, _ in matches)
+        )
+
+        # Candidates are the documents matching the rarest query token
+        kind_codes = {KINDS.index(kind) for kind in kinds}
+        scores = {
+            number: weight
+            for number, weight in self._best_weights(
+                matches_of_query_tokens[0]
+            ).items()
+            if self._ids[number] is not None
+            and self._kinds[number] in kind_codes
+        }
+
+        for matches in matches_of_query_tokens[1:]:
+            if not scores:
+                break
+            size = sum(len(postings) for postings, _ in matches)
+            if size <= MAX_POSTINGS_PER_CANDIDATE_TO_SCAN * len(scores):
+                weights = self._best_weights(matches)
+                scores = {
+                    number: score + weights[number]
+                    for number, score in scores.items()
+                    if number in weights
+                }
+            else:
+                scores = self._add_best_weights_of_candidates(scores, matches)
+
+        # BM25 with a term frequency of 1 and length normalization
+        average_length = self._total_length / number_of_documents or 1.0
+        lengths = self._lengths
+        for number, score in scores.items():
+            scores[number] = score * (BM25_K1 + 1) / (
+                1
+                + BM25_K1
+                * (1 - BM25_B + BM25_B * lengths[number] / average_length)
+            )
+
+        best = heapq.nlargest(
+            offset + limit, scores.items(), key=lambda item: item[1]
+        )
+        results = [
+            (KINDS[self._kinds[number]], self._ids[number], score)
+            for number, score in best[offset:]
+        ]
+        return results, len(scores)
+
+    def _add_token(self, token):
+        token_number = len(self._tokens)
+        self._tokens.append(token)
+        self._token_numbers[token] = token_number
+        for trigram in get_trigrams(token):
+            token_numbers = self._trigrams.get(trigram)
+            if token_numbers is None:
+                token_numbers = self._trigrams[trigram] = array("I")
+            token_numbers.append(token_number)
+
+    def _match(self, query_token):
+        """Returns the known tokens matching a query token, with their
+        similarity: the token itself if known, similar tokens else."""
+        if query_token in self._postings:
+            return [(query_token, 1.0)]
+
+        # Tokens with the minimum similarity share at least `required`
+        # trigrams with the query token, so they contain at least one
+        # of its rarest trigrams but `required - 1`.
+        trigrams = get_trigrams(query_token)
+        rarest_trigrams = sorted(
+            trigrams, key=lambda trigram: len(self._trigrams.get(trigram, ()))
+        )
+        required = math.ceil(MIN_TRIGRAM_SIMILARITY * len(trigrams))
+        candidates = set()
+        for trigram in rarest_trigrams[:len(trigrams) - required + 1]:
+            candidates.update(self._trigrams.get(trigram, ()))
+
+        similar_tokens = []
+        for token_number in candidates:
+            token = self._tokens[token_number]
+            if token not in self._postings:
+                continue
+            token_trigrams = get_trigrams(token)
+            shared = len(trigrams & token_trigrams)
+            similarity = shared / (
+                len(trigrams) + len(token_trigrams) - shared
+            )
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                similar_tokens.append((similarity, token))
+
+        return [
+            (token, similarity * FUZZY_MATCH_WEIGHT)
+            for similarity, token in heapq.nlargest(
+                MAX_FUZZY_MATCHES_PER_TOKEN, similar_tokens
+            )
+        ]
+
+    @staticmethod
+    def _best_weights(matches):
+        """Returns the best weight of matches by document number."""
+        if len(matches) == 1:
+            postings, weight = matches[0]
+            return dict.fromkeys(postings, weight)
+
+        weights = {}
+        for postings, weight in matches:
+            for number in postings:
+                if weights.get(number, 0.0) < weight:
+                    weights[number] = weight
+        return weights
+
+    @staticmethod
+    def _add_best_weights_of_candidates(scores, matches):
+        """Adds the best weight of matches to the scores of candidates
+        found in their postings, and drops the other candidates."""
+        matches = sorted(matches, key=lambda match: match[1], reverse=True)
+        added_scores = {}
+        for number, score in scores.items():
+            for postings, weight in matches:
+                index = bisect_left(postings, number)
+                if index < len(postings) and postings[index] == number:
+                    added_scores[number] = score + weight
+                    break
+        return added_scores
+
+
+class SearchIndex(InMemoryIndex):
+    """In-memory search index over movies, actors and roles.
+
+    The write handlers keep it current with `put()` and `delete()`.
+    """
+
+    def load(self):
+        data = SearchData()
+        sources = (
+            (KIND_MOVIE, Movie.id, Movie.title),
+            (KIND_ACTOR, Actor.id, Actor.name),
+            (KIND_ROLE, Role.id, Role.character),
+        )
+        for kind, id_column, text_column in sources:
+            rows = db.session.execute(
+                db.select(id_column, text_column).execution_options(
+                    yield_per=10000
+                )
+            )
+            for id, text in rows:
+                data.add(kind, id, text)
+        return data
+
+    def search(self, query, kinds=KINDS, limit=10, offset=0):
+        """Searches documents, see `SearchData.search()`."""
+        data = self.get_data()
+        with self._lock:
+            return data.search(query, kinds, limit=limit, offset=offset)
+
+    def put(self, kind, id, text):
+        """Adds or replaces the document of a created or updated
+        resource."""
+        self.update(lambda data: data.add(kind, id, text))
+
+    def delete(self, kind, ids):
+        """Removes the documents of deleted resources."""
+
+        def remove_documents(data):
+            for id in ids:
+                data.remove(kind, id)
+
+        self.update(remove_documents)
+
+
+def load_search_results(results):
+    """Loads the resources of search results, with one query per kind.
+
+    Resources deleted by other processes, but still indexed, are
+    dropped from the results.
+
+    Args:
+    - results (list): The results as (kind, id, score) tuples.
+
+    Returns:
+    - (list) The results as (kind, view, score) tuples.
+    """
+    views_by_kind = {}
+    for kind, (read_model, id_column) in READ_MODELS.items():
+        ids = [id for result_kind, id, _ in results if result_kind == kind]
+        if ids:
+            views, _ = get_by_ids(db.select(read_model), id_column, ids)
+            views_by_kind[kind] = {view.id: view for view in views}
+
+    return [
+        (kind, views_by_kind[kind][id], score)
+        for kind, id, score in results
+        if id in views_by_kind[kind]
+    ]
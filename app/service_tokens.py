@@ -0,0 +1,219 @@
+import hashlib
+import hmac
+import json
+import time
+
+import click
+from jose.utils import base64url_decode, base64url_encode
+
+
+"""
+A module for internal service tokens.
+
+Internal callers (batch jobs, other services) authenticate with
+tokens signed with a shared secret (HMAC-SHA256) instead of tokens
+issued by Auth0. They carry the same `permissions` claim as Auth0
+tokens, but are verified locally, without any asymmetric crypto
+and without fetching a key set.
+
+Service tokens are JWTs with the algorithm `HS256`. Their `kid`
+header names the secret used to sign them, so secrets can be
+rotated. The secrets are configured as comma separated list of
+`<kid>:<secret>` pairs.
+"""
+
+SERVICE_TOKEN_ALGORITHM = "HS256"
+SERVICE_TOKEN_ISSUER = "movieworld-service"
+DEFAULT_SERVICE_TOKEN_LIFETIME_SECONDS = 60 * 60
+
+
+class InvalidServiceTokenError(Exception):
+    """Raised when a service token cannot be verified.
+
+    The `reason` is one of the class constants.
+    """
+
+    UNKNOWN_KEY = "unknown_key"
+    INVALID_SIGNATURE = "invalid_signature"
+    MALFORMED = "malformed"
+    EXPIRED = "expired"
+    INVALID_CLAIMS = "invalid_claims"
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def parse_service_token_secrets(config):
+    """Parses a `<kid>:<secret>,<kid>:<secret>` configuration string.
+
+    Returns:
+    - (dict) The secrets (bytes) by key id.
+    """
+    secrets_by_kid = {}
+    if not config:
+        return secrets_by_kid
+
+    for entry in config.split(","):
+        kid, separator, secret = entry.strip().partition(":")
+        if not separator or not kid or not secret:
+            raise ValueError(
+                "Service token secrets must be given as <kid>:<secret>."
+            )
+        secrets_by_kid[kid] = secret.encode("utf-8")
+    return secrets_by_kid
+
+
+def _sign(secret, signing_input):
+    return hmac.new(secret, signing_input, hashlib.sha256).digest()
+
+
+class ServiceTokenVerifier:
+    """Verifies and mints HMAC signed service tokens.
+
+    Args:
+    - secrets_by_kid (dict): The secrets (bytes) by key id.
+    - audience (str): The expected audience of tokens.
+    - issuer (str, optional): The expected issuer of tokens.
+    """
+
+    def __init__(self, secrets_by_kid, audience, issuer=SERVICE_TOKEN_ISSUER):
+        self._secrets_by_kid = dict(secrets_by_kid)
+        self._audience = audience
+        self._issuer = issuer
+
+    def verify(self, token, header):
+        """Verifies a service token.
+
+        Args:
+        - token (str): The JWT token.
+        - header (dict): The (unverified) header of the JWT token.
+
+        Raises:
+        - InvalidServiceTokenError if the token is not valid.
+
+        Returns:
+        - (dict) The payload (aka. claims) of the token.
+        """
+        secret = self._secrets_by_kid.get(header.get("kid"))
+        if secret is None:
+            raise InvalidServiceTokenError(
+                InvalidServiceTokenError.UNKNOWN_KEY
+            )
+
+        signing_input, _, encoded_signature = token.rpartition(".")
+        try:
+            signature = base64url_decode(encoded_signature.encode("ascii"))
+        except (ValueError, UnicodeEncodeError):
+            raise InvalidServiceTokenError(InvalidServiceTokenError.MALFORMED)
+
+        expected_signature = _sign(secret, signing_input.encode("ascii"))
+        if not hmac.compare_digest(signature, expected_signature):
+            raise InvalidServiceTokenError(
+                InvalidServiceTokenError.INVALID_SIGNATURE
+            )
+
+        encoded_payload = signing_input.split(".")[1]
+        try:
+            payload = json.loads(
+                base64url_decode(encoded_payload.encode("ascii"))
+            )
+        except ValueError:
+            raise InvalidServiceTokenError(InvalidServiceTokenError.MALFORMED)
+
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            raise InvalidServiceTokenError(
+                InvalidServiceTokenError.INVALID_CLAIMS
+            )
+        if expires_at < time.time():
+            raise InvalidServiceTokenError(InvalidServiceTokenError.EXPIRED)
+
+        audience = payload.get("aud")
+        audiences = audience if isinstance(audience, list) else [audience]
+        if (
+            payload.get("iss") != self._issuer
+            or self._audience not in audiences
+        ):
+            raise InvalidServiceTokenError(
+                InvalidServiceTokenError.INVALID_CLAIMS
+            )
+
+        return payload
+
+    def mint(
+        self,
+        kid,
+        subject,
+        permissions,
+        expires_in=DEFAULT_SERVICE_TOKEN_LIFETIME_SECONDS,
+    ):
+        """Mints a service token signed with the secret of a key id.
+
+        Args:
+        - kid (str): The key id of the secret to sign with.
+        - subject (str): The `sub` claim, naming the calling service.
+        - permissions (list): The `permissions` claim.
+        - expires_in (int, optional): Lifetime of the token in seconds.
+
+        Returns:
+        - (str) The signed JWT token.
+        """
+        now = int(time.time())
+        header = {"alg": SERVICE_TOKEN_ALGORITHM, "typ": "JWT", "kid": kid}
+        payload = {
+            "iss": self._issuer,
+            "aud": self._audience,
+            "sub": subject,
+            "permissions": list(permissions),
+            "iat": now,
+            "exp": now + expires_in,
+        }
+        signing_input = b".".join(
+            base64url_encode(json.dumps(part).encode("utf-8"))
+            for part in (header, payload)
+        )
+        signature = base64url_encode(
+            _sign(self._secrets_by_kid[kid], signing_input)
+        )
+        return (signing_input + b"." + signature).decode("ascii")
+
+
+"""
+Command line interface, registered with the Flask CLI:
+
+    flask service-token mint --kid batch-2025 --subject batch-importer \\
+        --permission get:movie
+"""
+
+
+@click.group("service-token")
+def service_token_cli():
+    """Internal service tokens."""
+
+
+@service_token_cli.command("mint")
+@click.option("--kid", required=True)
+@click.option("--subject", required=True)
+@click.option("--permission", "permissions", multiple=True)
+@click.option(
+    "--expires-in",
+    default=DEFAULT_SERVICE_TOKEN_LIFETIME_SECONDS,
+    show_default=True,
+    type=int,
+)
+def mint_service_token_command(kid, subject, permissions, expires_in):
+    """Mints a service token with a configured secret."""
+    from .auth import get_service_token_verifier
+
+    verifier = get_service_token_verifier()
+    if verifier is None:
+        raise click.ClickException(
+            "No service token secrets configured "
+            "(AUTH_SERVICE_TOKEN_SECRETS)."
+        )
+    try:
+        token = verifier.mint(kid, subject, permissions, expires_in)
+    except KeyError:
+        raise click.ClickException(f"No secret configured for kid {kid}.")
+    click.echo(token)
@@ -0,0 +1,174 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import time
+
+from .jwks import MIN_JWKS_TTL_SECONDS, MAX_JWKS_TTL_SECONDS
+
+"""
+A module to share the fetched JSON Web Key Set (JWKS) between
+the worker processes of a host.
+
+The key set is kept in a file in a runtime directory. Workers
+read it memory-mapped; a new key set replaces the file
+atomically. Only the worker holding an exclusive lock on a lock
+file next to it fetches from the identity provider; all other
+workers use the key set it wrote.
+"""
+
+"""
+How often a worker waiting for another worker to fetch the key
+set checks whether the new key set has been written.
+"""
+SHARED_JWKS_POLL_INTERVAL_SECONDS = 0.05
+
+
+class SharedJwksFile:
+    """A key set fetcher sharing its results through a file.
+
+    Instances are used as `fetch` function of a `JwksKeyStore`:
+    calling one returns a key set and its time to live, like
+    `app.jwks.fetch_jwks`.
+
+    A call returns the key set from the shared file if it was
+    written after the last key set this process has seen and is
+    still fresh. Otherwise the caller has to fetch a new key set:
+    the process that gets the lock fetches it with `fetch` and
+    writes it to the file; other processes wait for the new file
+    (up to `wait_timeout` seconds) and use it.
+
+    The time to live of a fetched key set is limited to `min_ttl` to
+    `max_ttl` once, when it is written. Calls return the time left
+    until the shared key set expires, which may be shorter than
+    `min_ttl`: the key store using it must not raise it (`min_ttl=0`),
+    so no worker keeps a key set after it expired in the file.
+    """
+
+    def __init__(
+        self,
+        directory,
+        jwks_url,
+        fetch,
+        default_ttl,
+        wait_timeout,
+        min_ttl=MIN_JWKS_TTL_SECONDS,
+        max_ttl=MAX_JWKS_TTL_SECONDS,
+        clock=time.time,
+    ):
+        name = hashlib.sha256(jwks_url.encode("utf-8")).hexdigest()[:16]
+        os.makedirs(directory, exist_ok=True)
+
+        self._path = os.path.join(directory, f"jwks-{name}.json")
+        self._lock_path = os.path.join(directory, f"jwks-{name}.lock")
+        self._fetch = fetch
+        self._default_ttl = default_ttl
+        self._wait_timeout = wait_timeout
+        self._min_ttl = min_ttl
+        self._max_ttl = max_ttl
+        self._clock = clock
+        self._last_seen_fetched_at = 0.0
+
+    def get_path(self):
+        return self._path
+
+    def __call__(self, jwks_url):
+        entry = self._read_new_entry()
+        if entry is not None:
+            return self._use(entry)
+
+        lock_file = open(self._lock_path, "a+")
+        try:
+            deadline = self._clock() + self._wait_timeout
+            while not self._try_lock(lock_file):
+                entry = self._read_new_entry()
+                if entry is not None:
+                    return self._use(entry)
+                if self._clock() >= deadline:
+                    raise TimeoutError(
+                        "Timed out waiting for another worker "
+                        "to fetch the key set."
+                    )
+                time.sleep(SHARED_JWKS_POLL_INTERVAL_SECONDS)
+
+            # Elected to fetch: another worker may have written
+            # the key set just before we got the lock.
+            entry = self._read_new_entry()
+            if entry is not None:
+                return self._use(entry)
+
+            jwks, max_age = self._fetch(jwks_url)
+            if max_age is None:
+                max_age = self._default_ttl
+            entry = {
+                "jwks": jwks,
+                "max_age": min(max(max_age, self._min_ttl), self._max_ttl),
+                "fetched_at": self._clock(),
+            }
+            self._write(entry)
+            return self._use(entry)
+        finally:
+            # Closing the file releases the lock
+            lock_file.close()
+
+    def _use(self, entry):
+        self._last_seen_fetched_at = entry["fetched_at"]
+        return entry["jwks"], self._remaining_ttl(entry)
+
+    def _remaining_ttl(self, entry):
+        ttl = entry["max_age"]
+        if ttl is None:
+            ttl = self._default_ttl
+        age = self._clock() - entry["fetched_at"]
+        return max(int(ttl - age), 0)
+
+    def _read_new_entry(self):
+        entry = self._read()
+        if entry is None:
+            return None
+        if entry["fetched_at"] <= self._last_seen_fetched_at:
+            return None
+        if self._remaining_ttl(entry) <= 0:
+            return None
+        return entry
+
+    def _read(self):
+        try:
+            with open(self._path, "rb") as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    return None
+                with mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                ) as content:
+                    return json.loads(content[:])
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            print(f"Ignoring unreadable shared key set {self._path}: {e}")
+            return None
+
+    def _write(self, entry):
+        directory = os.path.dirname(self._path)
+        fd, temporary_path = tempfile.mkstemp(
+            dir=directory, prefix=".jwks-", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(json.dumps(entry).encode("utf-8"))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary_path, self._path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    @staticmethod
+    def _try_lock(lock_file):
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
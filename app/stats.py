@@ -0,0 +1,377 @@
+import threading
+from array import array
+from bisect import bisect_left, insort
+from calendar import isleap
+from collections import Counter
+from datetime import MAXYEAR, MINYEAR, date
+
+from sqlalchemy import func
+
+from .indexing import InMemoryIndex
+from .models import db, Movie, Actor, Role
+
+
+"""
+A module for statistics of the catalog, served from an in-memory
+columnar snapshot of the movie, actor and role tables.
+
+Each table is stored column by column, in arrays of integers: dates as
+day numbers (`date.toordinal()`), and the roles as their number per
+movie, total and open (without actor). Rows are kept dense, so a
+statistic is computed over whole arrays with functions implemented in
+C (`sum()`, `array.count()`, `Counter()`), instead of a Python loop
+per row. The date columns are also kept sorted, so the rows in a
+range of dates (e.g. the movies of a year) are counted with two binary
+searches.
+"""
+
+DEFAULT_AGE_GROUP_YEARS = 10
+
+_ROLES = func.count(Role.id)
+_OPEN_ROLES = func.count(Role.id).filter(Role.actor_id.is_(None))
+
+
+class SortedColumn:
+    """The values of a column in sorted order."""
+
+    def __init__(self, values=()):
+        self._values = array("l", sorted(values))
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, value):
+        insort(self._values, value)
+
+    def remove(self, value):
+        del self._values[bisect_left(self._values, value)]
+
+    def first(self):
+        return self._values[0]
+
+    def last(self):
+        return self._values[-1]
+
+    def count_between(self, low, high):
+        """Counts the values from low (inclusive) to high (exclusive)."""
+        return bisect_left(self._values, high) - bisect_left(self._values, low)
+
+
+class Table:
+    """Rows of integer columns by id, stored column by column.
+
+    Rows are kept dense: a deleted row is replaced by the last row, so
+    a column can be aggregated as a whole.
+
+    Args:
+    - column_names (tuple): The names of the columns.
+    """
+
+    def __init__(self, column_names):
+        self._ordinals = {}
+        self._ids = []
+        self.columns = {name: array("l") for name in column_names}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get(self, id, column_name):
+        """Returns the value of a column of a row, or None."""
+        ordinal = self._ordinals.get(id)
+        if ordinal is None:
+            return None
+        return self.columns[column_name][ordinal]
+
+    def put(self, id, **values):
+        """Adds a row, or updates the given columns of a row. Columns
+        of added rows not given are 0."""
+        ordinal = self._ordinals.get(id)
+        if ordinal is None:
+            self._ordinals[id] = len(self._ids)
+            self._ids.append(id)
+            for name, column in self.columns.items():
+                column.append(values.get(name, 0))
+        else:
+            for name, value in values.items():
+                self.columns[name][ordinal] = value
+
+    def remove(self, id):
+        """Removes a row, if stored."""
+        ordinal = self._ordinals.pop(id, None)
+        if ordinal is None:
+            return
+
+        # Move the last row into the place of the removed row
+        last_id = self._ids.pop()
+        for column in self.columns.values():
+            last_value = column.pop()
+            if last_id != id:
+                column[ordinal] = last_value
+        if last_id != id:
+            self._ids[ordinal] = last_id
+            self._ordinals[last_id] = ordinal
+
+
+def _get_first_day_of_year(year):
+    if year > MAXYEAR:
+        return date.max.toordinal() + 1
+    return date(year, 1, 1).toordinal()
+
+
+def _get_last_birth_day(today, age):
+    """Returns the last day of birth of people being at least an age
+    today, as day number."""
+    year = today.year - age
+    if year < MINYEAR:
+        return 0
+    # On February 29, people born up to February 28 of years without
+    # February 29 have had their birthday
+    if (today.month, today.day) == (2, 29) and not isleap(year):
+        return date(year, 2, 28).toordinal()
+    return date(year, today.month, today.day).toordinal()
+
+
+class StatsSnapshot:
+    """Columnar snapshot of movies, actors and their roles.
+
+    Args:
+    - movies (iterable, optional): (id, release date, number of roles,
+      number of open roles) tuples.
+    - actors (iterable, optional): (id, birth date) tuples.
+    """
+
+    def __init__(self, movies=(), actors=()):
+        self._movies = Table(("release_day", "roles", "open_roles"))
+        for id, release_date, roles, open_roles in movies:
+            self._movies.put(
+                id,
+                release_day=release_date.toordinal(),
+                roles=roles,
+                open_roles=open_roles,
+            )
+        self._release_days = SortedColumn(
+            self._movies.columns["release_day"]
+        )
+
+        self._actors = Table(("birth_day",))
+        for id, birth_date in actors:
+            self._actors.put(id, birth_day=birth_date.toordinal())
+        self._birth_days = SortedColumn(self._actors.columns["birth_day"])
+
+    def put_movie(self, id, release_date):
+        """Adds or updates a movie, keeping its roles."""
+        previous_release_day = self._movies.get(id, "release_day")
+        if previous_release_day is not None:
+            self._release_days.remove(previous_release_day)
+        self._movies.put(id, release_day=release_date.toordinal())
+        self._release_days.add(release_date.toordinal())
+
+    def remove_movie(self, id):
+        """Removes a movie with its roles, if stored."""
+        release_day = self._movies.get(id, "release_day")
+        if release_day is not None:
+            self._release_days.remove(release_day)
+            self._movies.remove(id)
+
+    def set_roles(self, movie_id, roles, open_roles):
+        """Sets the number of roles of a movie, if stored."""
+        if self._movies.get(movie_id, "roles") is not None:
+            self._movies.put(movie_id, roles=roles, open_roles=open_roles)
+
+    def put_actor(self, id, birth_date):
+        """Adds or updates an actor."""
+        previous_birth_day = self._actors.get(id, "birth_day")
+        if previous_birth_day is not None:
+            self._birth_days.remove(previous_birth_day)
+        self._actors.put(id, birth_day=birth_date.toordinal())
+        self._birth_days.add(birth_date.toordinal())
+
+    def remove_actor(self, id):
+        """Removes an actor, if stored."""
+        birth_day = self._actors.get(id, "birth_day")
+        if birth_day is not None:
+            self._birth_days.remove(birth_day)
+            self._actors.remove(id)
+
+    def get_totals(self):
+        """Returns the numbers of movies, actors, roles and open
+        roles."""
+        return {
+            "movies": len(self._movies),
+            "actors": len(self._actors),
+            "roles": sum(self._movies.columns["roles"]),
+            "open_roles": sum(self._movies.columns["open_roles"]),
+        }
+
+    def count_movies_per_year(self):
+        """Returns (year, number of movies) tuples of the years with
+        movies, ordered by year."""
+        release_days = self._release_days
+        if not release_days:
+            return []
+
+        first_year = date.fromordinal(release_days.first()).year
+        last_year = date.fromordinal(release_days.last()).year
+        movies_per_year = []
+        for year in range(first_year, last_year + 1):
+            movies = release_days.count_between(
+                _get_first_day_of_year(year),
+                _get_first_day_of_year(year + 1),
+            )
+            if movies:
+                movies_per_year.append((year, movies))
+        return movies_per_year
+
+    def count_actors_per_age_group(
+        self, today, group_years=DEFAULT_AGE_GROUP_YEARS
+    ):
+        """Returns the number of actors per age group.
+
+        Args:
+        - today (date): The day to compute the ages of actors on.
+        - group_years (int, optional): The number of ages per group,
+          e.g. 10 for groups 0-9, 10-19 etc.
+
+        Returns:
+        - (list) (minimum age, number of actors) tuples of the groups
+          with actors, ordered by age.
+        """
+        birth_days = self._birth_days
+        actors_per_age_group = []
+        min_age = 0
+        while birth_days and (
+            _get_last_birth_day(today, min_age) >= birth_days.first()
+        ):
+            # The actors of the group are born after the last birth day
+            # of the next group, up to the last birth day of the group
+            actors = birth_days.count_between(
+                _get_last_birth_day(today, min_age + group_years) + 1,
+                _get_last_birth_day(today, min_age) + 1,
+            )
+            if actors:
+                actors_per_age_group.append((min_age, actors))
+            min_age += group_years
+        return actors_per_age_group
+
+    def count_movies_per_number_of_roles(self):
+        """Returns (number of roles, number of movies) tuples, ordered
+        by the number of roles."""
+        return sorted(Counter(self._movies.columns["roles"]).items())
+
+    def get_cast_coverage(self):
+        """Returns how many movies and roles are cast."""
+        roles = sum(self._movies.columns["roles"])
+        open_roles = sum(self._movies.columns["open_roles"])
+        movies_without_roles = self._movies.columns["roles"].count(0)
+        return {
+            "movies": len(self._movies),
+            "movies_without_roles": movies_without_roles,
+            "fully_cast_movies": (
+                self._movies.columns["open_roles"].count(0)
+                - movies_without_roles
+            ),
+            "roles": roles,
+            "cast_roles": roles - open_roles,
+            "open_roles": open_roles,
+            "cast_coverage": (
+                (roles - open_roles) / roles if roles else None
+            ),
+        }
+
+
+def load_role_counts(movie_id):
+    """Loads the number of roles and open roles of a movie."""
+    return db.session.execute(
+        db.select(_ROLES, _OPEN_ROLES).where(Role.movie_id == movie_id)
+    ).one()
+
+
+class StatsIndex(InMemoryIndex):
+    """In-memory columnar snapshot for the statistics of the catalog.
+
+    The write handlers keep it current with `put_movie()`,
+    `delete_movie()`, `put_actor()`, `delete_actor()` and
+    `refresh_roles()`.
+    """
+
+    def __init__(self, app, **kwargs):
+        super().__init__(app, **kwargs)
+        self._refresh_lock = threading.Lock()
+
+    def load(self):
+        movies = db.session.execute(
+            db.select(Movie.id, Movie.release_date, _ROLES, _OPEN_ROLES)
+            .outerjoin(Role, Role.movie_id == Movie.id)
+            .group_by(Movie.id)
+            .execution_options(yield_per=10000)
+        )
+        actors = db.session.execute(
+            db.select(Actor.id, Actor.birth_date).execution_options(
+                yield_per=10000
+            )
+        )
+        return StatsSnapshot(movies, actors)
+
+    def get_totals(self):
+        """See `StatsSnapshot.get_totals()`."""
+        snapshot = self.get_data()
+        with self._lock:
+            return snapshot.get_totals()
+
+    def count_movies_per_year(self):
+        """See `StatsSnapshot.count_movies_per_year()`."""
+        snapshot = self.get_data()
+        with self._lock:
+            return snapshot.count_movies_per_year()
+
+    def count_actors_per_age_group(
+        self, today, group_years=DEFAULT_AGE_GROUP_YEARS
+    ):
+        """See `StatsSnapshot.count_actors_per_age_group()`."""
+        snapshot = self.get_data()
+        with self._lock:
+            return snapshot.count_actors_per_age_group(today, group_years)
+
+    def count_movies_per_number_of_roles(self):
+        """See `StatsSnapshot.count_movies_per_number_of_roles()`."""
+        snapshot = self.get_data()
+        with self._lock:
+            return snapshot.count_movies_per_number_of_roles()
+
+    def get_cast_coverage(self):
+        """See `StatsSnapshot.get_cast_coverage()`."""
+        snapshot = self.get_data()
+        with self._lock:
+            return snapshot.get_cast_coverage()
+
+    def put_movie(self, id, release_date):
+        """Adds or updates a created or updated movie."""
+        self.update(lambda snapshot: snapshot.put_movie(id, release_date))
+
+    def delete_movie(self, id):
+        """Removes a deleted movie with its roles."""
+        self.update(lambda snapshot: snapshot.remove_movie(id))
+
+    def put_actor(self, id, birth_date):
+        """Adds or updates a created or updated actor."""
+        self.update(lambda snapshot: snapshot.put_actor(id, birth_date))
+
+    def delete_actor(self, id):
+        """Removes a deleted actor."""
+        self.update(lambda snapshot: snapshot.remove_actor(id))
+
+    def refresh_roles(self, movie_id):
+        """Sets the number of roles of a movie from the database, after
+        its roles changed.
+
+        Like `CastGraphIndex.refresh_cast()`, refreshes load and set the
+        numbers one at a time, so numbers loaded before a concurrent
+        write cannot be set after the numbers loaded after the write.
+        """
+        with self._refresh_lock:
+            roles, open_roles = load_role_counts(movie_id)
+            self.update(
+                lambda snapshot: snapshot.set_roles(
+                    movie_id, roles, open_roles
+                )
+            )
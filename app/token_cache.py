@@ -0,0 +1,100 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+"""
+A module to cache the outcome of verifying authorization tokens.
+
+Clients send the same bearer token with many requests. Caching
+the result of the verification avoids parsing the token and
+checking its signature again for each of those requests.
+Likewise, caching recent rejections turns away clients that
+repeat an invalid token without verifying it again.
+"""
+
+DEFAULT_TOKEN_CACHE_SIZE = 4096
+DEFAULT_REJECTED_TOKEN_CACHE_SIZE = 1024
+
+
+def token_digest(token):
+    """Returns a digest of a raw token, used as cache key.
+
+    The raw token is never kept as a key, so a memory dump of
+    the cache does not leak usable credentials.
+    """
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class TokenCache:
+    """A bounded, thread-safe LRU cache of token verification outcomes.
+
+    Each entry expires at a given timestamp, e.g. the expiration
+    timestamp of its token. When the cache is full, the least recently
+    used entry is evicted.
+    """
+
+    def __init__(self, max_size=DEFAULT_TOKEN_CACHE_SIZE, clock=time.time):
+        self._max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, token):
+        """Returns the cached value for a raw token, or None.
+
+        Args:
+        - token (str): The raw token.
+        """
+        key = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            value, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, token, value, expires_at):
+        """Caches a value for a raw token.
+
+        Args:
+        - token (str): The raw token.
+        - value: The outcome of the verification, e.g. the verified token.
+        - expires_at (float): POSIX timestamp when the entry expires.
+        """
+        if self._max_size <= 0 or self._clock() >= expires_at:
+            return
+
+        key = token_digest(token)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes all entries. Hit and miss counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_statistics(self):
+        """Returns the hit and miss counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._entries),
+                "max_size": self._max_size,
+            }
@@ -0,0 +1,44 @@
+"""Partial index for open roles.
+
+- ix_role_open_character_id: GET /roles/open (WHERE actor_id IS NULL
+  ORDER BY character, id), including keyset pagination. Only roles
+  without an actor are indexed, so the index stays small when they
+  are a tiny fraction of all roles. It includes movie_id, i.e. the
+  page is read by an index-only scan, joined with the titles of the
+  movies by their primary key.
+
+The index is created concurrently, so that writes to an existing
+(large) role table are not blocked while it is built.
+
+Revision ID: 2a0d89eea5ce
+Revises: c84272be3380
+Create Date: 2026-10-16 23:05:39.571000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a0d89eea5ce'
+down_revision = 'c84272be3380'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_role_open_character_id', 'role', ['character', 'id'],
+            unique=False, postgresql_include=['movie_id'],
+            postgresql_where=sa.text('actor_id IS NULL'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_role_open_character_id', table_name='role',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,87 @@
+"""Indexes for list and filter queries.
+
+Each index serves the filter and order of a list endpoint, so the
+first page is read from the index instead of sorting the table:
+
+- ix_movie_title_id: GET /movies (ORDER BY title, id), including
+  keyset pagination with (title, id) > (:title, :id).
+- ix_actor_name_id: GET /actors (ORDER BY name, id), likewise.
+- ix_role_movie_id_character_id: GET /movies/<id>/roles
+  (WHERE movie_id = :id ORDER BY character, id). It includes
+  actor_id, i.e. all columns of roles, so the page is served by an
+  index-only scan (the count uses the index of the unique constraint
+  on (movie_id, character)). It supersedes ix_role_movie_id for the
+  cascading deletes of movies.
+- ix_role_actor_id_character_id: GET /actors/<id>/roles
+  (WHERE actor_id = :id ORDER BY character, id) and its count, with
+  index-only scans as it includes movie_id. It also serves the
+  RESTRICT check of the foreign key when deleting actors, which
+  scanned the whole table before.
+
+The indexes are created concurrently, so that writes to existing
+(large) tables are not blocked while they are built.
+
+Revision ID: 6a0394847259
+Revises: e7f8bea7030c
+Create Date: 2026-10-16 22:43:21.426468
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a0394847259'
+down_revision = 'e7f8bea7030c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_actor_name_id', 'actor', ['name', 'id'], unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_movie_title_id', 'movie', ['title', 'id'], unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_role_actor_id_character_id', 'role',
+            ['actor_id', 'character', 'id'], unique=False,
+            postgresql_include=['movie_id'], postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_role_movie_id_character_id', 'role',
+            ['movie_id', 'character', 'id'], unique=False,
+            postgresql_include=['actor_id'], postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_role_movie_id', table_name='role',
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_role_movie_id', 'role', ['movie_id'], unique=False,
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_role_movie_id_character_id', table_name='role',
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_role_actor_id_character_id', table_name='role',
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_movie_title_id', table_name='movie',
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_actor_name_id', table_name='actor',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,76 @@
+"""Indexes for sort orders and filters of lists.
+
+Each sort order of GET /movies and GET /actors is served by an index
+on the sort column and the id, scanned forwards or backwards. The
+filters are on the sort column only, so they are ranges of the same
+index:
+
+- ix_movie_release_date_id: sort=release_date (or -release_date),
+  with release_date_from / release_date_to.
+- ix_actor_birth_date_id: sort=birth_date (or -birth_date), with
+  birth_date_from / birth_date_to.
+- ix_movie_title_pattern / ix_actor_name_pattern: title_prefix and
+  name_prefix (LIKE 'prefix%'). With a collation other than "C",
+  ix_movie_title_id and ix_actor_name_id cannot serve LIKE, so the
+  prefix is looked up in these indexes with the varchar_pattern_ops
+  operator class, and only the matching rows are sorted.
+
+The indexes are created concurrently, so that writes to existing
+(large) tables are not blocked while they are built.
+
+Revision ID: c84272be3380
+Revises: 6a0394847259
+Create Date: 2026-10-16 23:04:30.811000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c84272be3380'
+down_revision = '6a0394847259'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_movie_release_date_id', 'movie', ['release_date', 'id'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_actor_birth_date_id', 'actor', ['birth_date', 'id'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_movie_title_pattern', 'movie', ['title'], unique=False,
+            postgresql_ops={'title': 'varchar_pattern_ops'},
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_actor_name_pattern', 'actor', ['name'], unique=False,
+            postgresql_ops={'name': 'varchar_pattern_ops'},
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_actor_name_pattern', table_name='actor',
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_movie_title_pattern', table_name='movie',
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_actor_birth_date_id', table_name='actor',
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_movie_release_date_id', table_name='movie',
+            postgresql_concurrently=True
+        )
@@ -2,3 +2,17 @@ from .api.movies import *
 from .api.actors import *
 from .api.roles import *
 from .api.auth import *
+from .api.service_tokens import *
+from .auth.jwks import *
+from .auth.token_cache import *
+from .auth.tokens import *
+from .auth.shared_jwks import *
+from .auth.local_idp import *
+from .api.search import *
+from .indexes.search import *
+from .api.autocomplete import *
+from .indexes.autocomplete import *
+from .api.cast_graph import *
+from .indexes.cast_graph import *
+from .api.stats import *
+from .indexes.stats import *
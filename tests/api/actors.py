@@ -54,10 +54,132 @@ class ActorEndpointTestCase(FlaskApiTestCase):
         # THEN
         self.check_is_json_error_response_with_error_code(response, 404)
 
+    def test_get_actors_with_cursor_walks_all_pages(self):
+        """Test GET all on resource `actors` with keyset pagination."""
+        # GIVEN
+        elements_per_page = 2
+
+        # WHEN
+        first_response = self.client.get(
+            f"/api/v1/actors?cursor=&per_page={elements_per_page}"
+        )
+        next_cursor = first_response.json["next_cursor"]
+        second_response = self.client.get(
+            f"/api/v1/actors?cursor={next_cursor}"
+            f"&per_page={elements_per_page}"
+        )
+
+        # THEN
+        self.check_is_json_and_status_is_ok(first_response)
+        self.check_is_json_and_status_is_ok(second_response)
+
+        names = [
+            actor["name"]
+            for response in (first_response, second_response)
+            for actor in response.json["actors"]
+        ]
+        self.assertEqual(
+            names, ["Diane Keaton", "Keira Knightley", "Woody Allen"]
+        )
+        self.assertIsNone(second_response.json["next_cursor"])
+
+    def test_get_actors_with_expanded_roles_and_movies(self):
+        """Test GET all on resource `actors` with expanded roles."""
+        # WHEN
+        response = self.client.get("/api/v1/actors?expand=roles.movie")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+
+        actors = {actor["name"]: actor for actor in response.json["actors"]}
+        self.assertEqual(
+            [
+                (role["character"], role["movie"]["title"])
+                for role in actors["Diane Keaton"]["roles"]
+            ],
+            [("Annie Hall", "Annie Hall"), ("Louise Bryant", "Reds")],
+        )
+        self.assertEqual(actors["Keira Knightley"]["roles"], [])
+
+    def test_get_actors_by_ids_in_request_body(self):
+        """Test POST on `actors/multi-get` with a list of ids."""
+        # GIVEN
+        with self.app.app_context():
+            actor = db.session.merge(self.actor_woody_allen)
+            request_body = {"ids": ["NOT_EXISTING_ID", actor.id]}
+
+            # WHEN
+            response = self.client.post(
+                "/api/v1/actors/multi-get", json=request_body
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(response.json["actors"], [actor.format()])
+            self.assertEqual(response.json["missing_ids"], ["NOT_EXISTING_ID"])
+
+    def test_get_actors_by_ids_without_valid_ids(self):
+        """Test POST on `actors/multi-get` without a list of ids."""
+        # WHEN
+        response = self.client.post(
+            "/api/v1/actors/multi-get", json={"ids": "NOT_A_LIST"}
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_get_actors_by_ids_with_list_body(self):
+        """Test POST on `actors/multi-get` with a list instead of an
+        object."""
+        # WHEN
+        response = self.client.post(
+            "/api/v1/actors/multi-get", json=["ID_1", "ID_2"]
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
     """
     Endpoint: GET /actors/<movie_id>
     """
 
+    def test_get_actors_born_after_a_date_sorted_by_birth_date(self):
+        """Test GET all on resource `actors` born after a date."""
+        # WHEN
+        response = self.client.get(
+            "/api/v1/actors?sort=-birth_date&birth_date_from=1940-01-01"
+        )
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        names = [actor["name"] for actor in response.json["actors"]]
+        self.assertEqual(names, ["Keira Knightley", "Diane Keaton"])
+
+    def test_get_actors_filtered_by_name_prefix(self):
+        """Test GET all on resource `actors` with a name prefix."""
+        # WHEN
+        response = self.client.get(
+            "/api/v1/actors?sort=-name&name_prefix=Di"
+        )
+        escaped_response = self.client.get("/api/v1/actors?name_prefix=%25")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        names = [actor["name"] for actor in response.json["actors"]]
+        self.assertEqual(names, ["Diane Keaton"])
+        self.assertEqual(escaped_response.json["actors"], [])
+
+    def test_get_actors_with_filter_on_other_column_than_sort(self):
+        """Test GET all on resource `actors` with a filter not served
+        by the index of the sort order."""
+        # WHEN
+        response = self.client.get(
+            "/api/v1/actors?sort=birth_date&name_prefix=Di"
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
     def test_get_actor_when_actor_exists(self):
         """Test GET by id on resource `actors` with valid id."""
         # GIVEN
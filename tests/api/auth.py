@@ -1,3 +1,4 @@
+import os
 import unittest
 import requests
 
@@ -6,18 +7,36 @@ from app.auth import (
     AUTH0_CLIENT_ID,
     AUTH0_CLIENT_SECRET,
     AUTH0_AUDIENCE,
+    AUTH0_ISSUER,
+    get_jwks_key_store,
+    set_auth_metrics_sink,
+    use_local_identity_provider,
 )
+from app.auth_metrics import AuthMetricsSink, HistogramAuthMetricsSink
+from app.local_idp import LocalIdentityProvider
 from .common import FlaskApiTestCase
 
+"""
+By default, the tests use a local identity provider and run
+without network access. Set AUTH_TESTS_USE_AUTH0=true to get
+tokens for the test users from the Auth0 tenant instead.
+"""
+AUTH_TESTS_USE_AUTH0 = (
+    os.environ.get("AUTH_TESTS_USE_AUTH0", "False").lower() == "true"
+)
+
+LOCAL_IDENTITY_PROVIDER = LocalIdentityProvider(AUTH0_ISSUER, AUTH0_AUDIENCE)
+
 """
 Some predefined users for testing.
 """
 
 
 class User:
-    def __init__(self, username, password):
+    def __init__(self, username, password, permissions=()):
         self.username = username
         self.password = password
+        self.permissions = list(permissions)
         self._cached_access_token = None
 
     def __repr__(self):
@@ -43,16 +62,37 @@ class User:
 UNAUTHENTICATED_USER = User(username=None, password=None)
 
 CASTING_ASSISTANT = User(
-    username="casting.assistant@test.com", password="l$ksdf92q3wkmm&qlasdfuq23"
+    username="casting.assistant@test.com",
+    password="l$ksdf92q3wkmm&qlasdfuq23",
+    permissions=["get:actor", "get:movie"],
 )
 
 CASTING_DIRECTOR = User(
-    username="casting.director@test.com", password="?w3qrnwerf7843w2rkl98wef,"
+    username="casting.director@test.com",
+    password="?w3qrnwerf7843w2rkl98wef,",
+    permissions=[
+        "get:actor",
+        "get:movie",
+        "add:actor",
+        "delete:actor",
+        "modify:actor",
+        "modify:movie",
+    ],
 )
 
 EXECUTIVE_PRODUCER = User(
     username="executive.producer@test.com",
     password="9821m3i9k03kle2j430.,23io3as",
+    permissions=[
+        "get:actor",
+        "get:movie",
+        "add:actor",
+        "delete:actor",
+        "modify:actor",
+        "modify:movie",
+        "add:movie",
+        "delete:movie",
+    ],
 )
 
 
@@ -63,6 +103,18 @@ the test users.
 
 
 def get_access_token_for_user(user: User):
+    """
+    Retrieves an access token for a given user, from the local
+    identity provider or from Auth0.
+    """
+    if not AUTH_TESTS_USE_AUTH0:
+        return LOCAL_IDENTITY_PROVIDER.mint_token(
+            f"local|{user.username}", user.permissions
+        )
+    return get_auth0_access_token_for_user(user)
+
+
+def get_auth0_access_token_for_user(user: User):
     """
     Retrieves an access token from Auth0 for a given user.
 
@@ -109,6 +161,11 @@ class AuthTestCase(FlaskApiTestCase):
     def auth_checks_required_for_testcase(self):
         return True
 
+    def setUp(self):
+        super().setUp()
+        if not AUTH_TESTS_USE_AUTH0:
+            use_local_identity_provider(LOCAL_IDENTITY_PROVIDER)
+
     """
     Write at least two test for each role, one success case
     and one failure case.
@@ -186,6 +243,82 @@ class AuthTestCase(FlaskApiTestCase):
         # THEN
         self.check_is_json_error_response_with_error_code(response, 401)
 
+    """
+    Endpoint: GET /movies, requiring permission get:movie
+    when the token of the user is expired or not trusted.
+    """
+
+    @unittest.skipIf(AUTH_TESTS_USE_AUTH0, "Requires local identity provider")
+    def test_user_with_expired_token_cannot_get_movies(self):
+        """Test that an expired token is rejected."""
+        # GIVEN
+        access_token = LOCAL_IDENTITY_PROVIDER.mint_token(
+            "local|expired", ["get:movie"], expires_in=-60
+        )
+
+        # WHEN
+        response = self.client.get(
+            "/api/v1/movies",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 401)
+
+    @unittest.skipIf(AUTH_TESTS_USE_AUTH0, "Requires local identity provider")
+    def test_user_with_untrusted_token_cannot_get_movies(self):
+        """Test that a token signed with an unknown key is rejected."""
+        # GIVEN
+        untrusted_identity_provider = LocalIdentityProvider(
+            AUTH0_ISSUER, AUTH0_AUDIENCE
+        )
+        access_token = untrusted_identity_provider.mint_token(
+            "local|untrusted", ["get:movie"]
+        )
+
+        # WHEN
+        response = self.client.get(
+            "/api/v1/movies",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    @unittest.skipIf(AUTH_TESTS_USE_AUTH0, "Requires local identity provider")
+    def test_token_of_rotated_key_is_accepted_after_key_set_refresh(self):
+        """Test that a token signed with a new key is not rejected from
+        the cache once the key set has the key."""
+        # GIVEN
+        new_identity_provider = LocalIdentityProvider(
+            AUTH0_ISSUER, AUTH0_AUDIENCE, kid="rotated-key"
+        )
+        jwks = LOCAL_IDENTITY_PROVIDER.get_jwks()
+
+        class RotatingIdentityProvider:
+            def fetch_jwks(self, jwks_url):
+                return jwks, None
+
+        use_local_identity_provider(RotatingIdentityProvider())
+        access_token = new_identity_provider.mint_token(
+            "local|rotated", ["get:movie"]
+        )
+        headers = {"Authorization": f"Bearer {access_token}"}
+        before_response = self.client.get("/api/v1/movies", headers=headers)
+
+        # WHEN
+        jwks = {
+            "keys": jwks["keys"] + new_identity_provider.get_jwks()["keys"]
+        }
+        get_jwks_key_store().refresh()
+        response = self.client.get("/api/v1/movies", headers=headers)
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(
+            before_response, 400
+        )
+        self.check_is_json_and_status_is_ok(response)
+
     """Role: Casting Assistant"""
 
     """
@@ -403,6 +536,114 @@ class AuthTestCase(FlaskApiTestCase):
         self.check_is_json_and_status_is_ok(response)
 
 
+"""
+Auth Metrics Test Case.
+"""
+
+
+class RecordingAuthMetricsSink(AuthMetricsSink):
+    def __init__(self):
+        self.recorded_metrics = []
+
+    def record(self, metrics):
+        self.recorded_metrics.append(metrics)
+
+
+class AuthMetricsTestCase(FlaskApiTestCase):
+    """This class represents the auth metrics test case"""
+
+    def auth_checks_required_for_testcase(self):
+        return True
+
+    def setUp(self):
+        super().setUp()
+        if not AUTH_TESTS_USE_AUTH0:
+            use_local_identity_provider(LOCAL_IDENTITY_PROVIDER)
+        self.sink = RecordingAuthMetricsSink()
+        set_auth_metrics_sink(self.sink)
+
+    def tearDown(self):
+        set_auth_metrics_sink(None)
+        super().tearDown()
+
+    def get_movies_with_token(self, access_token):
+        return self.client.get(
+            "/api/v1/movies",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+    @unittest.skipIf(AUTH_TESTS_USE_AUTH0, "Requires local identity provider")
+    def test_metrics_of_verified_and_cached_token(self):
+        """Test that stages and outcomes of successful checks are recorded."""
+        # GIVEN
+        access_token = LOCAL_IDENTITY_PROVIDER.mint_token(
+            "local|metrics", ["get:movie"]
+        )
+
+        # WHEN
+        self.get_movies_with_token(access_token)
+        self.get_movies_with_token(access_token)
+
+        # THEN
+        verified, cached = self.sink.recorded_metrics
+        self.assertEqual(verified.outcome, "verified")
+        self.assertTrue(
+            {"header", "cache_lookup", "precheck", "jwks", "decode", "token"}
+            <= set(verified.timings)
+        )
+        self.assertEqual(cached.outcome, "cache_hit")
+        self.assertNotIn("decode", cached.timings)
+
+    @unittest.skipIf(AUTH_TESTS_USE_AUTH0, "Requires local identity provider")
+    def test_metrics_of_failed_checks(self):
+        """Test that outcomes of failed checks are recorded."""
+        # GIVEN
+        expired_token = LOCAL_IDENTITY_PROVIDER.mint_token(
+            "local|metrics", ["get:movie"], expires_in=-60
+        )
+        token_without_permission = LOCAL_IDENTITY_PROVIDER.mint_token(
+            "local|metrics", ["get:actor"]
+        )
+
+        # WHEN
+        self.get_movies_with_token(expired_token)
+        self.get_movies_with_token(token_without_permission)
+
+        # THEN
+        outcomes = [metrics.outcome for metrics in self.sink.recorded_metrics]
+        self.assertEqual(outcomes, ["expired", "forbidden"])
+
+    @unittest.skipIf(AUTH_TESTS_USE_AUTH0, "Requires local identity provider")
+    def test_histograms_are_reported(self):
+        """Test that aggregated histograms are reported for monitoring."""
+        # GIVEN
+        set_auth_metrics_sink(HistogramAuthMetricsSink())
+        access_token = LOCAL_IDENTITY_PROVIDER.mint_token(
+            "local|metrics", ["get:movie"]
+        )
+        self.get_movies_with_token(access_token)
+
+        # WHEN
+        response = self.client.get("/health/auth")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        metrics = response.json["metrics"]
+        self.assertEqual(metrics["outcomes"], {"verified": 1})
+        self.assertEqual(metrics["stages"]["decode"]["count"], 1)
+
+    def test_sink_without_record_cannot_be_created(self):
+        """Test that an incomplete metrics sink fails when created."""
+
+        # GIVEN
+        class IncompleteAuthMetricsSink(AuthMetricsSink):
+            pass
+
+        # WHEN / THEN
+        with self.assertRaises(TypeError):
+            IncompleteAuthMetricsSink()
+
+
 # Make the tests conveniently executable
 if __name__ == "__main__":
     unittest.main()
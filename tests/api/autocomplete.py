@@ -0,0 +1,98 @@
+from app.models import db
+from .common import FlaskApiTestCase
+
+
+class AutocompleteEndpointTestCase(FlaskApiTestCase):
+    """This class represents the autocomplete endpoint test case"""
+
+    """
+    Endpoint: GET /autocomplete
+    """
+
+    def test_autocomplete_movie_titles(self):
+        """Test GET autocomplete with a prefix of movie titles."""
+        # GIVEN
+        with self.app.app_context():
+            movie = db.session.merge(self.movie_the_shawshank_redemption)
+
+            # WHEN
+            response = self.client.get(
+                "/api/v1/autocomplete?type=movie&prefix=the sha"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(
+                response.json["suggestions"],
+                [{"id": movie.id, "title": movie.title}],
+            )
+
+    def test_autocomplete_actor_names(self):
+        """Test GET autocomplete with a prefix of actor names."""
+        # GIVEN
+        with self.app.app_context():
+            actor = db.session.merge(self.actor_diane_keaton)
+
+            # WHEN
+            response = self.client.get(
+                "/api/v1/autocomplete?type=actor&prefix=DI"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(
+                response.json["suggestions"],
+                [{"id": actor.id, "name": actor.name}],
+            )
+
+    def test_autocomplete_is_updated_on_writes(self):
+        """Test GET autocomplete after creating and renaming movies."""
+        # GIVEN
+        with self.app.app_context():
+            movie_id = db.session.merge(self.movie_reds).id
+            self.client.get("/api/v1/autocomplete?type=movie&prefix=r")
+
+            # WHEN
+            created = self.client.post(
+                "/api/v1/movies",
+                json={"title": "Red Sparrow", "release_date": "2018-03-02"},
+            ).json
+            self.client.patch(
+                f"/api/v1/movies/{movie_id}", json={"title": "Warriors"}
+            )
+
+            # THEN
+            response = self.client.get(
+                "/api/v1/autocomplete?type=movie&prefix=re"
+            )
+            self.assertEqual(
+                response.json["suggestions"],
+                [{"id": created["id"], "title": "Red Sparrow"}],
+            )
+
+    def test_autocomplete_with_limit(self):
+        """Test GET autocomplete with a maximum number of suggestions."""
+        # WHEN
+        response = self.client.get(
+            "/api/v1/autocomplete?type=movie&prefix=a&limit=1"
+        )
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        self.assertEqual(len(response.json["suggestions"]), 1)
+
+    def test_autocomplete_without_prefix(self):
+        """Test GET autocomplete with an empty prefix."""
+        # WHEN
+        response = self.client.get("/api/v1/autocomplete?type=actor&prefix=")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_autocomplete_with_unsupported_type(self):
+        """Test GET autocomplete of roles."""
+        # WHEN
+        response = self.client.get("/api/v1/autocomplete?type=role&prefix=a")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
@@ -0,0 +1,243 @@
+import time
+from unittest import mock
+
+from app.models import db
+from .common import FlaskApiTestCase
+
+
+class CastGraphEndpointTestCase(FlaskApiTestCase):
+    """This class represents the co-star graph endpoints test case"""
+
+    """
+    Endpoint: GET /actors/<actor_id>/costars
+    """
+
+    def test_get_costars_of_actor(self):
+        """Test GET co-stars of an actor."""
+        # GIVEN
+        with self.app.app_context():
+            diane_keaton = db.session.merge(self.actor_diane_keaton)
+            woody_allen = db.session.merge(self.actor_woody_allen)
+
+            # WHEN
+            response = self.client.get(
+                f"/api/v1/actors/{diane_keaton.id}/costars"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(response.json["actor"], diane_keaton.format())
+            self.assertEqual(
+                response.json["costars"],
+                [{"actor": woody_allen.format(), "shared_movies": 1}],
+            )
+            self.assertEqual(response.json["total_costars"], 1)
+
+    def test_get_costars_when_actor_does_not_exist(self):
+        """Test GET co-stars of an unknown actor."""
+        # WHEN
+        response = self.client.get("/api/v1/actors/unknown/costars")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 404)
+
+    """
+    Endpoint: GET /actors/<actor_id>/path-to/<other_actor_id>
+    """
+
+    def test_get_path_between_actors(self):
+        """Test GET path between actors with a shared movie."""
+        # GIVEN
+        with self.app.app_context():
+            woody_allen = db.session.merge(self.actor_woody_allen)
+            diane_keaton = db.session.merge(self.actor_diane_keaton)
+            annie_hall = db.session.merge(self.movie_annie_hall)
+
+            # WHEN
+            response = self.client.get(
+                f"/api/v1/actors/{woody_allen.id}"
+                f"/path-to/{diane_keaton.id}"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(
+                response.json,
+                {
+                    "degrees": 1,
+                    "actors": [woody_allen.format(), diane_keaton.format()],
+                    "movies": [annie_hall.format()],
+                },
+            )
+
+    def test_get_path_after_casting_and_uncasting_roles(self):
+        """Test GET path after roles of an actor change."""
+        # GIVEN
+        with self.app.app_context():
+            woody_allen_id = db.session.merge(self.actor_woody_allen).id
+            keira_knightley_id = db.session.merge(
+                self.actor_keira_knightley
+            ).id
+            reds_id = db.session.merge(self.movie_reds).id
+            john_reed_id = db.session.merge(self.role_john_reed).id
+            path_url = (
+                f"/api/v1/actors/{woody_allen_id}"
+                f"/path-to/{keira_knightley_id}"
+            )
+            before_response = self.client.get(path_url)
+
+            # WHEN
+            self.client.patch(
+                f"/api/v1/movies/{reds_id}/roles/{john_reed_id}",
+                json={"actor_id": keira_knightley_id},
+            )
+            cast_response = self.client.get(path_url)
+            self.client.delete(f"/api/v1/movies/{reds_id}")
+            deleted_response = self.client.get(path_url)
+
+            # THEN
+            self.assertIsNone(before_response.json["degrees"])
+            self.check_is_json_and_status_is_ok(cast_response)
+            self.assertEqual(cast_response.json["degrees"], 2)
+            self.assertEqual(
+                [actor["name"] for actor in cast_response.json["actors"]],
+                ["Woody Allen", "Diane Keaton", "Keira Knightley"],
+            )
+            self.assertEqual(
+                [movie["title"] for movie in cast_response.json["movies"]],
+                ["Annie Hall", "Reds"],
+            )
+            self.assertIsNone(deleted_response.json["degrees"])
+
+    def test_cast_role_when_refresh_of_cast_fails(self):
+        """Test PATCH role when the co-star graph cannot be refreshed."""
+        # GIVEN
+        with self.app.app_context():
+            keira_knightley_id = db.session.merge(
+                self.actor_keira_knightley
+            ).id
+            reds_id = db.session.merge(self.movie_reds).id
+            john_reed_id = db.session.merge(self.role_john_reed).id
+            self.client.get(f"/api/v1/movies/{reds_id}/similar")
+
+            # WHEN
+            with mock.patch(
+                "app.cast_graph.load_cast", side_effect=RuntimeError()
+            ), self.assertLogs(self.app.logger, "ERROR"):
+                response = self.client.patch(
+                    f"/api/v1/movies/{reds_id}/roles/{john_reed_id}",
+                    json={"actor_id": keira_knightley_id},
+                )
+            deadline = time.monotonic() + 5
+            while self.client.get("/health/indexes").json["cast_graph"][
+                "rebuilding"
+            ]:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            costars_response = self.client.get(
+                f"/api/v1/actors/{keira_knightley_id}/costars"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(response.json["actor_id"], keira_knightley_id)
+            self.assertEqual(
+                [
+                    costar["actor"]["name"]
+                    for costar in costars_response.json["costars"]
+                ],
+                ["Diane Keaton"],
+            )
+
+    def test_get_path_when_actor_does_not_exist(self):
+        """Test GET path to an unknown actor."""
+        # GIVEN
+        with self.app.app_context():
+            woody_allen = db.session.merge(self.actor_woody_allen)
+
+            # WHEN
+            response = self.client.get(
+                f"/api/v1/actors/{woody_allen.id}/path-to/unknown"
+            )
+
+            # THEN
+            self.check_is_json_error_response_with_error_code(response, 404)
+
+    """
+    Endpoint: GET /movies/<movie_id>/similar
+    """
+
+    def test_get_similar_movies(self):
+        """Test GET movies with similar casts."""
+        # GIVEN
+        with self.app.app_context():
+            reds = db.session.merge(self.movie_reds)
+            annie_hall = db.session.merge(self.movie_annie_hall)
+
+            # WHEN
+            response = self.client.get(f"/api/v1/movies/{reds.id}/similar")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(
+                response.json,
+                {
+                    "movie": reds.format(),
+                    "similar_movies": [
+                        {
+                            "movie": annie_hall.format(),
+                            "similarity": 0.5,
+                            "shared_actors": 1,
+                        }
+                    ],
+                },
+            )
+
+    def test_get_similar_movies_after_casting_role(self):
+        """Test GET similar movies after the cast of a movie changes."""
+        # GIVEN
+        with self.app.app_context():
+            reds_id = db.session.merge(self.movie_reds).id
+            annie_hall_id = db.session.merge(self.movie_annie_hall).id
+            woody_allen_id = db.session.merge(self.actor_woody_allen).id
+            john_reed_id = db.session.merge(self.role_john_reed).id
+            self.client.get(f"/api/v1/movies/{annie_hall_id}/similar")
+
+            # WHEN
+            self.client.patch(
+                f"/api/v1/movies/{reds_id}/roles/{john_reed_id}",
+                json={"actor_id": woody_allen_id},
+            )
+            response = self.client.get(
+                f"/api/v1/movies/{annie_hall_id}/similar"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            similar_movies = response.json["similar_movies"]
+            self.assertEqual(len(similar_movies), 1)
+            self.assertEqual(similar_movies[0]["movie"]["id"], reds_id)
+            self.assertEqual(similar_movies[0]["similarity"], 1.0)
+            self.assertEqual(similar_movies[0]["shared_actors"], 2)
+
+    def test_get_similar_movies_with_invalid_limit(self):
+        """Test GET similar movies with an invalid limit."""
+        # GIVEN
+        with self.app.app_context():
+            reds = db.session.merge(self.movie_reds)
+
+            # WHEN
+            response = self.client.get(
+                f"/api/v1/movies/{reds.id}/similar?limit=0"
+            )
+
+            # THEN
+            self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_get_similar_movies_when_movie_does_not_exist(self):
+        """Test GET similar movies of an unknown movie."""
+        # WHEN
+        response = self.client.get("/api/v1/movies/unknown/similar")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 404)
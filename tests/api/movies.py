@@ -1,6 +1,9 @@
 import unittest
 
+from sqlalchemy import event
+
 from app.models import db, Movie
+from app.pagination import encode_cursor
 from .common import FlaskApiTestCase
 
 
@@ -54,10 +57,371 @@ class MovieEndpointTestCase(FlaskApiTestCase):
         # THEN
         self.check_is_json_error_response_with_error_code(response, 404)
 
+    def test_get_movies_with_cursor_walks_all_pages(self):
+        """Test GET all on resource `movies` with keyset pagination."""
+        # GIVEN
+        elements_per_page = 2
+
+        # WHEN
+        first_response = self.client.get(
+            f"/api/v1/movies?cursor=&per_page={elements_per_page}"
+        )
+        next_cursor = first_response.json["next_cursor"]
+        second_response = self.client.get(
+            f"/api/v1/movies?cursor={next_cursor}"
+            f"&per_page={elements_per_page}"
+        )
+
+        # THEN
+        self.check_is_json_and_status_is_ok(first_response)
+        self.check_is_json_and_status_is_ok(second_response)
+
+        titles = [
+            movie["title"]
+            for response in (first_response, second_response)
+            for movie in response.json["movies"]
+        ]
+        self.assertEqual(
+            titles, ["Annie Hall", "Reds", "The Shawshank Redemption"]
+        )
+        self.assertEqual(first_response.json["total_movies"], 3)
+        self.assertIsNone(second_response.json["next_cursor"])
+
+    def test_get_movies_page_provides_cursor_of_next_page(self):
+        """Test that a page continues with keyset pagination."""
+        # GIVEN
+        first_response = self.client.get("/api/v1/movies?page=1&per_page=2")
+
+        # WHEN
+        next_cursor = first_response.json["next_cursor"]
+        response = self.client.get(f"/api/v1/movies?cursor={next_cursor}")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        self.assertEqual(
+            [movie["title"] for movie in response.json["movies"]],
+            ["The Shawshank Redemption"],
+        )
+
+    def test_get_movies_with_invalid_cursor(self):
+        """Test GET all on resource `movies` with an invalid cursor."""
+        # WHEN
+        response = self.client.get("/api/v1/movies?cursor=NOT_A_CURSOR")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_get_movies_with_cursor_of_wrong_value_types(self):
+        """Test GET all on resource `movies` with forged cursors whose
+        values do not match the columns of the sort order."""
+        # GIVEN
+        forged_cursors = [
+            ("title", encode_cursor([["Reds"], "id"])),
+            ("title", encode_cursor(["Reds", {"id": 1}])),
+            ("title", encode_cursor(["Reds\u0000", "id"])),
+            ("release_date", encode_cursor(["not a date", "id"])),
+            ("release_date", encode_cursor([19770420, "id"])),
+            ("-release_date", encode_cursor(["1977-04-20", 1])),
+        ]
+
+        for sort, cursor in forged_cursors:
+            # WHEN
+            response = self.client.get(
+                f"/api/v1/movies?sort={sort}&cursor={cursor}"
+            )
+
+            # THEN
+            self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_get_movies_with_cursor_sorted_by_release_date(self):
+        """Test GET all on resource `movies` with a cursor of a date."""
+        # GIVEN
+        cursor = encode_cursor(["1980-01-01", ""])
+
+        # WHEN
+        response = self.client.get(
+            f"/api/v1/movies?sort=release_date&cursor={cursor}"
+        )
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        self.assertEqual(
+            [movie["title"] for movie in response.json["movies"]],
+            ["Reds", "The Shawshank Redemption"],
+        )
+
+    def test_get_movies_without_count(self):
+        """Test GET all on resource `movies` without counting."""
+        # WHEN
+        response = self.client.get("/api/v1/movies?count=none&per_page=2")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        self.assertEqual(len(response.json["movies"]), 2)
+        self.assertIsNone(response.json["total_movies"])
+        self.assertIsNone(response.json["total_pages"])
+        self.assertTrue(response.json["next_cursor"])
+
+    def test_get_movies_with_estimated_count(self):
+        """Test GET all on resource `movies` with an estimated count."""
+        # WHEN
+        response = self.client.get("/api/v1/movies?count=estimated")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        self.assertIsInstance(response.json["total_movies"], int)
+
+    def test_get_movies_with_invalid_count(self):
+        """Test GET all on resource `movies` with an invalid count mode."""
+        # WHEN
+        response = self.client.get("/api/v1/movies?count=NOT_A_MODE")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_get_movies_counts_created_movie(self):
+        """Test that the cached total of movies is updated on writes."""
+        # GIVEN
+        self.client.get("/api/v1/movies")
+        request_body = {"title": "Heat", "release_date": "1995-12-15"}
+
+        # WHEN
+        self.client.post("/api/v1/movies", json=request_body)
+        response = self.client.get("/api/v1/movies")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        self.assertEqual(response.json["total_movies"], 4)
+
+    def test_get_movies_with_expanded_roles_and_actors(self):
+        """Test GET all on resource `movies` with expanded roles."""
+        # WHEN
+        response = self.client.get("/api/v1/movies?expand=roles.actor")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+
+        movies = {movie["title"]: movie for movie in response.json["movies"]}
+        self.assertEqual(
+            [
+                (role["character"], role["actor"]["name"])
+                for role in movies["Annie Hall"]["roles"]
+            ],
+            [("Alvy Singer", "Woody Allen"), ("Annie Hall", "Diane Keaton")],
+        )
+        self.assertIsNone(
+            movies["The Shawshank Redemption"]["roles"][0]["actor"]
+        )
+
+    def test_get_movies_with_expansion_in_constant_number_of_queries(self):
+        """Test that expansions do not query each movie on its own."""
+        # GIVEN
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        def count_statements(per_page):
+            statements.clear()
+            self.client.get(
+                f"/api/v1/movies?expand=roles.actor&per_page={per_page}"
+                "&count=none"
+            )
+            return len(statements)
+
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record_statement)
+            try:
+                # WHEN
+                statements_for_one_movie = count_statements(per_page=1)
+                statements_for_all_movies = count_statements(per_page=3)
+            finally:
+                event.remove(
+                    db.engine, "before_cursor_execute", record_statement
+                )
+
+        # THEN
+        self.assertEqual(statements_for_one_movie, 3)
+        self.assertEqual(statements_for_all_movies, 3)
+
+    def test_get_movies_with_unsupported_expansion(self):
+        """Test GET all on resource `movies` with an unknown expansion."""
+        # WHEN
+        response = self.client.get("/api/v1/movies?expand=roles.movie")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_get_movies_by_ids(self):
+        """Test GET all on resource `movies` with a list of ids."""
+        # GIVEN
+        with self.app.app_context():
+            reds = db.session.merge(self.movie_reds)
+            annie_hall = db.session.merge(self.movie_annie_hall)
+
+            # WHEN
+            response = self.client.get(
+                f"/api/v1/movies?ids={reds.id},NOT_EXISTING_ID,{annie_hall.id}"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(
+                response.json["movies"], [reds.format(), annie_hall.format()]
+            )
+            self.assertEqual(response.json["missing_ids"], ["NOT_EXISTING_ID"])
+
+    def test_get_movies_by_ids_in_request_body(self):
+        """Test POST on `movies/multi-get` with a list of ids."""
+        # GIVEN
+        with self.app.app_context():
+            movie = db.session.merge(self.movie_the_shawshank_redemption)
+            request_body = {"ids": [movie.id, movie.id]}
+
+            # WHEN
+            response = self.client.post(
+                "/api/v1/movies/multi-get", json=request_body
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(response.json["movies"], [movie.format()])
+            self.assertEqual(response.json["missing_ids"], [])
+
+    def test_get_movies_by_too_many_ids(self):
+        """Test POST on `movies/multi-get` with too many ids."""
+        # GIVEN
+        request_body = {"ids": [str(number) for number in range(501)]}
+
+        # WHEN
+        response = self.client.post(
+            "/api/v1/movies/multi-get", json=request_body
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_get_movies_with_sparse_fieldset(self):
+        """Test GET all on resource `movies` with some fields only."""
+        # GIVEN
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record_statement)
+            try:
+                # WHEN
+                response = self.client.get(
+                    "/api/v1/movies?fields=id&cursor=&per_page=2&count=none"
+                )
+            finally:
+                event.remove(
+                    db.engine, "before_cursor_execute", record_statement
+                )
+
+        next_cursor = response.json["next_cursor"]
+        next_response = self.client.get(
+            f"/api/v1/movies?fields=id&cursor={next_cursor}"
+        )
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        self.assertEqual(
+            [list(movie) for movie in response.json["movies"]],
+            [["id"], ["id"]],
+        )
+        self.assertNotIn("release_date", statements[0])
+        self.assertEqual(len(next_response.json["movies"]), 1)
+
+    def test_get_movies_with_invalid_fields(self):
+        """Test GET all on resource `movies` with an unknown field."""
+        # WHEN
+        response = self.client.get("/api/v1/movies?fields=id,budget")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
     """
     Endpoint: GET /movies/<movie_id>
     """
 
+    def test_get_movies_sorted_by_release_date_descending(self):
+        """Test GET all on resource `movies` newest first, by cursor."""
+        # WHEN
+        first_response = self.client.get(
+            "/api/v1/movies?sort=-release_date&cursor=&per_page=2"
+        )
+        next_cursor = first_response.json["next_cursor"]
+        second_response = self.client.get(
+            f"/api/v1/movies?sort=-release_date&cursor={next_cursor}"
+            "&per_page=2"
+        )
+
+        # THEN
+        self.check_is_json_and_status_is_ok(first_response)
+        self.check_is_json_and_status_is_ok(second_response)
+        titles = [
+            movie["title"]
+            for response in (first_response, second_response)
+            for movie in response.json["movies"]
+        ]
+        self.assertEqual(
+            titles, ["The Shawshank Redemption", "Reds", "Annie Hall"]
+        )
+
+    def test_get_movies_filtered_by_release_date_range(self):
+        """Test GET all on resource `movies` released in a range."""
+        # WHEN
+        response = self.client.get(
+            "/api/v1/movies?sort=release_date"
+            "&release_date_from=1980-01-01&release_date_to=1994-10-14"
+        )
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        titles = [movie["title"] for movie in response.json["movies"]]
+        self.assertEqual(titles, ["Reds", "The Shawshank Redemption"])
+        self.assertEqual(response.json["total_movies"], 2)
+
+    def test_get_movies_filtered_by_title_prefix(self):
+        """Test GET all on resource `movies` with a title prefix."""
+        # WHEN
+        response = self.client.get("/api/v1/movies?title_prefix=Re")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        titles = [movie["title"] for movie in response.json["movies"]]
+        self.assertEqual(titles, ["Reds"])
+
+    def test_get_movies_with_filter_on_other_column_than_sort(self):
+        """Test GET all on resource `movies` with a filter not served
+        by the index of the sort order."""
+        # WHEN
+        response = self.client.get(
+            "/api/v1/movies?release_date_from=1980-01-01"
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_get_movies_with_invalid_sort_or_filter(self):
+        """Test GET all on resource `movies` with invalid parameters."""
+        # WHEN
+        unknown_sort_response = self.client.get("/api/v1/movies?sort=id")
+        invalid_date_response = self.client.get(
+            "/api/v1/movies?sort=release_date&release_date_to=1994"
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(
+            unknown_sort_response, 400
+        )
+        self.check_is_json_error_response_with_error_code(
+            invalid_date_response, 400
+        )
+
     def test_get_movie_when_movie_exists(self):
         """Test GET by id on resource `movies` with valid id."""
         # GIVEN
@@ -71,6 +435,23 @@ class MovieEndpointTestCase(FlaskApiTestCase):
             self.check_is_json_and_status_is_ok(response)
             self.response_represents_entity(response.json, movie)
 
+    def test_get_movie_with_sparse_fieldset(self):
+        """Test GET by id on resource `movies` with some fields only."""
+        # GIVEN
+        with self.app.app_context():
+            movie = db.session.merge(self.movie_reds)
+
+            # WHEN
+            response = self.client.get(
+                f"/api/v1/movies/{movie.id}?fields=title,release_date"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(
+                response.json, {"title": "Reds", "release_date": "1981-12-25"}
+            )
+
     def test_get_movie_when_movie_does_not_exist(self):
         """Test GET by id on resource `movies` with invalid id."""
         # GIVEN
@@ -1,6 +1,8 @@
 import os
 import unittest
 
+from sqlalchemy import event
+
 from app.models import db, Movie, Actor, Role
 from .common import FlaskApiTestCase
 
@@ -60,6 +62,82 @@ class RoleEndpointTestCase(FlaskApiTestCase):
                 )
             )
 
+    def test_get_roles_for_movie_with_cursor(self):
+        """Test GET all roles for a movie with keyset pagination."""
+
+        # GIVEN
+        with self.app.app_context():
+            movie = db.session.merge(self.movie_annie_hall)
+
+            # WHEN
+            first_response = self.client.get(
+                f"/api/v1/movies/{movie.id}/roles?cursor=&per_page=1"
+            )
+            next_cursor = first_response.json["next_cursor"]
+            second_response = self.client.get(
+                f"/api/v1/movies/{movie.id}/roles?cursor={next_cursor}"
+                "&per_page=1"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(first_response)
+            self.check_is_json_and_status_is_ok(second_response)
+            self.assertEqual(
+                [
+                    role["character"]
+                    for response in (first_response, second_response)
+                    for role in response.json["roles"]
+                ],
+                ["Alvy Singer", "Annie Hall"],
+            )
+            self.assertEqual(first_response.json["total_roles"], 2)
+            self.assertIsNone(second_response.json["next_cursor"])
+
+    def test_get_roles_for_movie_in_single_statement(self):
+        """Test GET all roles for a movie runs a single SQL statement."""
+
+        # GIVEN
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            movie = db.session.merge(self.movie_annie_hall)
+            event.listen(db.engine, "before_cursor_execute", record_statement)
+            try:
+                # WHEN
+                response = self.client.get(f"/api/v1/movies/{movie.id}/roles")
+            finally:
+                event.remove(
+                    db.engine, "before_cursor_execute", record_statement
+                )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(response.json["total_roles"], 2)
+            self.assertEqual(len(statements), 1)
+
+    def test_get_roles_for_movie_with_sparse_fieldset(self):
+        """Test GET all roles for a movie with some fields only."""
+
+        # GIVEN
+        with self.app.app_context():
+            movie = db.session.merge(self.movie_annie_hall)
+
+            # WHEN
+            response = self.client.get(
+                f"/api/v1/movies/{movie.id}/roles?fields=character"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(
+                response.json["roles"],
+                [{"character": "Alvy Singer"}, {"character": "Annie Hall"}],
+            )
+            self.assertEqual(response.json["total_roles"], 2)
+
     def test_get_roles_for_movie_when_movie_does_not_exist(self):
         """Test GET all roles for a movie with non-existent movie id."""
 
@@ -539,6 +617,22 @@ class RoleEndpointTestCase(FlaskApiTestCase):
                 )
             )
 
+    def test_get_roles_for_actor_without_roles(self):
+        """Test GET all roles for an actor who has no roles."""
+
+        # GIVEN
+        with self.app.app_context():
+            actor = db.session.merge(self.actor_keira_knightley)
+
+            # WHEN
+            response = self.client.get(f"/api/v1/actors/{actor.id}/roles")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(response.json["roles"], [])
+            self.assertEqual(response.json["total_roles"], 0)
+            self.assertEqual(response.json["total_pages"], 0)
+
     def test_get_roles_for_actor_when_actor_does_not_exist(self):
         """Test GET all roles for an actor with non-existent actor id."""
         # GIVEN
@@ -551,6 +645,212 @@ class RoleEndpointTestCase(FlaskApiTestCase):
         self.check_is_json_error_response_with_error_code(response, 404)
 
 
+    """
+    Endpoint: GET /roles
+    """
+
+    def test_get_roles_by_ids(self):
+        """Test GET roles of any movies with a list of ids."""
+
+        # GIVEN
+        with self.app.app_context():
+            john_reed = db.session.merge(self.role_john_reed)
+            alvy_singer = db.session.merge(self.role_alvy_singer)
+
+            # WHEN
+            response = self.client.get(
+                f"/api/v1/roles?ids={john_reed.id},{alvy_singer.id}"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(
+                response.json["roles"],
+                [john_reed.format(), alvy_singer.format()],
+            )
+            self.assertEqual(response.json["missing_ids"], [])
+
+    def test_get_roles_without_ids(self):
+        """Test GET roles without a list of ids."""
+        # WHEN
+        response = self.client.get("/api/v1/roles")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    """
+    Endpoint: GET /roles/open
+    """
+
+    def test_get_open_roles_with_cursor(self):
+        """Test GET roles without an actor of all movies."""
+
+        # GIVEN
+        with self.app.app_context():
+            ellis_boyd_redding = db.session.merge(
+                self.role_ellie_boyd_redding
+            )
+            john_reed = db.session.merge(self.role_john_reed)
+
+            # WHEN
+            first_response = self.client.get(
+                "/api/v1/roles/open?cursor=&per_page=1"
+            )
+            next_cursor = first_response.json["next_cursor"]
+            second_response = self.client.get(
+                f"/api/v1/roles/open?cursor={next_cursor}&per_page=1"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(first_response)
+            self.check_is_json_and_status_is_ok(second_response)
+            self.assertEqual(first_response.json["total_open_roles"], 2)
+            self.assertEqual(
+                first_response.json["open_roles"],
+                [
+                    {
+                        "id": ellis_boyd_redding.id,
+                        "character": ellis_boyd_redding.character,
+                        "movie": {
+                            "id": ellis_boyd_redding.movie_id,
+                            "title": "The Shawshank Redemption",
+                        },
+                    }
+                ],
+            )
+            self.assertEqual(
+                second_response.json["open_roles"][0]["id"], john_reed.id
+            )
+            self.assertIsNone(second_response.json["next_cursor"])
+
+    def test_get_open_roles_after_casting_a_role(self):
+        """Test GET roles without an actor after assigning an actor."""
+
+        # GIVEN
+        with self.app.app_context():
+            john_reed = db.session.merge(self.role_john_reed)
+            movie_id = john_reed.movie_id
+            role_id = john_reed.id
+            actor_id = db.session.merge(self.actor_woody_allen).id
+            self.client.get("/api/v1/roles/open")
+
+            # WHEN
+            self.client.patch(
+                f"/api/v1/movies/{movie_id}/roles/{role_id}",
+                json={"actor_id": actor_id},
+            )
+            response = self.client.get("/api/v1/roles/open")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(response.json["total_open_roles"], 1)
+            self.assertNotIn(
+                role_id, [role["id"] for role in response.json["open_roles"]]
+            )
+
+    """
+    Endpoint: GET /movies/<movie_id>/cast
+    """
+
+    def test_get_cast_of_movie_when_movie_exists(self):
+        """Test GET the cast of a movie in a single SQL statement."""
+
+        # GIVEN
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            movie = db.session.merge(self.movie_reds)
+            event.listen(db.engine, "before_cursor_execute", record_statement)
+            try:
+                # WHEN
+                response = self.client.get(f"/api/v1/movies/{movie.id}/cast")
+            finally:
+                event.remove(
+                    db.engine, "before_cursor_execute", record_statement
+                )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(len(statements), 1)
+
+            response_body = response.json
+            self.assertEqual(response_body["movie"], movie.format())
+            self.assertEqual(response_body["total_cast"], 2)
+            self.assertEqual(
+                [
+                    (
+                        cast_member["character"],
+                        cast_member["actor"] and cast_member["actor"]["name"],
+                    )
+                    for cast_member in response_body["cast"]
+                ],
+                [("John Reed", None), ("Louise Bryant", "Diane Keaton")],
+            )
+
+    def test_get_cast_of_movie_when_movie_does_not_exist(self):
+        """Test GET the cast of a movie with non-existent movie id."""
+        # GIVEN
+        movie_id = "NOT_EXISTING_ID"
+
+        # WHEN
+        response = self.client.get(f"/api/v1/movies/{movie_id}/cast")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 404)
+
+    """
+    Endpoint: GET /actors/<actor_id>/filmography
+    """
+
+    def test_get_filmography_of_actor_with_cursor(self):
+        """Test GET the filmography of an actor with keyset pagination."""
+
+        # GIVEN
+        with self.app.app_context():
+            actor = db.session.merge(self.actor_diane_keaton)
+
+            # WHEN
+            first_response = self.client.get(
+                f"/api/v1/actors/{actor.id}/filmography?cursor=&per_page=1"
+            )
+            next_cursor = first_response.json["next_cursor"]
+            second_response = self.client.get(
+                f"/api/v1/actors/{actor.id}/filmography"
+                f"?cursor={next_cursor}&per_page=1"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(first_response)
+            self.check_is_json_and_status_is_ok(second_response)
+            self.assertEqual(first_response.json["actor"], actor.format())
+            self.assertEqual(
+                [
+                    (entry["character"], entry["movie"]["release_date"])
+                    for response in (first_response, second_response)
+                    for entry in response.json["filmography"]
+                ],
+                [
+                    ("Annie Hall", "1977-04-20"),
+                    ("Louise Bryant", "1981-12-25"),
+                ],
+            )
+            self.assertEqual(first_response.json["total_filmography"], 2)
+            self.assertIsNone(second_response.json["next_cursor"])
+
+    def test_get_filmography_of_actor_when_actor_does_not_exist(self):
+        """Test GET the filmography with non-existent actor id."""
+        # GIVEN
+        actor_id = "NOT_EXISTING_ID"
+
+        # WHEN
+        response = self.client.get(f"/api/v1/actors/{actor_id}/filmography")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 404)
+
 # Make the tests conveniently executable
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,184 @@
+import time
+from unittest import mock
+
+from app.models import db
+from app.search import SearchData
+from .common import FlaskApiTestCase
+
+
+class SearchEndpointTestCase(FlaskApiTestCase):
+    """This class represents the search endpoint test case"""
+
+    """
+    Endpoint: GET /search
+    """
+
+    def test_search_finds_movies_actors_and_roles(self):
+        """Test GET search with a token of titles and characters."""
+        # GIVEN
+        with self.app.app_context():
+            movie = db.session.merge(self.movie_annie_hall)
+            role = db.session.merge(self.role_annie_hall)
+
+            # WHEN
+            response = self.client.get("/api/v1/search?q=annie")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            response_body = response.json
+            self.assertEqual(response_body["total_results"], 2)
+            self.assertEqual(response_body["current_page"], 1)
+            self.assertEqual(response_body["total_pages"], 1)
+
+            found = {
+                (result["type"], result[result["type"]]["id"])
+                for result in response_body["results"]
+            }
+            self.assertEqual(found, {("movie", movie.id), ("role", role.id)})
+
+    def test_search_ranks_best_matches_first(self):
+        """Test GET search ranks documents matching more tokens first."""
+        # GIVEN
+        with self.app.app_context():
+            role = db.session.merge(self.role_annie_hall)
+
+            # WHEN
+            response = self.client.get("/api/v1/search?q=annie hall&type=role")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            results = response.json["results"]
+            self.assertEqual(results[0]["role"]["id"], role.id)
+            self.assertEqual(results[0]["role"]["character"], "Annie Hall")
+
+    def test_search_tolerates_typos(self):
+        """Test GET search with misspelled tokens."""
+        # GIVEN
+        with self.app.app_context():
+            movie = db.session.merge(self.movie_the_shawshank_redemption)
+
+            # WHEN
+            response = self.client.get("/api/v1/search?q=shawshenk redemtion")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            results = response.json["results"]
+            self.assertEqual(results[0]["type"], "movie")
+            self.assertEqual(results[0]["movie"]["id"], movie.id)
+
+    def test_search_by_type(self):
+        """Test GET search for actors only."""
+        # GIVEN
+        with self.app.app_context():
+            actor = db.session.merge(self.actor_diane_keaton)
+
+            # WHEN
+            response = self.client.get("/api/v1/search?q=keaton&type=actor")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            results = response.json["results"]
+            self.assertEqual(len(results), 1)
+            self.assertEqual(results[0]["actor"], actor.format())
+
+    def test_search_is_updated_on_writes(self):
+        """Test GET search after creating, renaming and deleting."""
+        # GIVEN
+        with self.app.app_context():
+            movie_id = db.session.merge(self.movie_reds).id
+            self.client.get("/api/v1/search?q=reds")
+
+            # WHEN
+            created = self.client.post(
+                "/api/v1/movies",
+                json={"title": "Interstellar", "release_date": "2014-11-07"},
+            ).json
+            self.client.patch(
+                f"/api/v1/movies/{movie_id}", json={"title": "Warriors"}
+            )
+            self.client.delete(f"/api/v1/movies/{movie_id}")
+
+            # THEN
+            response = self.client.get("/api/v1/search?q=interstellar")
+            self.assertEqual(
+                response.json["results"][0]["movie"]["id"], created["id"]
+            )
+            # The movie and its roles are deleted
+            for query in ("warriors", "louise bryant"):
+                response = self.client.get(f"/api/v1/search?q={query}")
+                self.assertEqual(response.json["total_results"], 0)
+
+    def test_rename_movie_when_update_of_search_index_fails(self):
+        """Test PATCH movie when the search index cannot be updated."""
+        # GIVEN
+        with self.app.app_context():
+            movie_id = db.session.merge(self.movie_reds).id
+            self.client.get("/api/v1/search?q=reds")
+            add = SearchData.add
+            failures = [RuntimeError()]
+
+            def add_or_fail(data, *args):
+                if failures:
+                    raise failures.pop()
+                add(data, *args)
+
+            # WHEN
+            with mock.patch.object(
+                SearchData, "add", add_or_fail
+            ), self.assertLogs(self.app.logger, "ERROR"):
+                response = self.client.patch(
+                    f"/api/v1/movies/{movie_id}", json={"title": "Warriors"}
+                )
+                deadline = time.monotonic() + 5
+                while self.client.get("/health/indexes").json["search"][
+                    "rebuilding"
+                ]:
+                    self.assertLess(time.monotonic(), deadline)
+                    time.sleep(0.01)
+            search_response = self.client.get("/api/v1/search?q=warriors")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(response.json["title"], "Warriors")
+            self.assertEqual(
+                search_response.json["results"][0]["movie"]["id"], movie_id
+            )
+
+    def test_search_pages_results(self):
+        """Test GET search with a page size."""
+        # GIVEN
+        with self.app.app_context():
+
+            # WHEN
+            first_page = self.client.get("/api/v1/search?q=annie&per_page=1")
+            second_page = self.client.get(
+                "/api/v1/search?q=annie&per_page=1&page=2"
+            )
+            third_page = self.client.get(
+                "/api/v1/search?q=annie&per_page=1&page=3"
+            )
+
+            # THEN
+            self.check_is_json_and_status_is_ok(first_page)
+            self.check_is_json_and_status_is_ok(second_page)
+            self.assertEqual(first_page.json["total_pages"], 2)
+            self.assertNotEqual(
+                first_page.json["results"], second_page.json["results"]
+            )
+            self.check_is_json_error_response_with_error_code(third_page, 404)
+
+    def test_search_without_query(self):
+        """Test GET search without a query."""
+        # WHEN
+        response = self.client.get("/api/v1/search?q=")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_search_with_unsupported_type(self):
+        """Test GET search with an unknown type of results."""
+        # WHEN
+        response = self.client.get("/api/v1/search?q=annie&type=studio")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
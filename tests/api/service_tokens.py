@@ -0,0 +1,108 @@
+import unittest
+
+from app.auth import AUTH0_AUDIENCE, configure_service_tokens
+from app.service_tokens import ServiceTokenVerifier
+from .common import FlaskApiTestCase
+
+
+SERVICE_TOKEN_SECRETS = {"batch-2025": b"a-secret-for-batch-jobs"}
+
+
+def get_authorization_header_for_token(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+class ServiceTokenTestCase(FlaskApiTestCase):
+    """This class represents the service token test case"""
+
+    def auth_checks_required_for_testcase(self):
+        return True
+
+    def setUp(self):
+        super().setUp()
+        configure_service_tokens(SERVICE_TOKEN_SECRETS)
+        self.verifier = ServiceTokenVerifier(
+            SERVICE_TOKEN_SECRETS, AUTH0_AUDIENCE
+        )
+
+    def tearDown(self):
+        configure_service_tokens({})
+        super().tearDown()
+
+    def test_service_with_permission_can_get_movies(self):
+        """Test that a valid service token is accepted."""
+        # GIVEN
+        token = self.verifier.mint("batch-2025", "batch", ["get:movie"])
+
+        # WHEN
+        response = self.client.get(
+            "/api/v1/movies", headers=get_authorization_header_for_token(token)
+        )
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+
+    def test_service_without_permission_cannot_create_movies(self):
+        """Test that permissions of service tokens are checked."""
+        # GIVEN
+        token = self.verifier.mint("batch-2025", "batch", ["get:movie"])
+
+        # WHEN
+        response = self.client.post(
+            "/api/v1/movies",
+            json={"title": "Reds", "release_date": "1981-12-25"},
+            headers=get_authorization_header_for_token(token),
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 403)
+
+    def test_service_token_with_wrong_secret_is_rejected(self):
+        """Test that a service token signed with another secret fails."""
+        # GIVEN
+        forger = ServiceTokenVerifier(
+            {"batch-2025": b"a-guessed-secret"}, AUTH0_AUDIENCE
+        )
+        token = forger.mint("batch-2025", "batch", ["get:movie"])
+
+        # WHEN
+        response = self.client.get(
+            "/api/v1/movies", headers=get_authorization_header_for_token(token)
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    def test_expired_service_token_is_rejected(self):
+        """Test that an expired service token fails."""
+        # GIVEN
+        token = self.verifier.mint(
+            "batch-2025", "batch", ["get:movie"], expires_in=-60
+        )
+
+        # WHEN
+        response = self.client.get(
+            "/api/v1/movies", headers=get_authorization_header_for_token(token)
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 401)
+
+    def test_service_token_is_rejected_when_not_configured(self):
+        """Test that service tokens fail unless secrets are configured."""
+        # GIVEN
+        token = self.verifier.mint("batch-2025", "batch", ["get:movie"])
+        configure_service_tokens({})
+
+        # WHEN
+        response = self.client.get(
+            "/api/v1/movies", headers=get_authorization_header_for_token(token)
+        )
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+import time
+from unittest import mock
+
+from app.models import db
+from .common import FlaskApiTestCase
+
+
+class StatsEndpointTestCase(FlaskApiTestCase):
+    """This class represents the statistics endpoints test case"""
+
+    """
+    Endpoint: GET /stats
+    """
+
+    def test_get_stats(self):
+        """Test GET totals of the catalog."""
+        # WHEN
+        response = self.client.get("/api/v1/stats")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        self.assertEqual(
+            response.json,
+            {"movies": 3, "actors": 3, "roles": 5, "open_roles": 2},
+        )
+
+    """
+    Endpoint: GET /stats/movies-per-year
+    """
+
+    def test_get_movies_per_year_after_creating_movie(self):
+        """Test GET movies per year after a movie is created."""
+        # GIVEN
+        self.client.get("/api/v1/stats/movies-per-year")
+
+        # WHEN
+        self.client.post(
+            "/api/v1/movies",
+            json={"title": "Manhattan", "release_date": "1979-04-25"},
+        )
+        response = self.client.get("/api/v1/stats/movies-per-year")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        self.assertEqual(
+            response.json["movies_per_year"],
+            [
+                {"year": 1977, "movies": 1},
+                {"year": 1979, "movies": 1},
+                {"year": 1981, "movies": 1},
+                {"year": 1994, "movies": 1},
+            ],
+        )
+
+    """
+    Endpoint: GET /stats/actor-ages
+    """
+
+    def test_get_actor_ages(self):
+        """Test GET age groups of actors."""
+        # WHEN
+        response = self.client.get("/api/v1/stats/actor-ages?group_years=5")
+
+        # THEN
+        self.check_is_json_and_status_is_ok(response)
+        actor_ages = response.json["actor_ages"]
+        self.assertEqual(sum(group["actors"] for group in actor_ages), 3)
+        for group in actor_ages:
+            self.assertEqual(group["min_age"] % 5, 0)
+            self.assertEqual(group["max_age"], group["min_age"] + 4)
+
+    def test_get_actor_ages_with_invalid_group_years(self):
+        """Test GET age groups of actors with invalid group years."""
+        # WHEN
+        response = self.client.get("/api/v1/stats/actor-ages?group_years=0")
+
+        # THEN
+        self.check_is_json_error_response_with_error_code(response, 400)
+
+    """
+    Endpoint: GET /stats/roles-per-movie
+    """
+
+    def test_get_roles_per_movie_after_deleting_role(self):
+        """Test GET roles per movie after a role is deleted."""
+        # GIVEN
+        with self.app.app_context():
+            movie_id = db.session.merge(
+                self.movie_the_shawshank_redemption
+            ).id
+            role_id = db.session.merge(self.role_ellie_boyd_redding).id
+            before_response = self.client.get(
+                "/api/v1/stats/roles-per-movie"
+            )
+
+            # WHEN
+            self.client.delete(f"/api/v1/movies/{movie_id}/roles/{role_id}")
+            response = self.client.get("/api/v1/stats/roles-per-movie")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(
+                before_response.json,
+                {
+                    "roles_per_movie": [
+                        {"roles": 1, "movies": 1},
+                        {"roles": 2, "movies": 2},
+                    ],
+                    "average_roles_per_movie": 1.67,
+                },
+            )
+            self.assertEqual(
+                response.json,
+                {
+                    "roles_per_movie": [
+                        {"roles": 0, "movies": 1},
+                        {"roles": 2, "movies": 2},
+                    ],
+                    "average_roles_per_movie": 1.33,
+                },
+            )
+
+    """
+    Endpoint: GET /stats/cast-coverage
+    """
+
+    def test_get_cast_coverage_after_casting_role(self):
+        """Test GET cast coverage after a role is cast."""
+        # GIVEN
+        with self.app.app_context():
+            movie_id = db.session.merge(self.movie_reds).id
+            role_id = db.session.merge(self.role_john_reed).id
+            actor_id = db.session.merge(self.actor_woody_allen).id
+            before_response = self.client.get("/api/v1/stats/cast-coverage")
+
+            # WHEN
+            self.client.patch(
+                f"/api/v1/movies/{movie_id}/roles/{role_id}",
+                json={"actor_id": actor_id},
+            )
+            response = self.client.get("/api/v1/stats/cast-coverage")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(before_response.json["cast_coverage"], 0.6)
+            self.assertEqual(
+                response.json,
+                {
+                    "movies": 3,
+                    "movies_without_roles": 0,
+                    "fully_cast_movies": 2,
+                    "roles": 5,
+                    "cast_roles": 4,
+                    "open_roles": 1,
+                    "cast_coverage": 0.8,
+                },
+            )
+
+    def test_create_role_when_refresh_of_roles_fails(self):
+        """Test POST role when the statistics cannot be refreshed."""
+        # GIVEN
+        with self.app.app_context():
+            movie_id = db.session.merge(self.movie_reds).id
+            self.client.get("/api/v1/stats")
+
+            # WHEN
+            with mock.patch(
+                "app.stats.load_role_counts", side_effect=RuntimeError()
+            ), self.assertLogs(self.app.logger, "ERROR"):
+                response = self.client.post(
+                    f"/api/v1/movies/{movie_id}/roles",
+                    json={"character": "Eugene O'Neill"},
+                )
+            deadline = time.monotonic() + 5
+            while self.client.get("/health/indexes").json["stats"][
+                "rebuilding"
+            ]:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            stats_response = self.client.get("/api/v1/stats")
+
+            # THEN
+            self.check_is_json_and_status_is_ok(response)
+            self.assertEqual(response.json["character"], "Eugene O'Neill")
+            self.assertEqual(
+                stats_response.json,
+                {"movies": 3, "actors": 3, "roles": 6, "open_roles": 3},
+            )
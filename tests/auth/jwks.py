@@ -0,0 +1,234 @@
+import unittest
+
+from app.jwks import (
+    CircuitBreaker,
+    JwksKeyStore,
+    JwksRefresher,
+    JwksUnavailableError,
+    parse_cache_control_max_age,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeJwksEndpoint:
+    def __init__(self, kids, max_age=None):
+        self.kids = kids
+        self.max_age = max_age
+        self.number_of_fetches = 0
+        self.unavailable = False
+
+    def __call__(self, jwks_url):
+        self.number_of_fetches += 1
+        if self.unavailable:
+            raise OSError("Identity provider unavailable.")
+        keys = [{"kid": kid, "kty": "RSA"} for kid in self.kids]
+        return {"keys": keys}, self.max_age
+
+
+class JwksKeyStoreTestCase(unittest.TestCase):
+    """This class represents the JWKS key store test case"""
+
+    def create_key_store(self, endpoint, clock, **kwargs):
+        return JwksKeyStore(
+            "https://example.com/.well-known/jwks.json",
+            fetch=endpoint,
+            clock=clock,
+            **kwargs,
+        )
+
+    def test_key_set_is_fetched_once_while_fresh(self):
+        """Test that the key set is cached until it expires."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"])
+        key_store = self.create_key_store(endpoint, clock, default_ttl=600)
+
+        # WHEN
+        for _ in range(10):
+            key = key_store.get_key("key-1")
+            clock.advance(10)
+
+        # THEN
+        self.assertEqual(key["kid"], "key-1")
+        self.assertEqual(endpoint.number_of_fetches, 1)
+
+    def test_key_set_is_fetched_again_when_expired(self):
+        """Test that an expired key set is fetched again."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"], max_age=120)
+        key_store = self.create_key_store(endpoint, clock)
+        key_store.get_key("key-1")
+
+        # WHEN
+        clock.advance(121)
+        key_store.get_key("key-1")
+
+        # THEN
+        self.assertEqual(endpoint.number_of_fetches, 2)
+
+    def test_unknown_kid_refetch_is_rate_limited(self):
+        """Test that unknown key ids trigger a limited number of fetches."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"])
+        key_store = self.create_key_store(
+            endpoint, clock, unknown_kid_refetch_interval=30
+        )
+        key_store.get_key("key-1")
+        clock.advance(31)
+
+        # WHEN
+        keys = [key_store.get_key("unknown-key") for _ in range(10)]
+
+        # THEN
+        self.assertEqual(keys, [None] * 10)
+        self.assertEqual(endpoint.number_of_fetches, 2)
+
+    def test_unknown_kid_picks_up_rotated_key(self):
+        """Test that a rotated key is found after a refetch."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"])
+        key_store = self.create_key_store(endpoint, clock)
+        key_store.get_key("key-1")
+        clock.advance(31)
+
+        # WHEN
+        endpoint.kids = ["key-1", "key-2"]
+        key = key_store.get_key("key-2")
+
+        # THEN
+        self.assertEqual(key["kid"], "key-2")
+
+    def test_stale_key_set_is_served_while_refresh_fails(self):
+        """Test that the last known-good key set is served on errors."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"], max_age=120)
+        key_store = self.create_key_store(endpoint, clock)
+        key_store.get_key("key-1")
+
+        # WHEN
+        endpoint.unavailable = True
+        clock.advance(121)
+        key = key_store.get_key("key-1")
+
+        # THEN
+        self.assertEqual(key["kid"], "key-1")
+        self.assertTrue(key_store.get_state()["stale"])
+        self.assertIsNotNone(key_store.get_state()["last_error"])
+
+    def test_missing_key_set_raises_when_unavailable(self):
+        """Test that an error is raised if no key set was ever fetched."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"])
+        endpoint.unavailable = True
+        key_store = self.create_key_store(endpoint, clock)
+
+        # WHEN / THEN
+        with self.assertRaises(JwksUnavailableError):
+            key_store.get_key("key-1")
+
+    def test_open_circuit_stops_fetching(self):
+        """Test that the circuit breaker stops fetches after failures."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"])
+        endpoint.unavailable = True
+        circuit_breaker = CircuitBreaker(
+            failure_threshold=3, reset_timeout=30, clock=clock
+        )
+        key_store = self.create_key_store(
+            endpoint, clock, circuit_breaker=circuit_breaker
+        )
+
+        # WHEN
+        for _ in range(10):
+            with self.assertRaises(JwksUnavailableError):
+                key_store.get_key("key-1")
+
+        # THEN
+        self.assertEqual(endpoint.number_of_fetches, 3)
+        self.assertEqual(
+            key_store.get_state()["circuit_breaker"]["state"],
+            CircuitBreaker.OPEN,
+        )
+
+        # WHEN the reset timeout passed and the provider recovered
+        clock.advance(30)
+        endpoint.unavailable = False
+        key = key_store.get_key("key-1")
+
+        # THEN
+        self.assertEqual(key["kid"], "key-1")
+        self.assertEqual(
+            key_store.get_state()["circuit_breaker"]["state"],
+            CircuitBreaker.CLOSED,
+        )
+
+    def test_refresher_fetches_key_set_ahead_of_expiry(self):
+        """Test that the refresher fetches a new key set."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"], max_age=100)
+        key_store = self.create_key_store(endpoint, clock)
+        key_store.get_key("key-1")
+        refresher = JwksRefresher(key_store)
+
+        # WHEN
+        clock.advance(80)
+        seconds_until_refresh = key_store.seconds_until_refresh()
+        refresher.run_once()
+
+        # THEN
+        self.assertEqual(seconds_until_refresh, 0)
+        self.assertEqual(endpoint.number_of_fetches, 2)
+        self.assertEqual(key_store.get_version(), 2)
+
+    def test_keys_are_built_once_per_key_set(self):
+        """Test that the key builder runs once per fetched key set."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1", "key-2"])
+        built_kids = []
+
+        def key_builder(jwk):
+            built_kids.append(jwk["kid"])
+            return ("built", jwk["kid"])
+
+        key_store = self.create_key_store(
+            endpoint, clock, key_builder=key_builder
+        )
+
+        # WHEN
+        keys = [key_store.get_key("key-1") for _ in range(10)]
+
+        # THEN
+        self.assertEqual(keys, [("built", "key-1")] * 10)
+        self.assertEqual(sorted(built_kids), ["key-1", "key-2"])
+
+    def test_cache_control_max_age_is_parsed(self):
+        """Test parsing of Cache-Control headers."""
+        self.assertEqual(
+            parse_cache_control_max_age("public, max-age=15"), 15
+        )
+        self.assertEqual(parse_cache_control_max_age("no-store"), 0)
+        self.assertIsNone(parse_cache_control_max_age("public"))
+        self.assertIsNone(parse_cache_control_max_age(None))
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
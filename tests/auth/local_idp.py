@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from jose import jwt
+
+from app.api import create_app
+from app.auth import AUTH0_AUDIENCE, build_verification_key
+from app.jwks import JwksKeyStore
+from app.local_idp import load_jwks_file
+
+
+class LocalIdentityProviderCliTestCase(unittest.TestCase):
+    """This class represents the local identity provider CLI test case"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.private_key_file = os.path.join(self.directory.name, "key.pem")
+        self.jwks_file = os.path.join(self.directory.name, "jwks.json")
+        self.runner = create_app().test_cli_runner()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_minted_token_verifies_with_jwks_file(self):
+        """Test that minted tokens verify with the written key set."""
+        # GIVEN
+        result = self.runner.invoke(
+            args=[
+                "local-idp",
+                "create-key",
+                "--private-key-file",
+                self.private_key_file,
+                "--jwks-file",
+                self.jwks_file,
+            ]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        # WHEN
+        result = self.runner.invoke(
+            args=[
+                "local-idp",
+                "mint-token",
+                "--private-key-file",
+                self.private_key_file,
+                "--subject",
+                "local|benchmark",
+                "--permission",
+                "get:movie",
+            ]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        token = result.output.strip()
+
+        # THEN
+        key_store = JwksKeyStore(
+            "file://jwks.json",
+            fetch=load_jwks_file(self.jwks_file),
+            key_builder=build_verification_key,
+        )
+        kid = jwt.get_unverified_header(token)["kid"]
+        payload = jwt.decode(
+            token,
+            key_store.get_key(kid),
+            algorithms=["RS256"],
+            audience=AUTH0_AUDIENCE,
+        )
+        self.assertEqual(payload["sub"], "local|benchmark")
+        self.assertEqual(payload["permissions"], ["get:movie"])
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
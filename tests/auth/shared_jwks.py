@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from app.jwks import JwksKeyStore
+from app.shared_jwks import SharedJwksFile
+from .jwks import FakeClock, FakeJwksEndpoint
+
+
+JWKS_URL = "https://example.com/.well-known/jwks.json"
+
+
+def fetch_through_shared_file(directory, results):
+    """Fetches the key set in a separate process."""
+    endpoint = FakeJwksEndpoint(["key-1"], max_age=600)
+    shared_file = SharedJwksFile(
+        directory, JWKS_URL, endpoint, default_ttl=600, wait_timeout=10
+    )
+    shared_file(JWKS_URL)
+    results.put(endpoint.number_of_fetches)
+
+
+class SharedJwksFileTestCase(unittest.TestCase):
+    """This class represents the shared JWKS file test case"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_shared_file(self, endpoint, clock):
+        return SharedJwksFile(
+            self.directory.name,
+            JWKS_URL,
+            endpoint,
+            default_ttl=600,
+            wait_timeout=1,
+            clock=clock,
+        )
+
+    def test_key_set_written_by_one_worker_is_used_by_another(self):
+        """Test that a second worker does not fetch a fresh key set."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"], max_age=300)
+        first_worker = self.create_shared_file(endpoint, clock)
+        second_worker = self.create_shared_file(endpoint, clock)
+        first_worker(JWKS_URL)
+
+        # WHEN
+        clock.advance(100)
+        jwks, ttl = second_worker(JWKS_URL)
+
+        # THEN
+        self.assertEqual(jwks["keys"][0]["kid"], "key-1")
+        self.assertEqual(ttl, 200)
+        self.assertEqual(endpoint.number_of_fetches, 1)
+        self.assertTrue(os.path.exists(first_worker.get_path()))
+
+    def test_key_set_already_seen_is_fetched_again(self):
+        """Test that a worker asking again (e.g. for an unknown key id)
+        fetches a new key set."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"], max_age=300)
+        worker = self.create_shared_file(endpoint, clock)
+        worker(JWKS_URL)
+
+        # WHEN
+        clock.advance(1)
+        endpoint.kids = ["key-1", "key-2"]
+        jwks, _ = worker(JWKS_URL)
+
+        # THEN
+        self.assertEqual(len(jwks["keys"]), 2)
+        self.assertEqual(endpoint.number_of_fetches, 2)
+
+    def test_time_to_live_is_limited_when_fetched(self):
+        """Test that a very short max-age is raised once, when the key
+        set is fetched."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"], max_age=5)
+        first_worker = self.create_shared_file(endpoint, clock)
+        second_worker = self.create_shared_file(endpoint, clock)
+
+        # WHEN
+        _, first_ttl = first_worker(JWKS_URL)
+        clock.advance(50)
+        _, second_ttl = second_worker(JWKS_URL)
+
+        # THEN
+        self.assertEqual(first_ttl, 60)
+        self.assertEqual(second_ttl, 10)
+        self.assertEqual(endpoint.number_of_fetches, 1)
+
+    def test_key_store_expires_with_shared_key_set(self):
+        """Test that a key store using the shared file keeps a key set
+        no longer than the shared key set is fresh."""
+        # GIVEN
+        clock = FakeClock()
+        endpoint = FakeJwksEndpoint(["key-1"], max_age=300)
+        self.create_shared_file(endpoint, clock)(JWKS_URL)
+        key_store = JwksKeyStore(
+            JWKS_URL,
+            min_ttl=0,
+            fetch=self.create_shared_file(endpoint, clock),
+            clock=clock,
+        )
+
+        # WHEN
+        clock.advance(290)
+        key_store.get_key("key-1")
+
+        # THEN
+        self.assertEqual(key_store.get_state()["expires_in_seconds"], 10)
+        self.assertEqual(endpoint.number_of_fetches, 1)
+
+    def test_only_one_of_many_processes_fetches(self):
+        """Test that concurrent worker processes fetch only once."""
+        # GIVEN
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=fetch_through_shared_file,
+                args=(self.directory.name, results),
+            )
+            for _ in range(4)
+        ]
+
+        # WHEN
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+        number_of_fetches = [results.get(timeout=5) for _ in processes]
+
+        # THEN
+        self.assertEqual(sum(number_of_fetches), 1)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from app.token_cache import TokenCache
+from .jwks import FakeClock
+
+
+class TokenCacheTestCase(unittest.TestCase):
+    """This class represents the token cache test case"""
+
+    def test_cached_token_is_returned_until_it_expires(self):
+        """Test that entries expire at the token expiration."""
+        # GIVEN
+        clock = FakeClock()
+        cache = TokenCache(max_size=10, clock=clock)
+        cache.put("token", "verified", expires_at=clock() + 60)
+
+        # WHEN
+        before_expiration = cache.get("token")
+        clock.advance(60)
+        after_expiration = cache.get("token")
+
+        # THEN
+        self.assertEqual(before_expiration, "verified")
+        self.assertIsNone(after_expiration)
+        self.assertEqual(cache.get_statistics()["hits"], 1)
+        self.assertEqual(cache.get_statistics()["misses"], 1)
+
+    def test_least_recently_used_token_is_evicted(self):
+        """Test that the cache is bounded in size."""
+        # GIVEN
+        clock = FakeClock()
+        cache = TokenCache(max_size=2, clock=clock)
+        cache.put("token-1", 1, expires_at=clock() + 60)
+        cache.put("token-2", 2, expires_at=clock() + 60)
+        cache.get("token-1")
+
+        # WHEN
+        cache.put("token-3", 3, expires_at=clock() + 60)
+
+        # THEN
+        self.assertEqual(cache.get("token-1"), 1)
+        self.assertIsNone(cache.get("token-2"))
+        self.assertEqual(cache.get("token-3"), 3)
+        self.assertEqual(cache.get_statistics()["size"], 2)
+
+    def test_expired_token_is_not_cached(self):
+        """Test that already expired tokens are not cached."""
+        # GIVEN
+        clock = FakeClock()
+        cache = TokenCache(max_size=2, clock=clock)
+
+        # WHEN
+        cache.put("token", "verified", expires_at=clock() - 1)
+
+        # THEN
+        self.assertIsNone(cache.get("token"))
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
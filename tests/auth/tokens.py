@@ -0,0 +1,153 @@
+import base64
+import json
+import time
+import unittest
+
+from app.auth import (
+    AuthError,
+    AuthorizationToken,
+    get_rejected_token_cache,
+    get_verified_token,
+    precheck_token,
+)
+
+
+def encode_segment(data):
+    encoded = base64.urlsafe_b64encode(json.dumps(data).encode("utf-8"))
+    return encoded.rstrip(b"=").decode("ascii")
+
+
+def create_unsigned_token(header, payload):
+    """Creates a token with the given header and payload and
+    a signature that is structurally valid but cannot verify."""
+    return ".".join(
+        [encode_segment(header), encode_segment(payload), "c2lnbmF0dXJl"]
+    )
+
+
+class AuthorizationTokenTestCase(unittest.TestCase):
+    """This class represents the authorization token test case"""
+
+    def create_payload(self, permissions):
+        return {
+            "sub": "auth0|test-user",
+            "permissions": permissions,
+            "exp": int(time.time()) + 60,
+        }
+
+    def test_granted_permission_is_accepted(self):
+        """Test that a granted permission passes the check."""
+        # GIVEN
+        token = AuthorizationToken(
+            self.create_payload(["get:movie", "get:actor"])
+        )
+
+        # WHEN / THEN
+        self.assertTrue(token.check_permission("get:actor"))
+        self.assertTrue(token.check_permission(None))
+        self.assertEqual(token.get_permissions(), ["get:movie", "get:actor"])
+
+    def test_missing_permission_is_rejected(self):
+        """Test that a missing permission fails the check with 403."""
+        # GIVEN
+        token = AuthorizationToken(self.create_payload(["get:movie"]))
+
+        # WHEN
+        with self.assertRaises(AuthError) as context:
+            token.check_permission("delete:movie")
+
+        # THEN
+        self.assertEqual(context.exception.status_code, 403)
+
+    def test_permissions_must_be_a_list(self):
+        """Test that a permissions claim other than a list is rejected."""
+        # WHEN
+        with self.assertRaises(AuthError) as context:
+            AuthorizationToken(self.create_payload("get:movie"))
+
+        # THEN
+        self.assertEqual(context.exception.status_code, 400)
+
+
+class TokenPrecheckTestCase(unittest.TestCase):
+    """This class represents the token pre-check test case"""
+
+    def setUp(self):
+        self.header = {"alg": "RS256", "typ": "JWT", "kid": "key-1"}
+        self.payload = {
+            "sub": "auth0|test-user",
+            "permissions": [],
+            "exp": int(time.time()) + 60,
+        }
+
+    def check_rejected(self, token, status_code, code):
+        with self.assertRaises(AuthError) as context:
+            precheck_token(token)
+
+        self.assertEqual(context.exception.status_code, status_code)
+        self.assertEqual(context.exception.error["code"], code)
+
+    def test_well_formed_token_passes(self):
+        """Test that a well formed token passes and returns its header."""
+        # GIVEN
+        token = create_unsigned_token(self.header, self.payload)
+
+        # WHEN
+        header = precheck_token(token)
+
+        # THEN
+        self.assertEqual(header, self.header)
+
+    def test_garbage_token_is_rejected(self):
+        """Test that tokens without three base64url segments fail."""
+        self.check_rejected("garbage", 400, "invalid_header")
+        self.check_rejected("a.b", 400, "invalid_header")
+        self.check_rejected("a.b.c", 400, "invalid_header")
+        self.check_rejected("a+b.c/d.e=f", 400, "invalid_header")
+
+    def test_oversized_token_is_rejected(self):
+        """Test that very large tokens fail."""
+        self.header["padding"] = "x" * 10000
+        token = create_unsigned_token(self.header, self.payload)
+        self.check_rejected(token, 400, "invalid_header")
+
+    def test_token_with_wrong_algorithm_is_rejected(self):
+        """Test that tokens not signed with RS256 fail."""
+        self.header["alg"] = "none"
+        token = create_unsigned_token(self.header, self.payload)
+        self.check_rejected(token, 400, "invalid_header")
+
+    def test_token_without_key_id_is_rejected(self):
+        """Test that tokens without key id fail."""
+        del self.header["kid"]
+        token = create_unsigned_token(self.header, self.payload)
+        self.check_rejected(token, 401, "invalid_header")
+
+    def test_expired_token_is_rejected(self):
+        """Test that expired tokens fail."""
+        self.payload["exp"] = int(time.time()) - 60
+        token = create_unsigned_token(self.header, self.payload)
+        self.check_rejected(token, 401, "token_expired")
+
+    def test_rejected_token_is_remembered(self):
+        """Test that a rejected token is rejected from the cache."""
+        # GIVEN
+        token = "not-a-token-" + str(time.time())
+        misses_before = get_rejected_token_cache().get_statistics()["misses"]
+        hits_before = get_rejected_token_cache().get_statistics()["hits"]
+
+        # WHEN
+        for _ in range(3):
+            with self.assertRaises(AuthError) as context:
+                get_verified_token(token)
+            self.assertEqual(context.exception.status_code, 400)
+
+        # THEN
+        statistics = get_rejected_token_cache().get_statistics()
+        self.assertEqual(statistics["misses"] - misses_before, 1)
+        self.assertEqual(statistics["hits"] - hits_before, 2)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from app.autocomplete import SortedKeys, normalize_prefix
+
+
+class SortedKeysTestCase(unittest.TestCase):
+    """This class represents the autocompletion keys test case"""
+
+    def create_keys(self):
+        return SortedKeys(
+            [
+                ("m1", "The Shawshank Redemption"),
+                ("m2", "Reds"),
+                ("m3", "Amélie"),
+                ("m4", "Redstone"),
+            ]
+        )
+
+    def test_prefix_is_normalized(self):
+        """Test that case, accents and spaces are folded."""
+        self.assertEqual(normalize_prefix("  The  SHAW"), "the shaw")
+        self.assertEqual(normalize_prefix("Reds "), "reds ")
+        self.assertEqual(normalize_prefix("!"), "")
+
+    def test_complete_returns_texts_with_prefix_in_order(self):
+        """Test completions of a prefix, with accents folded."""
+        # GIVEN
+        keys = self.create_keys()
+
+        # WHEN
+        red_completions = keys.complete("red", limit=10)
+        ame_completions = keys.complete("ame", limit=10)
+
+        # THEN
+        self.assertEqual(
+            red_completions, [("m2", "Reds"), ("m4", "Redstone")]
+        )
+        self.assertEqual(ame_completions, [("m3", "Amélie")])
+        self.assertEqual(keys.complete("reds ", limit=10), [("m2", "Reds")])
+        self.assertEqual(keys.complete("red", limit=1), [("m2", "Reds")])
+
+    def test_complete_prefix_ending_with_word(self):
+        """Test a prefix ending with a space matching whole words."""
+        # GIVEN
+        keys = self.create_keys()
+        keys.put("m5", "Reds of Moscow")
+
+        # WHEN
+        completions = keys.complete(normalize_prefix("Reds "), limit=10)
+
+        # THEN
+        self.assertEqual(
+            completions, [("m2", "Reds"), ("m5", "Reds of Moscow")]
+        )
+        self.assertEqual(keys.complete("reds ", limit=1), [("m2", "Reds")])
+        self.assertEqual(
+            keys.complete("redstone ", limit=10), [("m4", "Redstone")]
+        )
+
+    def test_put_and_remove_keep_keys_sorted(self):
+        """Test incremental updates of texts."""
+        # GIVEN
+        keys = self.create_keys()
+
+        # WHEN
+        keys.put("m2", "Annie Hall")
+        keys.put("m5", "Red Sparrow")
+        keys.remove("m4")
+        keys.remove("unknown")
+
+        # THEN
+        self.assertEqual(len(keys), 4)
+        self.assertEqual(
+            keys.complete("red", limit=10), [("m5", "Red Sparrow")]
+        )
+        self.assertEqual(keys.complete("a", limit=10)[0], ("m3", "Amélie"))
+        self.assertEqual(
+            keys.complete("annie", limit=10), [("m2", "Annie Hall")]
+        )
@@ -0,0 +1,154 @@
+import threading
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from app.cast_graph import CastGraph, CastGraphIndex
+
+
+class CastGraphTestCase(unittest.TestCase):
+    """This class represents the co-star graph test case"""
+
+    def create_graph(self):
+        # a - b - c - d - e in a chain of movies, and a shortcut from
+        # b to d, and f without co-stars
+        graph = CastGraph()
+        graph.set_cast("m1", ["a", "b"])
+        graph.set_cast("m2", ["b", "c", "c"])
+        graph.set_cast("m3", ["c", "d"])
+        graph.set_cast("m4", ["d", "e"])
+        graph.set_cast("m5", ["b", "x", "d"])
+        graph.set_cast("m6", ["f"])
+        return graph
+
+    def test_find_path_returns_shortest_chain(self):
+        """Test bidirectional search over the shortcut."""
+        # GIVEN
+        graph = self.create_graph()
+
+        # WHEN
+        path = graph.find_path("a", "e")
+
+        # THEN
+        self.assertEqual(path, (["a", "b", "d", "e"], ["m1", "m5", "m4"]))
+        self.assertEqual(
+            graph.find_path("e", "a"),
+            (["e", "d", "b", "a"], ["m4", "m5", "m1"]),
+        )
+
+    def test_find_path_without_chain(self):
+        """Test search of actors without connection."""
+        # GIVEN
+        graph = self.create_graph()
+
+        # THEN
+        self.assertIsNone(graph.find_path("a", "f"))
+        self.assertIsNone(graph.find_path("a", "unknown"))
+        self.assertEqual(graph.find_path("f", "f"), (["f"], []))
+
+    def test_set_cast_replaces_links_of_movie(self):
+        """Test incremental updates of casts."""
+        # GIVEN
+        graph = self.create_graph()
+
+        # WHEN
+        graph.set_cast("m5", [])
+        graph.set_cast("m6", ["f", "e"])
+
+        # THEN
+        self.assertEqual(
+            graph.find_path("a", "f"),
+            (["a", "b", "c", "d", "e", "f"], ["m1", "m2", "m3", "m4", "m6"]),
+        )
+
+    def test_get_costars_counts_shared_movies(self):
+        """Test co-stars, most shared movies first."""
+        # GIVEN
+        graph = self.create_graph()
+        graph.set_cast("m7", ["b", "d"])
+
+        # WHEN
+        costars = graph.get_costars("d")
+
+        # THEN
+        self.assertEqual(costars, [("b", 2), ("c", 1), ("e", 1), ("x", 1)])
+        self.assertEqual(graph.get_costars("unknown"), [])
+
+    def test_get_similar_movies_by_jaccard_similarity(self):
+        """Test similar movies, most overlapping casts first."""
+        # GIVEN
+        graph = CastGraph()
+        graph.set_cast("m1", ["a", "b", "c"])
+        graph.set_cast("m2", ["a", "b", "c", "d"])
+        graph.set_cast("m3", ["a", "e"])
+        graph.set_cast("m4", ["f"])
+
+        # WHEN
+        similar_movies = graph.get_similar_movies("m1")
+
+        # THEN
+        self.assertEqual(similar_movies, [("m2", 0.75, 3), ("m3", 0.25, 1)])
+        self.assertEqual(graph.get_similar_movies("m1", 1), [("m2", 0.75, 3)])
+        self.assertEqual(graph.get_similar_movies("m4"), [])
+        self.assertEqual(graph.get_similar_movies("unknown"), [])
+
+    def test_get_similar_movies_after_casts_change(self):
+        """Test cached similar movies after updates of casts."""
+        # GIVEN
+        graph = CastGraph()
+        graph.set_cast("m1", ["a", "b"])
+        graph.set_cast("m2", ["a", "c"])
+        graph.set_cast("m3", ["d"])
+        before = graph.get_similar_movies("m1")
+
+        # WHEN
+        graph.set_cast("m2", ["a", "b"])
+        graph.set_cast("m3", ["b", "d"])
+        after_update = graph.get_similar_movies("m1")
+        graph.set_cast("m2", [])
+        after_delete = graph.get_similar_movies("m1")
+
+        # THEN
+        self.assertEqual(before, [("m2", 1 / 3, 1)])
+        self.assertEqual(after_update, [("m2", 1.0, 2), ("m3", 1 / 3, 1)])
+        self.assertEqual(after_delete, [("m3", 1 / 3, 1)])
+
+
+class CastGraphIndexTestCase(unittest.TestCase):
+    """This class represents the co-star graph index test case"""
+
+    def test_concurrent_refreshes_set_last_loaded_cast(self):
+        """Test that a cast loaded before a write is not set after the
+        cast loaded after the write."""
+        # GIVEN
+        with mock.patch.object(
+            CastGraphIndex, "load", return_value=CastGraph()
+        ):
+            index = CastGraphIndex(Flask(__name__))
+            index.get_data()
+        casts = [["a"], ["a", "b"]]
+        loads = []
+        refreshes = []
+
+        def load_cast(movie_id):
+            loads.append(movie_id)
+            cast = casts[len(loads) - 1]
+            if len(loads) == 1:
+                # Another write is committed and refreshed meanwhile
+                refresh = threading.Thread(
+                    target=index.refresh_cast, args=("m1",)
+                )
+                refresh.start()
+                refresh.join(0.1)
+                refreshes.append(refresh)
+            return cast
+
+        # WHEN
+        with mock.patch("app.cast_graph.load_cast", load_cast):
+            index.refresh_cast("m1")
+            refreshes[0].join(5)
+
+        # THEN
+        self.assertEqual(len(loads), 2)
+        self.assertEqual(index.get_costars("a"), [("b", 1)])
@@ -0,0 +1,199 @@
+import threading
+import time
+import unittest
+
+from flask import Flask
+
+from app.indexing import InMemoryIndex, IndexNotReadyError
+from app.search import SearchData, normalize
+from ..auth.jwks import FakeClock
+
+
+class SearchDataTestCase(unittest.TestCase):
+    """This class represents the search index data test case"""
+
+    def create_data(self):
+        data = SearchData()
+        data.add("movie", "m1", "The Shawshank Redemption")
+        data.add("movie", "m2", "Amélie")
+        data.add("role", "r1", "Ellis Boyd 'Red' Redding")
+        data.add("actor", "a1", "Diane Keaton")
+        return data
+
+    def test_text_is_normalized(self):
+        """Test that case and accents are folded."""
+        self.assertEqual(normalize("AMÉLIE"), "amelie")
+
+    def test_search_finds_documents_with_tokens(self):
+        """Test search with exact and accent folded tokens."""
+        # GIVEN
+        data = self.create_data()
+
+        # WHEN
+        results, total = data.search("amelie")
+
+        # THEN
+        self.assertEqual(total, 1)
+        self.assertEqual(results[0][:2], ("movie", "m2"))
+
+    def test_search_finds_similar_tokens(self):
+        """Test search with a misspelled token."""
+        # GIVEN
+        data = self.create_data()
+
+        # WHEN
+        results, _ = data.search("redempton")
+
+        # THEN
+        self.assertEqual(results[0][:2], ("movie", "m1"))
+
+    def test_search_finds_documents_with_all_tokens(self):
+        """Test that known tokens are not matched with similar ones."""
+        # GIVEN
+        data = self.create_data()
+
+        # WHEN
+        red_results, red_total = data.search("red")
+        red_boyd_results, red_boyd_total = data.search("red boyd")
+
+        # THEN
+        self.assertEqual(red_total, 1)
+        self.assertEqual(red_results[0][:2], ("role", "r1"))
+        self.assertEqual(red_boyd_total, 1)
+        self.assertEqual(data.search("red keaton"), ([], 0))
+
+    def test_search_ignores_unknown_tokens(self):
+        """Test search with a token without any similar token."""
+        # GIVEN
+        data = self.create_data()
+
+        # WHEN
+        results, total = data.search("keaton xyzzy")
+
+        # THEN
+        self.assertEqual(total, 1)
+        self.assertEqual(results[0][:2], ("actor", "a1"))
+
+    def test_search_filters_kinds_and_pages(self):
+        """Test search for some kinds with limit and offset."""
+        # GIVEN
+        data = SearchData()
+        for number in range(5):
+            data.add("movie", f"m{number}", f"Movie {number}")
+        data.add("role", "r1", "Movie fan")
+
+        # WHEN
+        first, total = data.search("movie", kinds=("movie",), limit=2)
+        rest, _ = data.search("movie", kinds=("movie",), limit=10, offset=2)
+
+        # THEN
+        self.assertEqual(total, 5)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(rest), 3)
+        ids = {id for _, id, _ in first + rest}
+        self.assertEqual(ids, {f"m{number}" for number in range(5)})
+
+    def test_replaced_and_removed_documents_are_not_found(self):
+        """Test updates of documents, including compaction."""
+        # GIVEN
+        data = self.create_data()
+
+        # WHEN
+        data.add("movie", "m2", "Reds")
+        data.remove("actor", "a1")
+        data.remove("role", "r1")
+
+        # THEN
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data.search("amelie"), ([], 0))
+        self.assertEqual(data.search("keaton"), ([], 0))
+        results, total = data.search("reds")
+        self.assertEqual(total, 1)
+        self.assertEqual(results[0][:2], ("movie", "m2"))
+
+
+class ListIndex(InMemoryIndex):
+    """An index of the values loaded from a list."""
+
+    def __init__(self, app, values, **kwargs):
+        super().__init__(app, **kwargs)
+        self.values = values
+        self.on_load = None
+
+    def load(self):
+        if self.on_load is not None:
+            self.on_load()
+        return list(self.values)
+
+
+class InMemoryIndexTestCase(unittest.TestCase):
+    """This class represents the in-memory index test case"""
+
+    def test_index_is_built_on_first_use(self):
+        """Test that the data is loaded once."""
+        # GIVEN
+        index = ListIndex(Flask(__name__), [1, 2])
+
+        # WHEN
+        data = index.get_data()
+        index.values.append(3)
+
+        # THEN
+        self.assertEqual(data, [1, 2])
+        self.assertIs(index.get_data(), data)
+        self.assertTrue(index.get_state()["built"])
+
+    def test_index_is_not_ready_during_first_build(self):
+        """Test that use does not wait for the first build, if so
+        configured."""
+        # GIVEN
+        index = ListIndex(Flask(__name__), [1], wait_for_build=False)
+        loading = threading.Event()
+        index.on_load = lambda: loading.wait(5)
+
+        # WHEN
+        with self.assertRaises(IndexNotReadyError):
+            index.get_data()
+        rebuilding = index.get_state()["rebuilding"]
+        loading.set()
+        deadline = time.monotonic() + 5
+        while index.get_state()["rebuilding"]:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        # THEN
+        self.assertTrue(rebuilding)
+        self.assertEqual(index.get_data(), [1])
+
+    def test_updates_during_build_are_replayed(self):
+        """Test that writes while loading are not lost."""
+        # GIVEN
+        index = ListIndex(Flask(__name__), [1])
+        index.on_load = lambda: index.update(lambda data: data.append(2))
+
+        # WHEN
+        data = index.get_data()
+
+        # THEN
+        self.assertEqual(data, [1, 2])
+
+    def test_stale_index_is_rebuilt_in_background(self):
+        """Test that an old index is served while it is rebuilt."""
+        # GIVEN
+        clock = FakeClock()
+        index = ListIndex(Flask(__name__), [1], max_age=10, clock=clock)
+        index.get_data()
+        index.values.append(2)
+        clock.advance(10)
+
+        # WHEN
+        stale_data = index.get_data()
+        deadline = time.monotonic() + 5
+        while index.get_state()["rebuilding"]:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        # THEN
+        self.assertEqual(stale_data, [1])
+        self.assertEqual(index.get_data(), [1, 2])
+        self.assertEqual(index.get_state()["age_seconds"], 0)
@@ -0,0 +1,136 @@
+import unittest
+from datetime import date
+
+from app.stats import StatsSnapshot, Table
+
+
+class TableTestCase(unittest.TestCase):
+    """This class represents the columnar table test case"""
+
+    def test_remove_keeps_rows_dense(self):
+        """Test removal of rows by moving the last row."""
+        # GIVEN
+        table = Table(("a", "b"))
+        table.put("x", a=1, b=2)
+        table.put("y", a=3)
+        table.put("z", a=5, b=6)
+
+        # WHEN
+        table.remove("x")
+        table.remove("unknown")
+        table.put("y", b=4)
+
+        # THEN
+        self.assertEqual(len(table), 2)
+        self.assertEqual(list(table.columns["a"]), [5, 3])
+        self.assertEqual(list(table.columns["b"]), [6, 4])
+        self.assertEqual(table.get("z", "a"), 5)
+        self.assertIsNone(table.get("x", "a"))
+
+
+class StatsSnapshotTestCase(unittest.TestCase):
+    """This class represents the statistics snapshot test case"""
+
+    def create_snapshot(self):
+        return StatsSnapshot(
+            movies=[
+                ("m1", date(1977, 4, 20), 2, 0),
+                ("m2", date(1977, 12, 31), 2, 1),
+                ("m3", date(1994, 10, 14), 1, 1),
+                ("m4", date(2001, 1, 1), 0, 0),
+            ],
+            actors=[
+                ("a1", date(1985, 3, 26)),
+                ("a2", date(1946, 1, 5)),
+                ("a3", date(1935, 11, 30)),
+            ],
+        )
+
+    def test_count_movies_per_year(self):
+        """Test movies per year after movies change."""
+        # GIVEN
+        snapshot = self.create_snapshot()
+        before = snapshot.count_movies_per_year()
+
+        # WHEN
+        snapshot.put_movie("m2", date(1978, 1, 1))
+        snapshot.put_movie("m5", date(1994, 1, 1))
+        snapshot.remove_movie("m4")
+
+        # THEN
+        self.assertEqual(before, [(1977, 2), (1994, 1), (2001, 1)])
+        self.assertEqual(
+            snapshot.count_movies_per_year(),
+            [(1977, 1), (1978, 1), (1994, 2)],
+        )
+
+    def test_count_actors_per_age_group(self):
+        """Test age groups of actors, with birthdays on the day."""
+        # GIVEN
+        snapshot = self.create_snapshot()
+
+        # WHEN
+        snapshot.put_actor("a4", date(1986, 3, 26))
+        snapshot.remove_actor("a3")
+
+        # THEN
+        self.assertEqual(
+            snapshot.count_actors_per_age_group(date(2026, 3, 26)),
+            [(40, 2), (80, 1)],
+        )
+        self.assertEqual(
+            snapshot.count_actors_per_age_group(date(2026, 3, 25), 5),
+            [(35, 1), (40, 1), (80, 1)],
+        )
+        self.assertEqual(
+            StatsSnapshot().count_actors_per_age_group(date(2026, 3, 26)),
+            [],
+        )
+
+    def test_count_actors_per_age_group_on_leap_day(self):
+        """Test ages of actors born on February 29."""
+        # GIVEN
+        snapshot = StatsSnapshot(
+            actors=[("a1", date(2000, 2, 29)), ("a2", date(2003, 2, 28))]
+        )
+
+        # THEN
+        self.assertEqual(
+            snapshot.count_actors_per_age_group(date(2028, 2, 29), 1),
+            [(25, 1), (28, 1)],
+        )
+        self.assertEqual(
+            snapshot.count_actors_per_age_group(date(2027, 2, 28), 1),
+            [(24, 1), (26, 1)],
+        )
+
+    def test_roles_and_cast_coverage(self):
+        """Test roles per movie and cast coverage after roles change."""
+        # GIVEN
+        snapshot = self.create_snapshot()
+
+        # WHEN
+        snapshot.set_roles("m2", 2, 0)
+        snapshot.set_roles("unknown", 1, 0)
+        snapshot.remove_movie("m3")
+
+        # THEN
+        self.assertEqual(
+            snapshot.count_movies_per_number_of_roles(), [(0, 1), (2, 2)]
+        )
+        self.assertEqual(
+            snapshot.get_cast_coverage(),
+            {
+                "movies": 3,
+                "movies_without_roles": 1,
+                "fully_cast_movies": 2,
+                "roles": 4,
+                "cast_roles": 4,
+                "open_roles": 0,
+                "cast_coverage": 1.0,
+            },
+        )
+        self.assertEqual(
+            snapshot.get_totals(),
+            {"movies": 3, "actors": 3, "roles": 4, "open_roles": 0},
+        )